@@ -19,7 +19,9 @@ since these vary greatly by application.
 
 Transactor
 	Basic mixin for agents conducting cash transactions.
-Indiv(Transactor)
+BaseIndiv(Transactor)
+	Behavior of a basic deterministic individual.
+Indiv(BaseIndiv)
 	Basic deterministic individual with demographic features.
 Cohort
 	Tuple of Indiv instances.
@@ -33,6 +35,8 @@ FundAccount(Transactor)
 	Basic account.
 State(Transactor)
 	Basic state for estate taxation.
+SlotIndiv, SlotFundAccount, SlotCohort
+	Slotted (``__dict__``-free) variants of Indiv, FundAccount, Cohort.
 Economy
 	For illustrative purposes only.
 EconomyParams
@@ -48,6 +52,7 @@ from __future__ import division
 #from __future__ import absolute_import
 __docformat__ = "restructuredtext en"
 from collections import deque  #subclassed by Population
+from collections.abc import Sequence  #subclassed by SlotCohort
 
 #logging
 import logging
@@ -127,6 +132,7 @@ class Transactor(object):
 		value of all accounts
 		(read only property)
 	"""
+	__slots__ = ()
 	_cash = 0
 	_accounts = ()
 	def payin(self, amt):
@@ -154,8 +160,10 @@ class Transactor(object):
 	cash = property(get_cash, set_cash)
 
 
-class Indiv(Transactor):
-	"""Provide a basic non-optimizing individual.
+class BaseIndiv(Transactor):
+	"""Provide the behavior of a basic non-optimizing individual.
+	Holds no instance storage of its own (empty `__slots__`):
+	use `Indiv` (instance `__dict__`) or `SlotIndiv` (slots).
 
 	Attributes
 	----------
@@ -173,6 +181,7 @@ class Indiv(Transactor):
 		Indiv's children, in order of "birth".
 		(Read only property.)
 	"""
+	__slots__ = ()
 	def __init__(self, sex=None, economy=None):
 		self._sex = sex
 		self.economy = economy
@@ -308,6 +317,13 @@ class Indiv(Transactor):
 		acct = fund.create_account(self, amt=amt)
 		self._accounts.append(acct)
 
+class Indiv(BaseIndiv):
+	"""Provide a basic non-optimizing individual.
+	Instances have a `__dict__`, so subclasses
+	may freely add attributes.
+	"""
+	pass
+
 class Fund(Transactor): #chkchkchk
 	"""Provide a basic financial institution.
 	Often just for accounting (e.g., handling transfers)
@@ -339,8 +355,12 @@ class Fund(Transactor): #chkchkchk
 	def distribute_gains(self):
 		raise NotImplementedError
 
-class FundAccount(Transactor):
-	"""Provide a basic security (account)."""
+class BaseFundAccount(Transactor):
+	"""Provide the behavior of a basic security (account).
+	Holds no instance storage of its own (empty `__slots__`):
+	use `FundAccount` or `SlotFundAccount`.
+	"""
+	__slots__ = ()
 	def __init__(self, fund, indiv, amt=0):
 		self.fund = fund
 		self.owner = indiv
@@ -350,6 +370,10 @@ class FundAccount(Transactor):
 			"Zero value required to close acct."
 		self.fund.close_account(self)
 
+class FundAccount(BaseFundAccount):
+	"""Provide a basic security (account)."""
+	pass
+
 class Cohort(tuple):
 	"""Provide a basic cohort class.
 
@@ -486,6 +510,79 @@ class State(Transactor):
 		#call module level `transfer` function  #is this best? (or having economy handle transfers?)
 		transfer(payer=indiv, payee=self, amount=tax)
 
+
+####################  SLOTTED AGENT CLASSES  ###########################
+
+# Slotted variants of the agent classes.
+# Instances have no `__dict__`, so they are smaller
+# and attribute access is cheaper than for the basic classes.
+# They are also locked: assigning an attribute not listed
+# in `__slots__` raises AttributeError (as `Lockable` does),
+# but without a per-assignment `__setattr__` hook.
+# Subclasses that do not declare their own `__slots__`
+# get a `__dict__` back, so existing subclasses
+# (e.g., the Pestieau agents) may use these as base classes unchanged.
+# Declare `__slots__` in the subclass to keep it lean.
+
+class SlotIndiv(BaseIndiv):
+	"""Provide a basic non-optimizing individual,
+	storing its attributes in slots.
+	:see: `BaseIndiv`
+	"""
+	__slots__ = ('_cash', '_accounts',
+		'_sex', 'economy', '_cohort', '_params', '_alive',
+		'_spouse', '_children', 'parents', 'siblings',
+		'employers', 'contracts')
+	def __init__(self, sex=None, economy=None):
+		#slots do not fall back to the `Transactor` class defaults
+		self._cash = 0
+		self._accounts = list()
+		BaseIndiv.__init__(self, sex=sex, economy=economy)
+
+class SlotFundAccount(BaseFundAccount):
+	"""Provide a basic security (account),
+	storing its attributes in slots.
+	"""
+	__slots__ = ('_cash', '_accounts', 'fund', 'owner')
+	def __init__(self, fund, indiv, amt=0):
+		self._accounts = ()
+		BaseFundAccount.__init__(self, fund, indiv, amt)
+
+class SlotCohort(Sequence):
+	"""Provide a basic cohort class,
+	storing its attributes in slots.
+	Python does not allow nonempty `__slots__` on `tuple` subclasses,
+	so this is an immutable sequence that wraps a tuple of Indiv instances.
+	It shares the `Cohort` properties.
+
+	:note: user must override `marry`
+	"""
+	__slots__ = ('_indivs', '_age', '_population', '_params',
+		'males', 'females')
+	def __init__(self, seq):
+		self._indivs = indivs = tuple(seq)
+		self._age = 0
+		self._population = None
+		self._params = None
+		for indiv in indivs:
+			indiv.cohort = self
+		self.males = tuple(indiv for indiv in indivs if indiv.sex=='M')
+		self.females = tuple(indiv for indiv in indivs if indiv.sex=='F')
+		assert (len(indivs)==len(self.males)+len(self.females)),\
+		"Every indiv must have a sex."
+	def __len__(self):
+		return len(self._indivs)
+	def __getitem__(self, idx):
+		return self._indivs[idx]
+	def __iter__(self):
+		return iter(self._indivs)
+	def __repr__(self):
+		return "%s(%r)"%(type(self).__name__, self._indivs)
+	params = Cohort.params
+	population = Cohort.population
+	age = Cohort.age
+
+
 class Economy(object):
 	"""Provides a controller for the simulation.
 	A rough example:  Do not use as is!"""
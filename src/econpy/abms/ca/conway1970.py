@@ -3,24 +3,27 @@ An ultra-simple version of Conway's game of life.
 Implements the Gosper glider gun for illustration.
 Uses a finite world, so there is a small anomaly
 at the edge.
+Stepping is done by the `lifelike` engine;
+set GENS_PER_FRAME to advance several generations per plot.
 
 :see: http://www.argentum.freeserve.co.uk/lex_g.htm#gosperglidergun
 """
-from time import sleep
 import numpy as np
-from scipy import ndimage
 import matplotlib.pyplot as plt
 
+from econpy.abms.ca.lifelike import LifeLikeCA
+
+GENS_PER_FRAME = 1
+
 #turn on interactive use
 plt.ion()
-plt.hold(False)
 
 #initialize figure
 fig1 = plt.figure(1)
 ax1 = fig1.gca()
 
 #initialize array
-grid = np.zeros( (100,100), dtype=np.int)
+grid = np.zeros( (100,100), dtype=np.uint8)
 
 """
 #blinker
@@ -54,18 +57,12 @@ grid[2:11,2:38] = np.array([
 
 
 
-#Game of Life footprint and rules
-fp = [(1,1,1),(1,1,1),(1,1,1)]
-def fnc(buffer):
-	alive = buffer[4]
-	s = sum(buffer)
-	test = ((s==3) or (s-alive==3))
-	return test
-
-
-for _ in range(1000):
-	plt.matshow(grid, fignum=False)
-	grid = ndimage.generic_filter(grid, fnc, footprint=fp, mode='constant')
-	sleep(0.05)
+#Game of Life (B3/S23) on a finite world
+life = LifeLikeCA(grid, rule='B3/S23', torus=False)
+image = ax1.matshow(life.grid)
 
+for _ in range(1000//GENS_PER_FRAME):
+	life.step(GENS_PER_FRAME)
+	image.set_data(life.grid)
+	plt.pause(0.05)
 
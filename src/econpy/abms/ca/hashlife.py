@@ -0,0 +1,340 @@
+"""
+Provide Gosper's Hashlife algorithm for Life-like cellular automata
+on an unbounded plane.
+
+The plane is a quadtree of canonical nodes:
+each distinct pattern is stored once (hash-consing),
+so repeated structure in space is shared,
+and the future of each node is memoized,
+so repeated structure in time is computed once.
+This allows advancing regular patterns by billions of generations.
+The node table is bounded: when it exceeds `max_nodes`
+(checked during each jump, not only between jumps),
+nodes unreachable from the current pattern, the memoized futures,
+and the computation in progress are garbage collected.
+(If more nodes than that are in use, the table may grow
+to about twice the number in use.)
+
+Grids import from and export to the 2d array format
+used by `lifelike`, so small cases can be compared with
+`lifelike.LifeLikeCA` (with `torus=False`, as long as the pattern
+stays away from the edge of the finite grid).
+
+:see: Gosper, R. Wm. (1984) Exploiting Regularities in Large Cellular Spaces.
+      *Physica D* 10, 75--80.
+:license: `MIT license`_
+
+.. _`MIT license`: http://www.opensource.org/licenses/mit-license.php
+"""
+__docformat__ = "restructuredtext en"
+__author__ = 'Alan G. Isaac (and others as specified)'
+
+import numpy as np
+
+from .lifelike import parse_rule
+
+
+class Node(object):
+    """Provide a canonical quadtree node of level `k`
+    (a square of 2**k cells).
+    Do not create nodes directly; use `HashLife.join`,
+    so that each pattern has a single node.
+
+    Attributes
+    ----------
+    k : int
+        level (0 for a single cell)
+    nw, ne, sw, se : Node
+        the four quadrants (level k-1), or None for a cell
+    population : int
+        number of live cells
+    """
+    __slots__ = ('k', 'nw', 'ne', 'sw', 'se', 'population')
+    def __init__(self, k, nw, ne, sw, se, population):
+        self.k = k
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+    def __repr__(self):
+        return "Node(k=%d, population=%d)" % (self.k, self.population)
+
+
+class HashLife(object):
+    """Provide a Hashlife engine for a Life-like rule.
+
+    Attributes
+    ----------
+    root : Node
+        The current pattern.
+    origin : (int, int)
+        Plane coordinates (row, column) of the top-left cell of `root`.
+    generation : int
+        Number of generations advanced.
+    """
+    def __init__(self, grid=None, rule='B3/S23', max_nodes=2**22):
+        """
+        :param grid: 2d array of 0/1 (or bool), placed with
+                     its top-left cell at plane coordinates (0,0)
+        :param rule: str, rule in B/S notation (see `lifelike.parse_rule`)
+        :param max_nodes: int, node count that triggers garbage collection
+        """
+        birth, survive = parse_rule(rule)
+        if 0 in birth:
+            raise ValueError("Rules with B0 have no dead background; Hashlife cannot run them.")
+        self.birth, self.survive = birth, survive
+        self.max_nodes = max_nodes
+        self._table = dict()    #(nw,ne,sw,se) -> Node (hash consing)
+        self._results = dict()  #(Node, j) -> Node (memoized futures)
+        self._empty = list()    #empty node at each level
+        self._path = list()     #node sequences in use by `successor` calls in progress
+        self._limit = max_nodes #table size that triggers garbage collection
+        self.off = Node(0, None, None, None, None, 0)
+        self.on = Node(0, None, None, None, None, 1)
+        self.generation = 0
+        self.shape = (0, 0)
+        self.root, self.origin = self.empty(3), (0, 0)
+        if grid is not None:
+            self.set_grid(grid)
+
+    ################  canonical nodes  ################################
+    def join(self, nw, ne, sw, se):
+        """Return the canonical node with the given quadrants."""
+        key = (nw, ne, sw, se)
+        node = self._table.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = Node(nw.k + 1, nw, ne, sw, se, population)
+            self._table[key] = node
+        return node
+    def empty(self, k):
+        """Return the canonical empty node of level `k`."""
+        empty = self._empty
+        if not empty:
+            empty.append(self.off)
+        while len(empty) <= k:
+            e = empty[-1]
+            empty.append(self.join(e, e, e, e))
+        return empty[k]
+    def centre(self, node):
+        """Return node of level k+1 with `node` at its center."""
+        e = self.empty(node.k - 1)
+        return self.join(
+            self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+            self.join(e, node.sw, e, e), self.join(node.se, e, e, e))
+    def _inner(self, node):
+        """Return the central node of level k-2."""
+        return self.join(node.nw.se.se, node.ne.sw.sw, node.sw.ne.ne, node.se.nw.nw)
+    @property
+    def nodes(self):
+        """Return int, number of nodes in the node table."""
+        return len(self._table)
+
+    ################  evolution  ######################################
+    def _base(self, node):
+        """Return level 1 node, center of level 2 `node` after one generation."""
+        cells = [[0] * 4 for _ in range(4)]
+        for r0, c0, q in ((0, 0, node.nw), (0, 2, node.ne), (2, 0, node.sw), (2, 2, node.se)):
+            cells[r0][c0], cells[r0][c0 + 1] = q.nw.population, q.ne.population
+            cells[r0 + 1][c0], cells[r0 + 1][c0 + 1] = q.sw.population, q.se.population
+        birth, survive = self.birth, self.survive
+        new = list()
+        for r in (1, 2):
+            for c in (1, 2):
+                n = (sum(cells[rr][cc] for rr in (r - 1, r, r + 1) for cc in (c - 1, c, c + 1))
+                     - cells[r][c])
+                alive = (n in survive) if cells[r][c] else (n in birth)
+                new.append(self.on if alive else self.off)
+        return self.join(*new)
+    def successor(self, node, j):
+        """Return node of level k-1, the center of `node`
+        after 2**j generations (requires j <= k-2).
+        """
+        if node.population == 0:
+            return self.empty(node.k - 1)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+        if len(self._table) > self._limit:
+            self.collect()
+        if node.k == 2:
+            result = self._base(node)
+        else:
+            join, succ = self.join, self.successor
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # full speed (j == k-2) takes two half steps
+            onestep = j < node.k - 2
+            cj = j if onestep else j - 1
+            # nine overlapping subnodes of level k-1, each advanced;
+            # the subnodes and results are on `_path` (safe from `collect`)
+            subnodes = (nw, join(nw.ne, ne.nw, nw.se, ne.sw), ne,
+                        join(nw.sw, nw.se, sw.nw, sw.ne), join(nw.se, ne.sw, sw.ne, se.nw),
+                        join(ne.sw, ne.se, se.nw, se.ne),
+                        sw, join(sw.ne, se.nw, sw.se, se.sw), se)
+            cs = list()
+            path = self._path
+            path.extend((subnodes, cs))
+            for sub in subnodes:
+                cs.append(succ(sub, cj))
+            c1, c2, c3, c4, c5, c6, c7, c8, c9 = cs
+            if onestep:  #already far enough; take centers
+                result = join(
+                    join(c1.se, c2.sw, c4.ne, c5.nw),
+                    join(c2.se, c3.sw, c5.ne, c6.nw),
+                    join(c4.se, c5.sw, c7.ne, c8.nw),
+                    join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:  #advance again
+                quads = (join(c1, c2, c4, c5), join(c2, c3, c5, c6),
+                         join(c4, c5, c7, c8), join(c5, c6, c8, c9))
+                path.append(quads)
+                result = join(*[succ(quad, cj) for quad in quads])
+                path.pop()
+            del path[-2:]
+        self._results[key] = result
+        return result
+    def _pad(self, j):
+        """Return None.  Pad the root until it has level >= j+3
+        and all live cells lie within its central level k-2 node.
+        """
+        root = self.root
+        row, col = self.origin
+        while root.k < j + 3 or self._inner(root).population != root.population:
+            row, col = row - 2 ** (root.k - 1), col - 2 ** (root.k - 1)
+            root = self.centre(root)
+        self.root, self.origin = root, (row, col)
+    def step(self, generations=1):
+        """Return None.  Advance `generations` generations."""
+        if generations < 0:
+            raise ValueError("Cannot step backwards.")
+        j = 0
+        n = generations
+        self._path = list()
+        while n:
+            if n & 1:
+                self._pad(j)
+                root = self.root
+                row, col = self.origin
+                quarter = 2 ** (root.k - 2)
+                self.root = self.successor(root, j)
+                self.origin = (row + quarter, col + quarter)
+                if len(self._table) > self._limit:
+                    self.collect()
+            n >>= 1
+            j += 1
+        self.generation += generations
+    @property
+    def population(self):
+        """Return int, the number of live cells."""
+        return self.root.population
+
+    ################  garbage collection  #############################
+    def _mark(self, node, marked):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.k > 0 and id(node) not in marked:
+                marked[id(node)] = node
+                stack.extend((node.nw, node.ne, node.sw, node.se))
+    def collect(self):
+        """Return None.  Drop nodes (and memoized results)
+        not reachable from the current pattern
+        or from a `successor` computation in progress.
+        If that does not free at least half the table,
+        drop all memoized results as well.
+        """
+        def mark_live():
+            marked = dict()
+            self._mark(self.root, marked)
+            for e in self._empty:
+                self._mark(e, marked)
+            for nodes in self._path:
+                for node in nodes:
+                    self._mark(node, marked)
+            return marked
+        marked = mark_live()
+        results = {key: res for key, res in self._results.items() if id(key[0]) in marked}
+        for res in results.values():
+            self._mark(res, marked)
+        if len(marked) > self.max_nodes // 2:
+            results = dict()
+            marked = mark_live()
+        self._results = results
+        self._table = {(n.nw, n.ne, n.sw, n.se): n for n in marked.values()}
+        #if most nodes are in use, let the table grow before collecting again
+        self._limit = max(self.max_nodes, 2 * len(self._table))
+
+    ################  NumPy import and export  ########################
+    def set_grid(self, grid, origin=(0, 0)):
+        """Return None.  Make `grid` the current pattern,
+        with its top-left cell at plane coordinates `origin`.
+        """
+        grid = np.asarray(grid, dtype=bool)
+        if grid.ndim != 2:
+            raise ValueError("grid must be 2d.")
+        self.shape = grid.shape
+        k = max(3, int(np.ceil(np.log2(max(grid.shape + (1,))))))
+        size = 2 ** k
+        padded = np.zeros((size, size), dtype=bool)
+        padded[:grid.shape[0], :grid.shape[1]] = grid
+        self.root = self._build(padded, k)
+        self.origin = tuple(origin)
+    def _build(self, cells, k):
+        if k == 0:
+            return self.on if cells[0, 0] else self.off
+        if not cells.any():
+            return self.empty(k)
+        h = 2 ** (k - 1)
+        return self.join(self._build(cells[:h, :h], k - 1), self._build(cells[:h, h:], k - 1),
+                         self._build(cells[h:, :h], k - 1), self._build(cells[h:, h:], k - 1))
+    def get_grid(self, shape=None, origin=(0, 0)):
+        """Return uint8 array, the cells in the window of `shape`
+        (default: the shape of the imported grid)
+        with top-left cell at plane coordinates `origin`.
+        """
+        nrows, ncols = self.shape if shape is None else shape
+        result = np.zeros((nrows, ncols), dtype=np.uint8)
+        row, col = self.origin
+        self._fill(result, self.root, row - origin[0], col - origin[1])
+        return result
+    def _fill(self, out, node, row, col):
+        size = 2 ** node.k
+        nrows, ncols = out.shape
+        if (node.population == 0 or row >= nrows or col >= ncols
+                or row + size <= 0 or col + size <= 0):
+            return
+        if node.k == 0:
+            out[row, col] = 1
+            return
+        h = size // 2
+        self._fill(out, node.nw, row, col)
+        self._fill(out, node.ne, row, col + h)
+        self._fill(out, node.sw, row + h, col)
+        self._fill(out, node.se, row + h, col + h)
+    def bounding_box(self):
+        """Return (top, left, bottom, right) plane coordinates
+        of the live cells (bottom and right exclusive), or None if empty.
+        """
+        if self.root.population == 0:
+            return None
+        bounds = [None, None, None, None]
+        row, col = self.origin
+        self._bounds(self.root, row, col, bounds)
+        return tuple(bounds)
+    def _bounds(self, node, row, col, bounds):
+        if node.population == 0:
+            return
+        top, left, bottom, right = bounds
+        size = 2 ** node.k
+        if (top is not None and row >= top and col >= left
+                and row + size <= bottom and col + size <= right):
+            return  #nothing new can be learned
+        if node.k == 0:
+            bounds[0] = row if top is None else min(top, row)
+            bounds[1] = col if left is None else min(left, col)
+            bounds[2] = row + 1 if bottom is None else max(bottom, row + 1)
+            bounds[3] = col + 1 if right is None else max(right, col + 1)
+            return
+        h = size // 2
+        self._bounds(node.nw, row, col, bounds)
+        self._bounds(node.ne, row, col + h, bounds)
+        self._bounds(node.sw, row + h, col, bounds)
+        self._bounds(node.se, row + h, col + h, bounds)
@@ -0,0 +1,293 @@
+"""
+Provide a fast engine for Life-like cellular automata.
+Supports any outer-totalistic (Moore neighborhood) rule
+in B/S notation (e.g., 'B3/S23' for Conway's game of life),
+on a finite world (cells outside are dead) or a torus.
+
+Two stepping methods are available:
+
+convolve
+    Count neighbors as an integer convolution
+    (a sum of shifted uint8 arrays) and apply the rule by table lookup.
+bitpacked
+    Pack each row into uint64 words (64 cells per word)
+    and count neighbors with bit-sliced adders,
+    so each array operation updates 64 cells at once.
+
+Use `LifeLikeCA.step` to advance any number of generations
+without rendering.
+
+:see: http://www.conwaylife.com/wiki/Rulestring
+:license: `MIT license`_
+
+.. _`MIT license`: http://www.opensource.org/licenses/mit-license.php
+"""
+__docformat__ = "restructuredtext en"
+__author__ = 'Alan G. Isaac (and others as specified)'
+
+import re
+import numpy as np
+
+_WORDBITS = 64
+_rule_re = re.compile(r'^B(?P<birth>[0-8]*)/S(?P<survive>[0-8]*)$', re.IGNORECASE)
+
+def parse_rule(rule):
+    """Return (birth, survive), two frozensets of neighbor counts.
+
+    :param rule: str, rule in B/S notation (e.g., 'B3/S23'),
+                 or a (birth, survive) pair of sequences of int
+    """
+    if isinstance(rule, str):
+        m = _rule_re.match(rule.replace(' ', ''))
+        if m is None:
+            raise ValueError("Rule %r is not in B/S notation (e.g., 'B3/S23')." % rule)
+        birth, survive = m.group('birth'), m.group('survive')
+    else:
+        birth, survive = rule
+    birth = frozenset(int(n) for n in birth)
+    survive = frozenset(int(n) for n in survive)
+    if not birth.union(survive) <= set(range(9)):
+        raise ValueError("Neighbor counts must be in 0..8.")
+    return birth, survive
+
+def rule_table(rule):
+    """Return (2,9) bool array, where `result[alive, n]` is the
+    next state of a cell with state `alive` and `n` live neighbors.
+    """
+    birth, survive = parse_rule(rule)
+    table = np.zeros((2, 9), dtype=bool)
+    table[0, sorted(birth)] = True
+    table[1, sorted(survive)] = True
+    return table
+
+################  integer convolution  ################################
+
+def neighbor_counts(grid, torus=False):
+    """Return uint8 array, the number of live Moore neighbors of each cell.
+
+    :param grid: 2d array of 0/1 (or bool)
+    :param torus: bool, True to wrap at the edges (else cells outside are dead)
+    """
+    grid = np.asarray(grid, dtype=np.uint8)
+    if torus:
+        rows = grid + np.roll(grid, 1, axis=0) + np.roll(grid, -1, axis=0)
+        counts = rows + np.roll(rows, 1, axis=1) + np.roll(rows, -1, axis=1)
+    else:
+        padded = np.pad(grid, 1)
+        rows = padded[:-2] + padded[1:-1] + padded[2:]
+        counts = rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]
+    return counts - grid
+
+def step_convolve(grid, rule='B3/S23', torus=False, generations=1):
+    """Return uint8 array, `grid` advanced `generations` generations
+    (by integer convolution and table lookup).
+    """
+    table = rule_table(rule)
+    grid = np.asarray(grid, dtype=np.uint8)
+    for _ in range(generations):
+        grid = table[grid, neighbor_counts(grid, torus)].view(np.uint8)
+    return grid
+
+################  bit-packed rows  ####################################
+
+def pack(grid):
+    """Return (nrows, nwords) uint64 array, each row of `grid`
+    packed 64 cells per word (column c in bit c%64 of word c//64).
+    """
+    grid = np.asarray(grid, dtype=bool)
+    nrows, ncols = grid.shape
+    nwords = -(-ncols // _WORDBITS)
+    padded = np.zeros((nrows, nwords * _WORDBITS), dtype=bool)
+    padded[:, :ncols] = grid
+    bytes_ = np.packbits(padded, axis=1, bitorder='little')
+    return bytes_.view('<u8').astype(np.uint64, copy=False)
+
+def unpack(words, ncols):
+    """Return (nrows, ncols) uint8 array, inverse of `pack`."""
+    bytes_ = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    return np.unpackbits(bytes_, axis=1, count=ncols, bitorder='little')
+
+def _add(a, b):
+    """Return list of bit planes (least significant first),
+    the bit-sliced sum of the bit planes `a` and `b`.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    result = list()
+    carry = None
+    for i, x in enumerate(a):
+        y = b[i] if i < len(b) else None
+        if y is None and carry is None:
+            result.append(x)
+            continue
+        if y is None:
+            y, carry = carry, None
+        xy = x ^ y
+        if carry is None:
+            result.append(xy)
+            carry = x & y
+        else:
+            result.append(xy ^ carry)
+            carry = (x & y) | (carry & xy)
+    if carry is not None:
+        result.append(carry)
+    return result
+
+def _equals(planes, n):
+    """Return uint64 array, bits set where the bit-sliced value is `n`."""
+    result = None
+    for i, plane in enumerate(planes):
+        term = plane if (n >> i) & 1 else ~plane
+        result = term if result is None else result & term
+    if n >> len(planes):  #too large to represent
+        result = np.zeros_like(result)
+    return result
+
+class _BitStepper(object):
+    """Steps packed rows; holds the rule and boundary masks."""
+    def __init__(self, rule, ncols, torus):
+        birth, survive = parse_rule(rule)
+        # rule in terms of the 3x3 total (which includes the cell itself)
+        self.birth = sorted(birth)
+        self.survive = sorted(n + 1 for n in survive)
+        self.torus = torus
+        self.ncols = ncols
+        self.lastword, self.lastbit = divmod(ncols - 1, _WORDBITS)
+        nwords = self.lastword + 1
+        mask = np.full(nwords, ~np.uint64(0), dtype=np.uint64)
+        mask[-1] = ~np.uint64(0) >> np.uint64(_WORDBITS - 1 - self.lastbit)
+        self.mask = mask
+    def horizontal(self, w):
+        """Return (west, east): each cell's left and right neighbors."""
+        one, top = np.uint64(1), np.uint64(_WORDBITS - 1)
+        west = w << one
+        west[:, 1:] |= w[:, :-1] >> top
+        east = w >> one
+        east[:, :-1] |= w[:, 1:] << top
+        if self.torus:
+            lastword, lastbit = self.lastword, np.uint64(self.lastbit)
+            west[:, 0] |= (w[:, lastword] >> lastbit) & one
+            east[:, lastword] |= (w[:, 0] & one) << lastbit
+        return west, east & self.mask
+    def vertical(self, planes):
+        """Return (north, south): planes shifted down and up one row."""
+        if self.torus:
+            north = [np.roll(p, 1, axis=0) for p in planes]
+            south = [np.roll(p, -1, axis=0) for p in planes]
+        else:
+            north = list()
+            south = list()
+            for p in planes:
+                n = np.zeros_like(p)
+                n[1:] = p[:-1]
+                north.append(n)
+                s = np.zeros_like(p)
+                s[:-1] = p[1:]
+                south.append(s)
+        return north, south
+    def step(self, w):
+        west, east = self.horizontal(w)
+        # row sums of three cells (2 bit planes)
+        xor_we = west ^ east
+        row3 = [xor_we ^ w, (west & east) | (w & xor_we)]
+        north, south = self.vertical(row3)
+        total = _add(_add(row3, north), south)  # 3x3 total (0..9)
+        born = survive = np.zeros_like(w)
+        for n in self.birth:
+            born = born | _equals(total, n)
+        for n in self.survive:
+            survive = survive | _equals(total, n)
+        return ((born & ~w) | (survive & w)) & self.mask
+
+def step_bitpacked(grid, rule='B3/S23', torus=False, generations=1):
+    """Return uint8 array, `grid` advanced `generations` generations
+    (by bit-sliced counting on packed rows).
+    """
+    grid = np.asarray(grid)
+    ncols = grid.shape[1]
+    stepper = _BitStepper(rule, ncols, torus)
+    words = pack(grid)
+    for _ in range(generations):
+        words = stepper.step(words)
+    return unpack(words, ncols)
+
+################  engine  #############################################
+
+class LifeLikeCA(object):
+    """Provide a Life-like cellular automaton.
+
+    Attributes
+    ----------
+    grid : ndarray
+        (nrows, ncols) uint8 array of cell states (1 for alive).
+        (Read only property; a copy is made when bit packed.)
+    generation : int
+        Number of generations advanced.
+    """
+    def __init__(self, grid, rule='B3/S23', torus=False, method='bitpacked'):
+        """
+        :param grid: 2d array of 0/1 (or bool), the initial state
+        :param rule: str, rule in B/S notation
+        :param torus: bool, True to wrap at the edges (else cells outside are dead)
+        :param method: 'bitpacked' or 'convolve'
+        """
+        if method not in ('bitpacked', 'convolve'):
+            raise ValueError("Unknown method %r." % method)
+        grid = np.asarray(grid, dtype=np.uint8)
+        if grid.ndim != 2:
+            raise ValueError("grid must be 2d.")
+        self.rule = rule
+        self.torus = torus
+        self.method = method
+        self.shape = grid.shape
+        self.generation = 0
+        if method == 'bitpacked':
+            self._stepper = _BitStepper(rule, grid.shape[1], torus)
+            self._state = pack(grid)
+        else:
+            self._table = rule_table(rule)
+            self._state = grid.copy()
+    @property
+    def grid(self):
+        if self.method == 'bitpacked':
+            return unpack(self._state, self.shape[1])
+        return self._state
+    @property
+    def population(self):
+        """Return int, the number of live cells."""
+        if self.method == 'bitpacked':
+            return int(np.bitwise_count(self._state).sum())
+        return int(self._state.sum())
+    def step(self, generations=1):
+        """Return None. Advance `generations` generations (no rendering)."""
+        state = self._state
+        if self.method == 'bitpacked':
+            stepper = self._stepper
+            for _ in range(generations):
+                state = stepper.step(state)
+        else:
+            table, torus = self._table, self.torus
+            for _ in range(generations):
+                state = table[state, neighbor_counts(state, torus)].view(np.uint8)
+        self._state = state
+        self.generation += generations
+
+################  patterns  ###########################################
+
+def gosper_glider_gun():
+    """Return (9,36) uint8 array, the Gosper glider gun.
+
+    :see: http://www.argentum.freeserve.co.uk/lex_g.htm#gosperglidergun
+    """
+    rows = [
+        "........................O...........",
+        "......................O.O...........",
+        "............OO......OO............OO",
+        "...........O...O....OO............OO",
+        "OO........O.....O...OO..............",
+        "OO........O...O.OO....O.O...........",
+        "..........O.....O.......O...........",
+        "...........O...O....................",
+        "............OO......................",
+        ]
+    return np.array([[c == 'O' for c in row] for row in rows], dtype=np.uint8)
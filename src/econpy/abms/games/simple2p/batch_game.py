@@ -0,0 +1,204 @@
+'''
+Provide an array-based engine for simple 2-person CDI games.
+Where `simple_game` plays one `CDIGame` object per pair of players,
+this module plays every scheduled pair at once:
+player types are rows of a `p_cdi` array,
+players are indices into that array,
+and each game iteration is a single vectorized draw
+plus a payoff-matrix lookup.
+Moves follow the same rule as `CDIPlayerType.move`,
+so results match the object implementation in distribution
+(but not draw for draw).
+
+:contact: https://subversion.american.edu/aisaac/isaac1.htm
+:license: `MIT license`_
+
+.. _`MIT license`: http://www.opensource.org/licenses/mit-license.php
+'''
+__docformat__ = "restructuredtext en"
+__author__  =   "Alan G. Isaac"
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+def payoff_array(payoffMatrix) -> np.ndarray:
+    """Return (2,2,2) float array, where
+    `result[m1,m2]` is the payoff pair for moves `m1`, `m2`.
+
+    :param payoffMatrix: nested sequence, as used by `SimpleGame`
+    """
+    result = np.asarray(payoffMatrix, dtype=float)
+    if result.shape != (2, 2, 2):
+        raise ValueError("payoffMatrix must have shape (2,2,2).")
+    return result
+
+def playertype_arrays(players) -> Tuple[np.ndarray, np.ndarray, List]:
+    """Return (types, p_cdi, playertypes) describing `players`.
+    `types[i]` is the row of `p_cdi` (and index into `playertypes`)
+    for the playertype of `players[i]`.
+
+    :param players: sequence of `SimplePlayer` instances
+    """
+    playertypes = list()
+    pt2idx = dict()
+    types = np.empty(len(players), dtype=np.intp)
+    for i, player in enumerate(players):
+        pt = player.playertype
+        if pt not in pt2idx:
+            pt2idx[pt] = len(playertypes)
+            playertypes.append(pt)
+        types[i] = pt2idx[pt]
+    p_cdi = np.array([pt.p_cdi for pt in playertypes], dtype=float)
+    return types, p_cdi, playertypes
+
+def random_pairs(nplayers: int, rng=None) -> np.ndarray:
+    """Return (nplayers//2, 2) array of player indices, in random pairs.
+    As with `simple_game.random_pairs_of`,
+    an odd player out is left unpaired.
+    """
+    rng = np.random.default_rng(rng)
+    players = rng.permutation(nplayers)
+    return players[:nplayers - nplayers % 2].reshape(-1, 2)
+
+def play_games(p_cdi1, p_cdi2, payoffs, gameIter: int=4, rng=None):
+    """Return (pay1, pay2), the mean payoffs (across iterations)
+    of the first and second player in each of n games.
+    Moves follow `CDIPlayerType.move`: a player defects with
+    probability `p_cdi[last]`, where `last` is the opponent's last move,
+    or `p_cdi[-1]` in the first iteration.
+
+    :param p_cdi1: (n,3) array, `p_cdi` of each first player
+    :param p_cdi2: (n,3) array, `p_cdi` of each second player
+    :param payoffs: (2,2,2) array (see `payoff_array`)
+    :param gameIter: number of iterations of each game
+    """
+    rng = np.random.default_rng(rng)
+    p_cdi1 = np.asarray(p_cdi1, dtype=float)
+    p_cdi2 = np.asarray(p_cdi2, dtype=float)
+    n = len(p_cdi1)
+    games = np.arange(n)
+    # column of p_cdi to use; the last column before any history
+    last1 = np.full(n, p_cdi1.shape[-1] - 1)
+    last2 = np.full(n, p_cdi2.shape[-1] - 1)
+    pay1, pay2 = np.zeros(n), np.zeros(n)
+    for draws in rng.random((gameIter, 2, n)):
+        m1 = (draws[0] < p_cdi1[games, last2]).astype(np.intp)
+        m2 = (draws[1] < p_cdi2[games, last1]).astype(np.intp)
+        pay1 += payoffs[m1, m2, 0]
+        pay2 += payoffs[m1, m2, 1]
+        last1, last2 = m1, m2
+    return pay1 / gameIter, pay2 / gameIter
+
+def round_payoffs(types, pairs, p_cdi, payoffMatrix, gameIter: int=4, rng=None) -> np.ndarray:
+    """Return 1d array, each player's *total* payoff across its games
+    (as `SoupPlayer.roundPayoff`) after one game per pair.
+
+    :param types: (N,) int array, row of `p_cdi` for each player
+    :param pairs: (n,2) int array, player indices of each game
+    :param p_cdi: (T,3) array, `p_cdi` of each player type
+    :param payoffMatrix: payoff matrix (as for `SimpleGame`) or (2,2,2) array
+    """
+    types = np.asarray(types)
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    p_cdi = np.asarray(p_cdi, dtype=float)
+    payoffs = payoff_array(payoffMatrix)
+    player1, player2 = pairs[:, 0], pairs[:, 1]
+    pay1, pay2 = play_games(p_cdi[types[player1]], p_cdi[types[player2]],
+                            payoffs, gameIter=gameIter, rng=rng)
+    nplayers = len(types)
+    return (np.bincount(player1, weights=pay1, minlength=nplayers)
+            + np.bincount(player2, weights=pay2, minlength=nplayers))
+
+def soup_round(types, p_cdi, payoffMatrix, gameIter: int=4, rng=None):
+    """Return (pairs, payoffs) for one `SoupRound`:
+    random pairs of players each play one game.
+    """
+    rng = np.random.default_rng(rng)
+    pairs = random_pairs(len(types), rng)
+    payoffs = round_payoffs(types, pairs, p_cdi, payoffMatrix,
+                            gameIter=gameIter, rng=rng)
+    return pairs, payoffs
+
+def soup_next_types(types, pairs, payoffs, rng=None) -> np.ndarray:
+    """Return 1d array, next player types after a soup round,
+    as `SoupPlayer.choose_next_type`: each player adopts
+    its opponent's type if the opponent scored higher,
+    and picks at random between the two types on a tie.
+    Unpaired players keep their type.
+    """
+    rng = np.random.default_rng(rng)
+    types = np.asarray(types)
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    payoffs = np.asarray(payoffs)
+    result = types.copy()
+    player1, player2 = pairs[:, 0], pairs[:, 1]
+    pay1, pay2 = payoffs[player1], payoffs[player2]
+    coins = rng.random((2, len(pairs))) < 0.5
+    switch1 = (pay2 > pay1) | ((pay2 == pay1) & coins[0])
+    switch2 = (pay1 > pay2) | ((pay1 == pay2) & coins[1])
+    result[player1[switch1]] = types[player2[switch1]]
+    result[player2[switch2]] = types[player1[switch2]]
+    return result
+
+def torus_neighbors(nrows: int, ncols: int, hoodOffsets) -> np.ndarray:
+    """Return (nrows*ncols, k) int array, where row i holds the
+    indices of the k neighbors of player i on a torus
+    (players stored by row, as `SimpleTorus.populate`).
+
+    :param hoodOffsets: sequence of k (dx,dy) offsets, as for `Grid`
+    """
+    rows, cols = np.divmod(np.arange(nrows * ncols), ncols)
+    dc, dr = np.asarray(hoodOffsets, dtype=np.intp).reshape(-1, 2).T  #x,y offsets
+    return ((rows[:, None] + dr) % nrows) * ncols + (cols[:, None] + dc) % ncols
+
+def neighbor_edges(neighbors) -> np.ndarray:
+    """Return (E,2) int array, each undirected neighbor pair once
+    (ignoring any player that is its own neighbor).
+
+    :param neighbors: (N,k) int array (see `torus_neighbors`)
+    """
+    neighbors = np.asarray(neighbors, dtype=np.intp)
+    nplayers, k = neighbors.shape
+    edges = np.column_stack((np.repeat(np.arange(nplayers), k), neighbors.ravel()))
+    edges = np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1)
+    return np.unique(edges, axis=0)
+
+def _random_choice_rows(mask, rng) -> np.ndarray:
+    """Return 1d array, a random column index among True entries of each row."""
+    keys = rng.random(mask.shape)
+    keys[~mask] = -1.0
+    return keys.argmax(axis=1)
+
+def topscore_types(types, payoffs, neighbors, rng=None) -> np.ndarray:
+    """Return 1d array, next player types as `topscore_playertypes`:
+    a random choice (with multiplicity) among the types
+    of the highest scorers among each player and its neighbors.
+    """
+    rng = np.random.default_rng(rng)
+    types = np.asarray(types)
+    candidates = np.column_stack((np.arange(len(types)), neighbors))
+    pays = np.asarray(payoffs)[candidates]
+    best = pays == pays.max(axis=1, keepdims=True)
+    picks = candidates[np.arange(len(types)), _random_choice_rows(best, rng)]
+    return types[picks]
+
+def maxmin_types(types, payoffs, neighbors, rng=None) -> np.ndarray:
+    """Return 1d array, next player types as `maxmin_playertypes`:
+    among the types of each player and its neighbors,
+    a random choice of a type with the highest minimum payoff.
+    """
+    rng = np.random.default_rng(rng)
+    types = np.asarray(types)
+    nplayers = len(types)
+    candidates = np.column_stack((np.arange(nplayers), neighbors))
+    ctypes = types[candidates]
+    pays = np.asarray(payoffs, dtype=float)[candidates]
+    same = ctypes[:, :, None] == ctypes[:, None, :]
+    # minimum payoff of the type of each candidate
+    minpays = np.where(same, pays[:, None, :], np.inf).min(axis=2)
+    best = minpays == minpays.max(axis=1, keepdims=True)
+    # count each type once (at its first occurrence)
+    best &= ~np.tril(same, -1).any(axis=2)
+    return ctypes[np.arange(nplayers), _random_choice_rows(best, rng)]
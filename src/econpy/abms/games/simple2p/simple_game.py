@@ -19,9 +19,14 @@ if sys.version_info.major < 3 or sys.version_info.minor < 8:
     sys.exit("Python version 3.8+ required")
 
 import random
-from typing import List, Sequence
+from typing import List, Sequence, Tuple
 from statistics import mean
 from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+from . import batch_game
 
 #note: initialize player *list* so that index method available
 #  (which is needed by subclasses)
@@ -71,6 +76,26 @@ class CDIGame(SimpleGame):
         return last_move
 #END CDIGame
 
+#An ExpectedCDIGame replaces simulated play by exact expected payoffs.
+#BEGIN ExpectedCDIGame
+class ExpectedCDIGame(CDIGame):
+    """Provides a deterministic CDIGame.
+    Moves form a Markov chain (determined by the players' `p_cdi`
+    and the opponent's last move), so the expected mean payoff
+    is computed exactly (see `expected_payoffs`) instead of simulated.
+    The history stays empty.
+    """
+    def run(self):
+        player1, player2 = self.players
+        player1.record(self); player2.record(self)
+    def payoff(self) -> dict:
+        player1, player2 = self.players
+        pay1, pay2 = expected_payoffs(
+            tuple(player1.playertype.p_cdi), tuple(player2.playertype.p_cdi),
+            freeze_payoffs(self.payoffMatrix), self.gameIter)
+        return {player1: pay1, player2: pay2}
+#END ExpectedCDIGame
+
 #########################################################################
 ##################### Begin: Player Classes #############################
 #########################################################################
@@ -161,7 +186,7 @@ class GridPlayer(SoupPlayer):
         with players and later retrieve neighbors.
         """
         if self._neighbors is None: #memoize
-            self._neighbors = grid.compute_neighbors(self)
+            self._neighbors = self.grid.get_neighbors(self)
         return self._neighbors
 #END GridPlayer
 
@@ -190,7 +215,9 @@ class Grid(object):
         self.players2neighbors = dict() # will map players to neighbors
         # create 2d grid (each element is None until populated)
         self.players2d = [[None]*ncols for i in range(nrows)]
-    def compute_neighbors(self, player):
+    def get_neighbors(self, player) -> List[SimplePlayer]:
+        return self.compute_neighbors(player)
+    def compute_neighbors(self, player) -> List[SimplePlayer]:
         """Return neighbors of `player` on `self`."""
         player_row, player_col = player.gridlocation
         nrows, ncols = self.nrows, self.ncols
@@ -198,7 +225,7 @@ class Grid(object):
         # initialize list of neighbors
         neighbors = list()
         # append all neighbors to list
-        for offset in self.hoodOffsets -> List[SimplePlayer]:
+        for offset in self.hoodOffsets:
             dc, dr = offset      #note: x,y hoodOffsets
             r = (player_row + dr) % nrows
             c = (player_col + dc) % ncols
@@ -208,24 +235,40 @@ class Grid(object):
 
 #BEGIN SimpleTorus
 class SimpleTorus(Grid):
+    """Provides a torus grid whose neighborhoods are computed once,
+    at `populate` time, as an (N,k) array of player indices
+    (`neighbor_idx`), along with each undirected neighbor pair
+    (`edges`) for use by `GridRound`.
+    """
     def populate(self, players1d) -> None:   # fill grid with players
-        players = iter(players1d)
+        nrows, ncols = self.nrows, self.ncols
+        self.players1d = players1d = list(players1d)
+        assert len(players1d) == nrows * ncols
         # put a player in each grid location (row, column)
-        for row in range(self.nrows):
-            for column in range(self.ncols):
-                player = players.next()
-                self.players2d[row][column] = player
-                player.set_grid(self, row, column)
-    """
-    def get_neighbors(self, player):
-        if player in self.players2neighbors: # neighbors precomputed
-            neighbors = self.players2neighbors[ player ]
-        else:                        # neighbors not yet computed
-            neighbors = self.compute_neighbors(player)
-            # map player to computed neighbors (for later use)
-            self.players2neighbors[ player ] = neighbors
-        return neighbors
-    """
+        for idx, player in enumerate(players1d):
+            row, column = divmod(idx, ncols)
+            self.players2d[row][column] = player
+            player.set_grid(self, row, column)
+        self.neighbor_idx = batch_game.torus_neighbors(nrows, ncols, self.hoodOffsets)
+        self.edges = batch_game.neighbor_edges(self.neighbor_idx)
+    def get_neighbors(self, player) -> List[SimplePlayer]:
+        row, column = player.gridlocation
+        players1d = self.players1d
+        return [players1d[j] for j in self.neighbor_idx[row * self.ncols + column]]
+    def round_payoffs(self) -> np.ndarray:
+        """Return 1d array, the round payoff of each player (by index)."""
+        return np.array([player.roundPayoff() for player in self.players1d])
+    def choose_next_playertypes(self, maxmin=False, rng=None) -> None:
+        """Set `next_playertype` of every player, as each player's
+        `choose_next_type` would, but with one vectorized reduction
+        over the neighbor payoffs: `maxmin_playertypes` if `maxmin`
+        else `topscore_playertypes`.
+        """
+        types, _, playertypes = batch_game.playertype_arrays(self.players1d)
+        choose = batch_game.maxmin_types if maxmin else batch_game.topscore_types
+        next_types = choose(types, self.round_payoffs(), self.neighbor_idx, rng=rng)
+        for player, pt in zip(self.players1d, next_types.tolist()):
+            player.next_playertype = playertypes[pt]
 #END SimpleTorus
 #########################################################################
 ###################### End: Spatial Classes #############################
@@ -241,10 +284,12 @@ class GameRound(object):
     """Provides an abstract class for a round.
     :note: subclasses must implement `run`
     """
-    def __init__(self, players, payoffMatrix, gameIter=4):
+    def __init__(self, players, payoffMatrix, gameIter=4, deterministic=False):
         self.players = players
         self.payoffMatrix = payoffMatrix
         self.gameIter = gameIter
+        #deterministic rounds use expected payoffs (see ExpectedCDIGame)
+        self.Game = ExpectedCDIGame if deterministic else CDIGame
     def average_payoff(self) -> float:
         """Return average player payoff for the round.
         """
@@ -268,7 +313,7 @@ class SoupRound(GameRound):
         #Players record the game and the opponent (see game.run)
         payoffs = self.payoffMatrix
         for (player1, player2) in random_pairs_of(self.players):
-            game = CDIGame(player1, player2, payoffs, gameIter=self.gameIter)
+            game = self.Game(player1, player2, payoffs, gameIter=self.gameIter)
             game.run() #also -> players record game!!
 #END:SoupRound;
 
@@ -279,12 +324,12 @@ class GridRound(GameRound):
     """
     def run(self) -> None:  #
         paymat = self.payoffMatrix  #the 2x2x2 payoff matrix
-        players = self.players
-        for player in players:  #order is irrelevant; all pairs play before update
-            for nbr in player.neighhbors:
-                if nbr not in player.players_played:
-                    game = CDIGame(player, nbr, paymat, gameIter=self.gameIter)
-                    game.run() #also -> players record game!!
+        grid = self.players[0].grid
+        players = grid.players1d
+        #each undirected neighbor pair plays once; all pairs play before update
+        for i, j in grid.edges.tolist():
+            game = self.Game(players[i], players[j], paymat, gameIter=self.gameIter)
+            game.run() #also -> players record game!!
 #END GridRound
 
 #########################################################################
@@ -303,7 +348,7 @@ def maxmin_playertypes(player):
     pt2po = dict()
     # find minimum payoff for each encountered playertype
     pt2po[ player.playertype ] = player.roundPayoff()
-    for n in player.neighhbors:
+    for n in player.neighbors:
         pt, po = n.playertype, n.roundPayoff()
         try:
             if pt2po[pt] > po:
@@ -311,10 +356,45 @@ def maxmin_playertypes(player):
         except KeyError:
             pt2po[pt] = po
     # find best playertype (max of minimum payoffs)
-    maxmin = max( pt2po.itervalues() )
+    maxmin = max( pt2po.values() )
     best_playertypes = [ pt for pt in pt2po if pt2po[pt]==maxmin ]
     return best_playertypes
 
+def freeze_payoffs(payoffMatrix) -> tuple:
+    """Return hashable (nested tuple) copy of `payoffMatrix`."""
+    try:
+        return tuple(freeze_payoffs(row) for row in payoffMatrix)
+    except TypeError:  #not iterable: a payoff
+        return payoffMatrix
+
+@lru_cache(maxsize=4096)  #least recently used matchups are evicted
+def expected_payoffs(p_cdi1: tuple, p_cdi2: tuple, payoffMatrix: tuple, gameIter: int) -> Tuple[float, float]:
+    """Return (pay1, pay2), the exact expected mean payoffs
+    of a CDIGame between player types with `p_cdi1` and `p_cdi2`.
+    Memoized, so all arguments must be hashable
+    (see `freeze_payoffs`).
+    """
+    # distribution of (move1, move2) in the first iteration
+    pd1, pd2 = p_cdi1[-1], p_cdi2[-1]
+    dist = {(m1, m2): (pd1 if m1 else 1 - pd1) * (pd2 if m2 else 1 - pd2)
+            for m1 in (0, 1) for m2 in (0, 1)}
+    pay1 = pay2 = 0.0
+    for iteration in range(gameIter):
+        if iteration > 0:  # each player responds to opponent's last move
+            newdist = dict.fromkeys(dist, 0.0)
+            for (m1, m2), prob in dist.items():
+                pd1, pd2 = p_cdi1[m2], p_cdi2[m1]
+                for n1 in (0, 1):
+                    for n2 in (0, 1):
+                        newdist[n1, n2] += (prob * (pd1 if n1 else 1 - pd1)
+                                            * (pd2 if n2 else 1 - pd2))
+            dist = newdist
+        for (m1, m2), prob in dist.items():
+            po1, po2 = payoffMatrix[m1][m2]
+            pay1 += prob * po1
+            pay2 += prob * po2
+    return pay1 / gameIter, pay2 / gameIter
+
 def random_pairs_of(players):
     """Return all of players as random pairs."""
     # copy player list
@@ -226,6 +226,162 @@ def runReplicates(prms) :
         inventory[p] /= nReps 
     return (units, sales, inventory)
 
+########## array-based market engine ##########
+# Buyers are homogeneous (as HomogeneousBuyer), so each replicate
+# needs only one buyer shift; seller state is stored as
+# (nReps, nSellers) arrays, and all replicates step together.
+# Within a period, buyers still shop one at a time (as in `runsim`),
+# but runs of buyers who buy the same amount from the same seller
+# are handled in one step, so a period takes at most 2*nSellers+1
+# vectorized steps (instead of nBuyers*nSellers Python calls).
+
+def _replicate_params(prms, nReps=None, tShock=None, demand_shock=None):
+    """Return (nReps, tShock, demand_shock), with the shocks
+    as arrays of length `nReps` (see `ArrayMarket`).
+    Missing values come from `prms`, except that `nReps` defaults
+    to the length of `tShock` or `demand_shock` if either is an array.
+    """
+    tShock = np.asarray(prms.tShock if tShock is None else tShock)
+    demand_shock = np.asarray(prms.demand_shock if demand_shock is None else demand_shock, dtype=float)
+    if nReps is None:
+        nReps = max(tShock.size, demand_shock.size) if (tShock.ndim or demand_shock.ndim) else prms.nReps
+    return nReps, np.broadcast_to(tShock, (nReps,)), np.broadcast_to(demand_shock, (nReps,))
+
+class ArrayMarket(object):
+    """Provides an array-based version of `Market`,
+    running many replicates at once.
+    Replicates may differ in `tShock` and `demand_shock`
+    (e.g., for sensitivity analysis).
+    After `runsim`, `units`, `sales`, and `inventory`
+    are (nReps, nPeriods) arrays of period results.
+    Results match `Market` up to rounding; note that learning sellers
+    can amplify rounding differences over long runs.
+    """
+    def __init__(self, prms, nReps=None, tShock=None, demand_shock=None):
+        """
+        :param prms: Parameters (`buyerType` must be HomogeneousBuyer)
+        :param nReps: int, number of replicates (default: `prms.nReps`,
+                      or the length of `tShock` or `demand_shock`)
+        :param tShock: int or array, shock period of each replicate
+        :param demand_shock: float or array, demand shock of each replicate
+        """
+        if not issubclass(prms.buyerType, HomogeneousBuyer):
+            raise ValueError("ArrayMarket requires homogeneous buyers.")
+        if issubclass(prms.sellerType, LearningSeller):
+            self.learning = True
+        elif issubclass(prms.sellerType, WalrasianSeller):
+            self.learning = False
+        else:
+            raise ValueError("Unsupported seller type.")
+        self.prms = prms
+        self.nReps, self.tShock, self.demand_shock = _replicate_params(prms, nReps, tShock, demand_shock)
+        self.setup()
+    def setup(self):
+        prms = self.prms
+        nReps, nSellers = self.nReps, prms.nSellers
+        self.shift = np.zeros(nReps)          #buyer demand shift
+        self.inventory_s = np.zeros((nReps, nSellers))
+        self.sales_s = np.zeros((nReps, nSellers))
+        self.prevsales_s = np.zeros((nReps, nSellers))
+        self.nextprice = np.zeros((nReps, nSellers))
+        self.pXA = self.auctioneerPrice()
+        self.runComplete = False
+    def auctioneerPrice(self):
+        """Return 1d array, the Walrasian price of each replicate
+        (as `auctioneerPriceAlt`)."""
+        prms = self.prms
+        nB, nS = prms.nBuyers, prms.nSellers
+        return (nB * self.shift + nB * prms.c - nS * prms.a) / (nS * prms.b + nB * prms.d)
+    def produce(self):
+        """Set prices and top up inventories (as `Seller.produce`)."""
+        prms = self.prms
+        pXA = self.pXA[:, None]
+        if self.learning:
+            sales, prevsales = self.sales_s, self.prevsales_s
+            with np.errstate(divide='ignore', invalid='ignore'):
+                padjust = (sales - prevsales) / prevsales
+            self.nextprice = np.where((sales > 0) & (prevsales > 0), self.nextprice * (1.0 + padjust),
+                             np.where((sales == 0) & (prevsales > 0), self.nextprice * 0.5, pXA))
+        else:
+            self.nextprice = np.broadcast_to(pXA, self.nextprice.shape).copy()
+        quantity = np.maximum(prms.a + prms.b * self.nextprice, 0.0)
+        inventory = self.inventory_s
+        self.inventory_s = np.where(inventory < quantity, inventory + (quantity - inventory), inventory)
+        self.prevsales_s, self.sales_s = self.sales_s, np.zeros_like(self.sales_s)
+    def trade(self):
+        """Return (units, sales), 1d arrays of one period's trade.
+        Each buyer buys from the seller offering the most
+        (the first such seller on ties), as in `Market.runsim`.
+        """
+        prms = self.prms
+        price, inventory, sales_s = self.nextprice, self.inventory_s, self.sales_s
+        reps = np.arange(self.nReps)
+        demand = np.maximum(self.shift[:, None] + prms.c - prms.d * price, 0)
+        nBuyers = np.full(self.nReps, float(prms.nBuyers))  #buyers yet to shop
+        units = np.zeros(self.nReps)
+        sales = np.zeros(self.nReps)
+        for _ in range(2 * prms.nSellers + 1):
+            offers = np.minimum(demand, inventory)
+            best = offers.argmax(axis=1)
+            qty = offers[reps, best]
+            active = (nBuyers > 0) & (qty > 0)
+            if not active.any():
+                break
+            # while a seller can fill the whole demand, buyers keep choosing it
+            # (the tolerance keeps rounding from leaving a sliver of stock,
+            # and the clamp keeps the last purchase within inventory)
+            full = qty == demand[reps, best]
+            stock = inventory[reps, best]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                nbuy = np.where(full, np.floor(stock / qty + 1e-9), 1.0)
+            nbuy = np.where(active, np.minimum(nbuy, nBuyers), 0.0)
+            bought = np.minimum(nbuy * qty, stock)
+            inventory[reps, best] -= bought
+            sales_s[reps, best] += bought
+            units += bought
+            sales += bought * price[reps, best]
+            nBuyers -= nbuy
+        return units, sales
+    def runsim(self):
+        prms = self.prms
+        nReps, nPeriods = self.nReps, prms.nPeriods
+        self.units = np.zeros((nReps, nPeriods))
+        self.sales = np.zeros((nReps, nPeriods))
+        self.inventory = np.zeros((nReps, nPeriods))
+        for period in range(nPeriods):
+            # demand shock, then Walrasian price, then production
+            self.shift = self.shift + np.where(self.tShock == period, self.demand_shock, 0.0)
+            self.pXA = self.auctioneerPrice()
+            self.produce()
+            self.units[:, period], self.sales[:, period] = self.trade()
+            self.inventory[:, period] = self.inventory_s.sum(axis=1)
+        self.runComplete = True
+
+def _runArrayMarket(args):
+    prms, tShock, demand_shock = args
+    mkt = ArrayMarket(prms, tShock=tShock, demand_shock=demand_shock)
+    mkt.runsim()
+    return mkt.units, mkt.sales, mkt.inventory
+
+def runReplicatesArray(prms, tShock=None, demand_shock=None, nReps=None, nProcesses=1):
+    """Return (units, sales, inventory), three (nReps, nPeriods) arrays
+    of period results for each replicate (use `.mean(axis=0)`
+    for the averages reported by `runReplicates`).
+    Replicates may differ in `tShock` and `demand_shock`.
+    With `nProcesses` > 1, the replicates are split across processes.
+    """
+    nReps, tShock, demand_shock = _replicate_params(prms, nReps, tShock, demand_shock)
+    chunks = [(prms, ts, ds) for (ts, ds) in
+              zip(np.array_split(tShock, nProcesses), np.array_split(demand_shock, nProcesses)) if len(ts)]
+    if nProcesses > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(nProcesses) as pool:
+            results = list(pool.map(_runArrayMarket, chunks))
+    else:
+        results = [_runArrayMarket(chunk) for chunk in chunks]
+    return tuple(np.concatenate(xs) for xs in zip(*results))
+
+
 def writeFile(fpath, units, sales, inventory):
     file = open(fpath, "w", encoding="utf-8") 
     header = "Period, Volume, AvgPrice, Inventory\n"
@@ -5,6 +5,7 @@
     as in Allen Downey's misnamed ``RacistWorld`` model.
 
 :requires: Python 2.6+ (for new turtle.py)
+:see: `schelling03` for a headless version with a spatial index
 """
 from __future__ import division
 import turtle
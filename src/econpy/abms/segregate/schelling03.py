@@ -0,0 +1,251 @@
+"""
+Provide a headless version of the Schelling model in `schelling02`.
+Agents are rows of coordinate arrays rather than turtles,
+and nearest-neighbor queries use a spatial index
+instead of sorting all agents by distance,
+so a tick costs roughly O(N log N) rather than O(N**2 log N).
+The movement rules are those of `schelling02.SchellingAgent`.
+
+Two update schedules are provided:
+
+sequential
+    As in `schelling02`: agents act one at a time, in random order,
+    each seeing the moves of those who acted before it.
+    Neighbors come from a uniform grid index,
+    updated incrementally after each move.
+synchronous
+    All agents decide on the same positions, then all discontented
+    agents move at once.  Neighbors come from a k-d tree,
+    rebuilt each tick.  Much faster for large populations.
+
+The turtle display is optional; see `TurtleViewer`.
+
+:note:
+    The original Schelling model placed agents on a small grid.
+    Here agents can occupy any point on the canvas,
+    as in Allen Downey's misnamed ``RacistWorld`` model.
+"""
+__docformat__ = "restructuredtext en"
+__author__ = 'Alan G. Isaac (and others as specified)'
+
+import math
+from collections import defaultdict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class UniformGrid(object):
+    """Provide a uniform-grid spatial index over a positions array,
+    supporting k-nearest-neighbor queries and incremental moves.
+    Queries run in pure Python, which beats NumPy
+    on the few dozen candidates in a block of cells.
+    """
+    def __init__(self, positions, cellsize):
+        """
+        :param positions: (N,2) float array, shared with the caller
+                          (use `move` to change a position)
+        :param cellsize: float, side of a grid cell
+        """
+        self.positions = positions
+        self.cellsize = float(cellsize)
+        self.xs, self.ys = positions.T.tolist()
+        self.cells = defaultdict(list)
+        self.agent_cells = list()
+        for i, (x, y) in enumerate(zip(self.xs, self.ys)):
+            cell = self.cell_of(x, y)
+            self.cells[cell].append(i)
+            self.agent_cells.append(cell)
+    def cell_of(self, x, y):
+        cellsize = self.cellsize
+        return (math.floor(x / cellsize), math.floor(y / cellsize))
+    def move(self, i, x, y):
+        """Return None.  Move agent `i` to (x,y), updating the index."""
+        old, new = self.agent_cells[i], self.cell_of(x, y)
+        self.positions[i] = self.xs[i], self.ys[i] = x, y
+        if old != new:
+            self.cells[old].remove(i)
+            self.cells[new].append(i)
+            self.agent_cells[i] = new
+    def nearest(self, i, k):
+        """Return list, the `k` agents nearest agent `i`
+        (excluding `i`), ordered by distance (ties by index).
+        """
+        xs, ys, cells, cellsize = self.xs, self.ys, self.cells, self.cellsize
+        nothers = len(xs) - 1
+        k = min(k, nothers)
+        if k <= 0:
+            return []
+        x, y = xs[i], ys[i]
+        cx, cy = self.agent_cells[i]
+        r = 1
+        while True:
+            candidates = list()
+            for dx in range(-r, r + 1):
+                for dy in range(-r, r + 1):
+                    members = cells.get((cx + dx, cy + dy))
+                    if members:
+                        candidates.extend(members)
+            candidates.remove(i)
+            if len(candidates) >= k:
+                d2 = sorted(((xs[j] - x)**2 + (ys[j] - y)**2, j) for j in candidates)
+                kth = d2[k - 1][0]
+                # agents outside the searched block are at least r*cellsize away
+                if kth <= (r * cellsize)**2 or len(candidates) == nothers:
+                    return [j for _, j in d2[:k]]
+                r = max(r + 1, math.ceil(math.sqrt(kth) / cellsize))
+            else:
+                r *= 2
+
+
+class SchellingModel(object):
+    """Provide a headless Schelling segregation model.
+
+    Attributes
+    ----------
+    positions : ndarray
+        (N,2) float array, agent coordinates (origin at canvas center)
+    kinds : ndarray
+        (N,) int array, agent kind (e.g., color)
+    history : list
+        mean segregation ratio after each tick
+    """
+    def __init__(self, n_agents=250, width=800, height=600, k=8, threshold=0.33,
+                 step_size=5, n_kinds=2, schedule='sequential', seed=None):
+        """
+        :param n_agents: int, number of agents (at least 2, so each has a neighbor)
+        :param width: int, canvas width
+        :param height: int, canvas height
+        :param k: int, number of neighbors (Schelling had 8; at least 1)
+        :param threshold: float, an agent is content
+                          if its segregation ratio exceeds this
+        :param step_size: float, distance moved by a discontented agent
+        :param n_kinds: int, number of agent kinds
+        :param schedule: 'sequential' or 'synchronous'
+        :param seed: seed for `numpy.random.default_rng`
+        """
+        if schedule not in ('sequential', 'synchronous'):
+            raise ValueError("Unknown schedule %r." % schedule)
+        if n_agents < 2 or k < 1:
+            raise ValueError("Need at least 2 agents and 1 neighbor.")
+        self.width, self.height = width, height
+        self.k = k
+        self.threshold = threshold
+        self.step_size = step_size
+        self.schedule = schedule
+        self.rng = rng = np.random.default_rng(seed)
+        self.kinds = rng.integers(0, n_kinds, n_agents)
+        x = rng.integers(-(width // 2), width // 2, n_agents, endpoint=True)
+        y = rng.integers(-(height // 2), height // 2, n_agents, endpoint=True)
+        self.positions = np.column_stack((x, y)).astype(float)
+        self.history = list()
+        self.ticks = 0
+    @property
+    def n_agents(self):
+        return len(self.kinds)
+    def on_canvas(self, positions):
+        """Return bool array, True for positions on the canvas."""
+        positions = np.asarray(positions)
+        return ((np.abs(positions[..., 0]) < self.width // 2)
+                & (np.abs(positions[..., 1]) < self.height // 2))
+    def move(self, positions, headings):
+        """Return (n,2) float array, new positions after moving
+        `step_size` along `headings` (in degrees), but staying on the
+        canvas, as `schelling02.SchellingAgent.forward`:
+        first head toward the origin one step at a time while off the canvas,
+        then move, then back up one step at a time while off the canvas.
+        """
+        positions = np.array(positions, dtype=float).reshape(-1, 2)
+        off = ~self.on_canvas(positions)
+        while off.any():
+            toward = -positions[off]
+            toward /= np.hypot(toward[:, 0], toward[:, 1])[:, None]
+            positions[off] += toward
+            off[off] = ~self.on_canvas(positions[off])
+        radians = np.radians(np.asarray(headings, dtype=float))
+        unit = np.column_stack((np.cos(radians), np.sin(radians)))
+        positions += self.step_size * unit
+        off = ~self.on_canvas(positions)
+        while off.any():
+            positions[off] -= unit[off]
+            off[off] = ~self.on_canvas(positions[off])
+        return positions
+    def neighbors(self):
+        """Return (N,k) int array, each agent's k nearest other agents."""
+        positions = self.positions
+        n = len(positions)
+        k = min(self.k, n - 1)
+        _, idx = cKDTree(positions).query(positions, k + 1, workers=-1)
+        idx = idx.reshape(n, k + 1)
+        isself = idx == np.arange(n)[:, None]
+        isself[~isself.any(axis=1), -1] = True  #self beyond k+1 (ties)
+        return idx[~isself].reshape(n, k)
+    def segregation_ratios(self):
+        """Return 1d array, each agent's fraction of like neighbors."""
+        nbrs = self.neighbors()
+        return (self.kinds[nbrs] == self.kinds[:, None]).mean(axis=1)
+    def step(self):
+        """Return None.  Run one tick: every discontented agent moves."""
+        n = self.n_agents
+        rng = self.rng
+        headings = rng.integers(0, 360, n, endpoint=True)
+        if self.schedule == 'synchronous':
+            movers = self.segregation_ratios() <= self.threshold
+            self.positions[movers] = self.move(self.positions[movers], headings[movers])
+        else:
+            kinds, k, threshold = self.kinds.tolist(), self.k, self.threshold
+            # about k/2 agents per cell, so a 3x3 block usually suffices
+            cellsize = math.sqrt(self.width * self.height * max(k, 2) / 2 / max(n, 1))
+            index = UniformGrid(self.positions, cellsize)
+            for i in rng.permutation(n).tolist():
+                nbrs = index.nearest(i, k)
+                kind = kinds[i]
+                n_alike = sum(kinds[j] == kind for j in nbrs)
+                if n_alike / len(nbrs) <= threshold:
+                    x, y = self.move(self.positions[i], headings[i])[0]
+                    index.move(i, x, y)
+        self.ticks += 1
+    def add2history(self):
+        """Return None.  Calculate mean segregation ratio
+        and store in `history`.
+        """
+        self.history.append(self.segregation_ratios().mean())
+    def run(self, maxiter=200, viewer=None):
+        """Return None.  Run `maxiter` ticks,
+        redrawing `viewer` (if any) after each tick.
+        """
+        for _ in range(maxiter):
+            self.step()
+            self.add2history()
+            if viewer is not None:
+                viewer.draw()
+
+
+class TurtleViewer(object):
+    """Provide an optional turtle display of a `SchellingModel`."""
+    def __init__(self, model, colors=('red', 'black'), dotsize=6):
+        import turtle
+        self.model = model
+        self.colors = colors
+        self.dotsize = dotsize
+        self.screen = screen = turtle.Screen()
+        screen.setup(model.width, model.height)
+        screen.tracer(False)
+        self.pen = pen = turtle.Turtle(visible=False)
+        pen.penup()
+    def draw(self):
+        """Return None.  Redraw all agents."""
+        pen, colors, dotsize = self.pen, self.colors, self.dotsize
+        pen.clear()
+        for (x, y), kind in zip(self.model.positions.tolist(), self.model.kinds.tolist()):
+            pen.goto(x, y)
+            pen.dot(dotsize, colors[kind % len(colors)])
+        self.screen.update()
+
+
+if __name__ == "__main__":
+    import turtle
+    world = SchellingModel()
+    world.run(viewer=TurtleViewer(world))
+    print(world.history)
+    turtle.mainloop()
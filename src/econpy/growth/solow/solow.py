@@ -251,31 +251,24 @@ What has simulation added to the analytical results?
    Solow, Robert M. (1956):
    "A Contribution to the Theory of Economic Growth." Quarterly Journal of Economics, 70:65-94.
 """
-from __future__ import division
-import sys
-sys.path.insert(0,'../../')  #assumes econpy install
-from itertools import zip
 from random import random as health_shock
-from econpy.pytrix.utilities import permutations, calc_gini
+
+import numpy as np
+
+from econpy.pytrix.utilities import ginis
+
 gN=0.015; gA=0.01; s=0.025; d=0.05; alpha=0.3; A=1.0
 N0 = 100
-AN = A * N0
-#choose K to start on balanced growth path
-K0 = ((s*(AN)**(1-alpha)) / (gN + gA + d))**(1/(1-alpha))
-K = K0
+# health_threshold currently global: TODO
+health_threshold = 0.1
+
 def f(K, AN): return K**(alpha) * AN**(1-alpha)
-Y = f(K, AN)
-KNY = list()
-for _ in range(10):
-	Y_1 = Y
-	Y = f(K, AN)
-	KNY.append((K,AN,Y))
-	print Y, (Y-Y_1)/Y_1
-	AN *= 1 + gN + gA
-	K += s * Y - d * K
-for item in KNY:
-	print "K: %5.2f,  AN: %5.2f,  Y: %5.2f"%item
-#add plot for BGP and decline in `s`
+
+def bgp_capital(AN, s=s, g=gN+gA, d=d, alpha=alpha):
+	"""Return float, the capital stock that puts the economy
+	on its balanced growth path, given effective labor `AN`.
+	"""
+	return ((s*(AN)**(1-alpha)) / (g + d))**(1/(1-alpha))
 
 # switch to object-oriented treatment
 # objects:
@@ -293,7 +286,6 @@ class SolowConsumer:
 		shock = health_shock()
 		self.health = (0.8*self.health + 0.2) * 2 * shock
 		#self.health =  health_shock()
-		#print "health: ", self.health,
 		#return self.k, self.n * (self.health > health_threshold)
 		return self.k, self.n * shock**4 * (self.health > health_threshold)
 	def receive(self, amt):
@@ -308,7 +300,6 @@ class CompositeSolowConsumer:
 	def __init__(self, k, n):
 		self.k = k
 		self.n = n
-		print type(n)
 		kpc = k/n
 		#start with equal capital shares and one unit of labor
 		# later we will use consumers as keys
@@ -341,26 +332,151 @@ class CompositeSolowConsumer:
 	def get_unemployment(self):
 		kn = self.kn
 		return sum(f[1]==0 for f in kn)/len(kn)
-	
-print
-
-# health_threshold currently global: TODO
-health_threshold = 1.0
-health_threshold = 0.1
-consumer = CompositeSolowConsumer(K0, N0)
-for _ in range(1000):
-	K, N = consumer.get_kn()
-	Y = f(K, N)
-	#print "K: %5.2f,  AN: %5.2f,  Y: %5.2f"%(K,N,Y)
-	#print consumer.kn
-	if not _%50:
-		print "unemployment: ", consumer.get_unemployment(), "inequality: ", calc_gini(c.k for c in consumer.consumers)
-		#print [(c.health < health_threshold) for c in consumer.consumers]
-	#TODO: d and g and alpha are currently global
-	consumer.adjust_kn(d, gN+gA)  #timing crucial! (fix that?)
-	consumer.receive(alpha*Y, 'rents')
-	print
-	consumer.receive((1-alpha)*Y, 'wages')
-	print
 
 
+class SolowEconomy(object):
+	"""Provide an array-based version of `CompositeSolowConsumer`:
+	an ensemble of economies of heterogeneous Solow consumers.
+	Consumer state is held in (n_economies, n_consumers) arrays,
+	and each period all health shocks are drawn at once
+	from a seeded generator.
+
+	Attributes
+	----------
+	k, n, s, health : ndarray
+		(n_economies, n_consumers) arrays, each consumer's
+		capital, labor endowment, saving rate, and health
+		(`s` is a read-only broadcast view unless saving rates
+		vary by economy and consumer)
+	K, N, Y : ndarray
+		(n_economies,) arrays, the current period's
+		factor supplies and output
+	history : dict
+		maps 'Y', 'unemployment', and 'gini' to lists
+		of (n_economies,) arrays, one per recorded period
+	"""
+	def __init__(self, n_consumers=100, n_economies=1, K0=None, s=0.2,
+		alpha=alpha, d=d, g=gN+gA, health_threshold=health_threshold,
+		dtype=np.float64, seed=None):
+		"""
+		:param n_consumers: int, consumers per economy
+		:param n_economies: int, size of the ensemble
+		:param K0: float, initial aggregate capital, shared equally
+		           (default: the balanced growth path level)
+		:param s: float or array, the consumers' saving rates
+		:param alpha: float, capital's share of output
+		:param d: float, depreciation rate
+		:param g: float, labor growth rate for healthy consumers
+		:param health_threshold: float, consumers must be
+		                         healthier than this to work
+		:param dtype: float dtype of the state arrays
+		              (float32 halves memory for large ensembles)
+		:param seed: seed for `numpy.random.default_rng`
+		"""
+		if K0 is None:
+			K0 = bgp_capital(n_consumers)
+		shape = (n_economies, n_consumers)
+		self.alpha, self.d, self.g = alpha, d, g
+		self.health_threshold = health_threshold
+		self.dtype = dtype = np.dtype(dtype)
+		self.rng = np.random.default_rng(seed)
+		self.k = np.full(shape, K0 / n_consumers, dtype=dtype)
+		self.n = np.ones(shape, dtype=dtype)
+		s = np.array(s, dtype=dtype)
+		self.s = s if s.shape == shape else np.broadcast_to(s, shape)
+		self.health = np.ones(shape, dtype=dtype)
+		# work arrays (reused each period)
+		self._shock = np.empty(shape, dtype=dtype)
+		self._nsupply = np.empty(shape, dtype=dtype)
+		self._employed = np.empty(shape, dtype=bool)
+		self.history = dict(Y=list(), unemployment=list(), gini=list())
+		self.periods = 0
+	@property
+	def shape(self):
+		return self.k.shape
+	def get_kn(self):
+		"""Return (K, N), the aggregate factor supplies
+		of each economy, after the period's health shocks.
+		"""
+		shock, employed, nsupply = self._shock, self._employed, self._nsupply
+		self.rng.random(out=shock, dtype=self.dtype)
+		health = self.health
+		health *= 0.8
+		health += 0.2
+		health *= 2
+		health *= shock
+		np.greater(health, self.health_threshold, out=employed)
+		np.power(shock, 4, out=nsupply)
+		nsupply *= self.n
+		nsupply *= employed
+		self.K = self.k.sum(axis=1)
+		self.N = nsupply.sum(axis=1)
+		return self.K, self.N
+	def step(self):
+		"""Return None.  Run one period:
+		shocks, production, depreciation and labor growth,
+		then payment (and saving) of rents and wages.
+		"""
+		alpha = self.alpha
+		K, N = self.get_kn()
+		self.Y = Y = K**alpha * N**(1 - alpha)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			r = np.where(K > 0, alpha * Y / K, 0.0).astype(self.dtype)
+			w = np.where(N > 0, (1 - alpha) * Y / N, 0.0).astype(self.dtype)
+		k, s, nsupply = self.k, self.s, self._nsupply
+		# rents are paid on capital supplied (before depreciation);
+		# the shocks are used up, so their array holds income
+		income = np.multiply(k, r[:, None], out=self._shock)
+		k *= 1 - self.d
+		np.multiply(self.n, 1 + self.g, out=self.n, where=self._employed)
+		nsupply *= w[:, None]
+		income += nsupply
+		income *= s
+		k += income
+		self.periods += 1
+	def get_unemployment(self):
+		"""Return (n_economies,) array, the fraction of consumers
+		supplying no labor in the current period.
+		"""
+		return (self._nsupply == 0).mean(axis=1)
+	def record(self):
+		"""Return None.  Append output, unemployment,
+		and the Gini coefficient of capital to `history`.
+		"""
+		history = self.history
+		history['Y'].append(self.Y)
+		history['unemployment'].append(self.get_unemployment())
+		history['gini'].append(ginis(self.k))
+	def run(self, n_periods, record_every=1):
+		"""Return None.  Run `n_periods` periods,
+		recording every `record_every` periods (0 for never).
+		"""
+		for t in range(n_periods):
+			self.step()
+			if record_every and not self.periods % record_every:
+				self.record()
+
+
+if __name__ == "__main__":
+	AN = A * N0
+	#choose K to start on balanced growth path
+	K0 = bgp_capital(AN)
+	K = K0
+	Y = f(K, AN)
+	KNY = list()
+	for _ in range(10):
+		Y_1 = Y
+		Y = f(K, AN)
+		KNY.append((K,AN,Y))
+		print(Y, (Y-Y_1)/Y_1)
+		AN *= 1 + gN + gA
+		K += s * Y - d * K
+	for item in KNY:
+		print("K: %5.2f,  AN: %5.2f,  Y: %5.2f"%item)
+	#add plot for BGP and decline in `s`
+
+	print()
+	economy = SolowEconomy(n_consumers=N0, K0=K0, seed=314)
+	economy.run(1000, record_every=50)
+	for unemployment, gini in zip(economy.history['unemployment'], economy.history['gini']):
+		print("unemployment: ", unemployment[0], "inequality: ", gini[0])
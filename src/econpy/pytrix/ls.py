@@ -28,18 +28,29 @@ import logging
 logging.basicConfig(level=logging.WARN)
 import time
 
+from functools import cached_property
+
 import numpy as np
 import numpy.linalg as la
 from scipy import stats as Sstats
+from scipy.linalg import solve_triangular
 
 
 
 
 class OLS(object):
-	"""Provides least squares estimates for a **single** equation,
-	where `dep` is Tx1 and `indep` is TxK.  (Both are 2d!)
+	"""Provides least squares estimates for one or more equations
+	sharing the same regressors,
+	where `dep` is TxM (or Tx1, or 1d) and `indep` is TxK.
 	Each row of `dep` and `indep` is an observation; for time series,
 	row 0 should contain the oldest observation.
+	X is factored once (by QR), and all M equations share the factor.
+
+	For a single equation, coefficient arrays are 1d, `resids` is 1d,
+	and scalar statistics are scalars.  For M>1 equations,
+	column m of each result belongs to equation m:
+	`coefs`, `se`, `tvals`, and `pvals` are KxM,
+	`resids` is TxM, and `ess`, `sigma2`, `R2` (etc.) have length M.
 
 	Example use::
 
@@ -50,10 +61,13 @@ class OLS(object):
 	:Ivariables:
 		`nobs` : int
 			rows(dep), the number of observations
+		`neqs` : int
+			cols(dep), the number of equations
 		`coefs` : float array
 			the least squares solution
 		`cov` : array
 			2d covariance array for coefficient estimates
+			(MxKxK for M>1 equations)
 		`se` : array
 			coefficient standard errors
 		`tvals` : array
@@ -61,9 +75,11 @@ class OLS(object):
 		`pvals` : array
 			p-values for the coefficient estimates
 		`fitted` : array
-			Tx1 array (indep * coefs)
+			TxM array (indep * coefs)
 		`resids` : array
-			Tx1 array (dep - indep * coefs)
+			residuals (dep - indep * coefs)
+		`ess` : float
+			resids' * resids
 		`sigma2` : float
 			(resids' * resids)/(T-K)
 		`pvalF` : scalar
@@ -71,7 +87,7 @@ class OLS(object):
 		`xTx` : array
 			KxK array (roughly, indep' * indep)
 		`xTy` : array
-			Kx1 array (indep' * dep)
+			KxM array (indep' * dep)
 	:warning: adds intercept
 	:requires: NumPy
 	:see: Russell Davidson and James G. MacKinnon,
@@ -83,51 +99,72 @@ class OLS(object):
 	:since: 2004-08-11
 	:author: Alan G. Isaac
 	"""
-	def __init__(self, dep, indep=None, dep_name='', indep_names=(), constant=1, trend=None):
+	def __init__(self, dep, indep=None, dep_name='', indep_names=(), constant=1, trend=None, minimal=False):
 		"""
 		:Parameters:
 			`dep` : array
-				(T x 1) array, the LHS variable
+				(T x M) array, the LHS variables, in columns
+				(a 1d array is a single equation)
 			`indep` : array
 				(T x K) array, the RHS variables, in columns
+			`minimal` : bool
+				True to skip forming Q and storing residuals
+				(`resids` is then recomputed on each access)
         note: NumPy required for OLS
 		"""
 		assert isinstance(dep_name,str), "Names must be strings."
-		Y = np.asarray(dep)  #allow lists
+		Y = np.asarray(dep, dtype=float)  #allow lists
 		if len(Y.shape) != 2:
-			Y = Y.reshape(-1,1)  #TODO single equation only
+			Y = Y.reshape(-1,1)
 		self.Y = Y
-		self.nobs = len(Y)
+		self.nobs, self.neqs = Y.shape
 		#make X sets self.nvars, self.nobs, self.indep_names
 		self.indep_names = list(indep_names)
 		X = self.makeX(indep=indep, constant=constant, trend=trend)
 		assert isinstance(X, np.ndarray)
+		assert (len(Y) == len(X)), "Number of observations do not agree."
 		self.X = X  #used for end_points ... need for anything else?
-		coefs, ess = np.linalg.lstsq(X,Y)[:2]  #OLS estimates and ess
-		coefs = coefs.ravel()
-		try:
-			ess, = ess
-		except ValueError:
-			ess = np.nan
-			logging.warn('Rank problem with RHS variables. See help(numpy.linal.lstsq).')
-		self.ess = ess  #sum of squared residuals
-		assert (len(dep) == len(X)), "Number of observations do not agree."
+		#factor X once; all equations share the factor
+		#(minimal: R only, with Q'Y from the normal equations R'(Q'Y) = X'Y)
+		if minimal:
+			Q, R = None, la.qr(X, mode='r')
+		else:
+			Q, R = la.qr(X)
+		diagR = np.abs(np.diag(R))
+		if diagR.size and diagR.min() > max(X.shape) * np.finfo(float).eps * diagR.max():
+			self._R = R
+			if minimal:
+				QTY = solve_triangular(R, np.dot(X.T, Y), trans='T')
+				coefs = solve_triangular(R, QTY)
+				resids = None
+				ess = _blocked_ess(X, Y, coefs)
+			else:
+				QTY = np.dot(Q.T, Y)
+				coefs = solve_triangular(R, QTY)
+				resids = Y - np.dot(Q, QTY)
+				ess = np.einsum('ij,ij->j', resids, resids)  #sum of squared residuals
+		else:
+			self._R = None
+			coefs = la.lstsq(X, Y, rcond=None)[0]
+			resids = Y - np.dot(X, coefs)
+			ess = np.full(self.neqs, np.nan)
+			logging.warning('Rank problem with RHS variables. See help(numpy.linalg.lstsq).')
 		self.dep_name = dep_name or 'y'
-		#data based attributes
-		self.xTx = np.dot(X.T , X)
-		self.xTy = np.dot(X.T , Y)
-		self.fitted = np.dot(X,coefs[:,None])
-		resids = np.ravel(Y - self.fitted)
-		if not np.isnan(ess):
-			assert abs(self.ess - np.dot(resids,resids))<0.001 #check error sum of squares TODO: delete
-		self._resids = resids                          #resids is a property
 		#end of matrix algebra
-		#make self.coefs a 1d array (note: coefs is 2d bc Y is 2d)
-		self.coefs = np.ravel(coefs)
+		if self.neqs == 1:  #single equation: 1d coefs and resids, scalar ess
+			coefs, ess = np.ravel(coefs), ess[0]
+			if resids is not None:
+				resids = np.ravel(resids)
+		self.coefs = coefs
+		self.minimal = minimal
+		self._resids = None if minimal else resids     #resids is a property
+		self.ess = ess
 		self.df_e = self.nobs - self.ncoefs				# degrees of freedom, error 
 		self.sigma2 = self.ess / self.df_e              # sigma^2 = e'e/(T-K)
-		self.llf, self.aic, self.bic = self.llf()
+		self.df_r = self.ncoefs - 1						# degrees of freedom, regression 
 		# convenience declarations: attributes to be computed as needed
+		# (statistics below that are computed on first access are cached properties)
+		self._xTxinv = None
 		self._cov = None                                #the parameter covariance matrix
 		self._standard_errors = None                    #the parameter standard errors
 		self._tvals = None
@@ -137,29 +174,80 @@ class OLS(object):
 		t = time.localtime()
 		self.date = time.strftime("%a, %d %b %Y",t)
 		self.time = time.strftime("%H:%M:%S",t)
-		################
-		#stuff from Vince
-		################ 
-		self.yvar = Y.var()
-		self.R2 = 1 - self.resids.var()/self.yvar			# model R-squared
-		self.R2adj = 1-(1-self.R2)*((self.nobs-1)/(self.nobs-self.ncoefs))	# adjusted R-square 
-		self.df_r = self.ncoefs - 1						# degrees of freedom, regression 
-		self.F = (self.R2/self.df_r) / ((1-self.R2)/self.df_e)	# model F-statistic
 		self._pvalF = None
+	@cached_property
+	def xTx(self):
+		"""KxK array (roughly, indep' * indep)"""
+		return np.dot(self.X.T , self.X)
+	@cached_property
+	def xTy(self):
+		"""KxM array (indep' * dep)"""
+		return np.dot(self.X.T , self.Y)
+	@cached_property
+	def fitted(self):
+		"""TxM array (indep * coefs)"""
+		return np.dot(self.X, self.coefs.reshape(self.ncoefs, -1))
+	################
+	#stuff from Vince
+	################ 
+	@cached_property
+	def yvar(self):
+		return self.Y.var(axis=0) if self.neqs > 1 else self.Y.var()
+	@cached_property
+	def R2(self):
+		"""model R-squared"""
+		#residual variance from ess and the residual mean (no pass over resids)
+		emean = self.Y.mean(axis=0) - np.dot(self.X.mean(axis=0), self.coefs.reshape(self.ncoefs, -1))
+		if self.neqs == 1:
+			emean = emean[0]
+		return 1 - (self.ess/self.nobs - emean**2)/self.yvar
+	@cached_property
+	def R2adj(self):
+		"""adjusted R-squared"""
+		return 1-(1-self.R2)*((self.nobs-1)/(self.nobs-self.ncoefs))
+	@cached_property
+	def F(self):
+		"""model F-statistic"""
+		return (self.R2/self.df_r) / ((1-self.R2)/self.df_e)
+	@cached_property
+	def llf(self):
+		"""model log-likelihood"""
+		return self.loglikelihood()[0]
+	@cached_property
+	def aic(self):
+		"""Akaike information criterion"""
+		return self.loglikelihood()[1]
+	@cached_property
+	def bic(self):
+		"""Bayesian (Schwarz) information criterion"""
+		return self.loglikelihood()[2]
+	def get_xTxinv(self):
+		"""Return KxK array, inverse of `xTx` (computed from the QR factor)."""
+		if self._xTxinv is None:
+			if self._R is not None:
+				Rinv = solve_triangular(self._R, np.eye(self.ncoefs))
+				self._xTxinv = np.dot(Rinv, Rinv.T)
+			else:
+				try:
+					self._xTxinv = la.inv(self.xTx)
+				except la.LinAlgError:
+					self._xTxinv = np.nan * np.empty_like(self.xTx)
+		return self._xTxinv
+	xTxinv = property(get_xTxinv, None, None, "inverse of xTx")
 	def get_cov(self):
 		"""get covariance matrix for solution; compute if nec"""
 		if self._cov is None:
-			try:
-				self._cov = self.sigma2 * la.inv(self.xTx)     #covariance matrix, as array
-			except np.linalg.linalg.LinAlgError:
-				self._cov = np.nan * np.empty_like(self.xTx)
-		#TODO var-cov(b),shd use invpd when availabe
+			sigma2 = np.asarray(self.sigma2)
+			self._cov = sigma2[...,None,None] * self.xTxinv     #covariance matrix, as array
 		return self._cov
 	cov = property(get_cov, None, None, "parameter covariance matrix")
 	def get_standard_errors(self):	# coef. standard errors
 		"""compute standard errors for solution"""
 		if self._standard_errors is None:
-			self._standard_errors = np.sqrt(self.cov.diagonal())
+			variances = np.diagonal(self.xTxinv)
+			if self.neqs > 1:
+				variances = variances[:,None]
+			self._standard_errors = np.sqrt(variances * self.sigma2)
 		return self._standard_errors
 	se = property(get_standard_errors, None, None, "coefficient standard errors")
 	def get_tvals(self):
@@ -169,43 +257,42 @@ class OLS(object):
 	tvals = property(get_tvals, None, None, "t-ratios for parameters")
 	def get_pvals(self):
 		if self._pvals is None:
-			if have_scipy:
-				self._pvals = (1-Sstats.t.cdf(np.abs(self.tvals), self.df_e)) * 2	# coef. p-values
-			else:
-				logging.warn("SciPy unavailable. (Needed to compute p-values.)")
-				self._pvals = [np.inf for _ in range(self.ncoefs)]
+			self._pvals = 2 * Sstats.t.sf(np.abs(self.tvals), self.df_e)	# coef. p-values
 		return self._pvals
 	pvals = property(get_pvals, None, None, "p-values for coef t-ratios, based on Student-t distribution")
 	def get_pvalF(self):
 		if self._pvalF is None:
-			if have_scipy:
-				self._pvalF = 1-Sstats.f.cdf(self.F, self.df_r, self.df_e)	# F-statistic p-value
-			else:
-				logging.warn("SciPy unavailable. (Needed to compute p-values.)")
-				self._pvalF = np.inf
+			self._pvalF = Sstats.f.sf(self.F, self.df_r, self.df_e)	# F-statistic p-value
 		return self._pvalF
 	pvalF = property(get_pvalF, None, None, "p-value for F statistic, based on F distribution")
 	def get_resids(self):
-		return self._resids
+		resids = self._resids
+		if resids is None:
+			resids = self.Y - self.fitted
+			if self.neqs == 1:
+				resids = np.ravel(resids)
+			if not self.minimal:
+				self._resids = resids
+		return resids
 	resids = property(get_resids, None, None, "regression residuals")
 	def slope_intercept(self, xcol=0):
 		"""Return: slope and intercept for variations in one independent variable.
 		"""
-		X = self.X.A         #as array
+		X = self.X
 		x = X[:,xcol]
 		means = X.mean(axis=0)
 		means[xcol] = 0
 		intercept = np.dot(self.coefs, means)
 		slope = self.coefs[xcol]
 		return slope, intercept
-	def llf(self):
+	def loglikelihood(self):
 		"""Return model log-likelihood and two information criteria.
 
 		:author: Vincent Nijs & Alan Isaac
 		"""
 		# Model log-likelihood, AIC, and BIC criterion values 
 		nobs, ncoefs, ess = self.nobs, self.ncoefs, self.ess
-		llf = -(nobs*1/2)*(1+math.log(2*math.pi)) - (nobs/2)*math.log(ess/nobs)
+		llf = -(nobs*1/2)*(1+math.log(2*math.pi)) - (nobs/2)*np.log(ess/nobs)
 		aic = -2*llf/nobs + (2*ncoefs/nobs)
 		bic = -2*llf/nobs + (ncoefs*math.log(nobs))/nobs
 		return llf, aic, bic
@@ -219,7 +306,7 @@ class OLS(object):
 		if indep is not None:
 			indep = np.asarray(indep)
 			if len(indep.shape)==1:  #must have been a one dimensional indep
-				indep = np.atleast_2d(X).T
+				indep = indep.reshape(-1,1)
 			self.indep_names = self.indep_names or list("x%02i"%(i+1) for i in range(indep.shape[1]))
 			assert ( nobs == len(indep) )
 			self.nvars = indep.shape[1]
@@ -261,12 +348,7 @@ Time: %(time)s
 # RHS variables:    %(ncoefs)5d
 ==============================================================================
 """ + 5*"%-15s"%('variable','coefficient','std. Error','t-statistic','pval.') + "\n"
-		header_dict = dict(dep_name=self.dep_name, indep_names=self.indep_names,
-		date=self.date, time=self.time, nobs=self.nobs, ncoefs=len(self.coefs))
 		result_template = "%-15s" + 4*"% -15.5f"
-		result = []
-		for i in range(len(self.coefs)):
-			result.append(result_template % tuple([self.indep_names[i],self.coefs[i],self.se[i],self.tvals[i],self.pvals[i]]) )
 		modelstat_template = """
 ==============================================================================
 Model stats
@@ -277,7 +359,6 @@ F-statistic          %(F)10.3f             Prob (F-statistic)    %(pvalF)10.3f
 AIC criterion        %(aic)10.3f             BIC criterion         %(bic)10.3f
 ==============================================================================
 """
-		modelstat_dict = dict(llf=self.llf, rsq=self.R2, R2adj=self.R2adj, F=self.F,pvalF=self.pvalF,aic=self.aic,bic=self.bic)
 		resid_stats_template = """
 ==============================================================================
 Residual stats
@@ -288,41 +369,588 @@ JB stat                % -5.6f' % tuple([self.Fpv, JB]) Prob(JB)            % -5
 Skew     Kurtosis            % -5.6f' % tuple([skew, kurtosis])
 ==============================================================================
 """
-		result = '\n'.join(result).replace('1.#INF','.')
-		result = header_template%header_dict + result
-		result += modelstat_template%modelstat_dict
-		return result
+		results = list()
+		for m in range(self.neqs):  #one table per equation
+			if self.neqs == 1:
+				eq, dep_name = (lambda x: x), self.dep_name
+			else:
+				eq, dep_name = (lambda x: x[...,m]), "%s[%d]" % (self.dep_name, m)
+			header_dict = dict(dep_name=dep_name, indep_names=self.indep_names,
+			date=self.date, time=self.time, nobs=self.nobs, ncoefs=self.ncoefs)
+			coefs, se, tvals, pvals = (eq(x) for x in (self.coefs, self.se, self.tvals, self.pvals))
+			result = []
+			for i in range(self.ncoefs):
+				result.append(result_template % tuple([self.indep_names[i],coefs[i],se[i],tvals[i],pvals[i]]) )
+			modelstat_dict = dict(llf=eq(self.llf), rsq=eq(self.R2), R2adj=eq(self.R2adj), F=eq(self.F),
+				pvalF=eq(self.pvalF), aic=eq(self.aic), bic=eq(self.bic))
+			result = '\n'.join(result).replace('1.#INF','.')
+			result = header_template%header_dict + result
+			result += modelstat_template%modelstat_dict
+			results.append(result)
+		return '\n'.join(results)
 
 	def rols(self, keep=True):
-		"""Return: array(T-ncoefs by ncoefs)
+		"""Return: array(T-ncoefs+1 by ncoefs)
 
-		Compute "recursive OLS" parameter estimates.
+		Compute "recursive OLS" parameter estimates,
+		starting with the shortest possible data sample.
 
-		:todo: add standard errors
+		:see: `recursive` (which also provides standard errors)
 		"""
 		if self._rols_coefs is not None:
 			return self._rols_coefs
-		from numpy.linalg import solve
-		Y, X = np.asmatrix(self.Y), np.asmatrix(self.X)
-		nobs, ncoefs = X.shape
-		X0 = X[:ncoefs]  #square matrix
-		Y0 = Y[:ncoefs]  #square matrix
-		#create array to hold parameter estimates
-		coef_array = np.empty( (nobs-ncoefs+1, ncoefs) )
-		coef_array[0] = solve(X0,Y0).A1
-		xTx = X0.T * X0
-		xTy = X0.T * Y0
-		#get initial parameter estimate (shortest possible data sample)
-		#iteratively update parameter estimates
-		for i in range(ncoefs,nobs):
-			xTx += X[i].T * X[i]
-			xTy += X[i].T * Y[i]
-			coef_array[i-ncoefs+1] = solve(xTx,xTy).A1
+		coef_array = self.recursive()[0][self.ncoefs-1:]
 		if keep:
 			self._rols_coefs = coef_array
 		return coef_array
+	def bootstrap(self, B=1000, kind='pairs', blocksize=None, seed=None, nprocesses=1, chunksize=500):
+		"""Return `OLSBootstrap` instance, holding `B` bootstrap replicates
+		of the coefficient estimates.
+		All resampling draws for a chunk of replicates are made at once,
+		and the replicate estimates are computed together
+		(by stacked normal equations for 'pairs' and 'block',
+		or by a single matrix product for 'residual' and 'wild').
+		Each chunk has its own seed (spawned from `seed`),
+		so results do not depend on `nprocesses`.
+
+		:Parameters:
+			`B` : int
+				number of bootstrap replicates
+			`kind` : str
+				'pairs' (resample observations),
+				'residual' (resample centered residuals),
+				'wild' (flip residual signs, with Rademacher weights), or
+				'block' (resample moving blocks of observations)
+			`blocksize` : int
+				block length for 'block' (default: about T**(1/3))
+			`seed` : int
+				seed for `numpy.random.SeedSequence`
+			`nprocesses` : int
+				number of worker processes (for large `B`)
+			`chunksize` : int
+				number of replicates computed together
+		"""
+		if self.neqs != 1:
+			raise ValueError("bootstrap supports a single equation.")
+		if kind not in ('pairs', 'residual', 'wild', 'block'):
+			raise ValueError("Unknown bootstrap kind %r." % kind)
+		if kind == 'block':
+			if blocksize is None:
+				blocksize = max(1, int(round(self.nobs ** (1/3))))
+			if not 1 <= blocksize <= self.nobs:
+				raise ValueError("blocksize must be between 1 and nobs (%d)." % self.nobs)
+		y = self.Y[:,0]
+		sizes = [min(chunksize, B - start) for start in range(0, B, chunksize)]
+		seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+		chunks = [(self.X, y, self.coefs, self.xTxinv, self.resids, kind, blocksize, size, ss)
+			for size, ss in zip(sizes, seeds)]
+		if nprocesses > 1:
+			from concurrent.futures import ProcessPoolExecutor
+			with ProcessPoolExecutor(nprocesses) as pool:
+				results = list(pool.map(_bootstrap_chunk, chunks))
+		else:
+			results = [_bootstrap_chunk(chunk) for chunk in chunks]
+		return OLSBootstrap(self, np.concatenate(results), kind)
+	def recursive(self, window=None, method='batch'):
+		"""Return: (coefs, se, sigma2), the paths of recursive
+		(or, given `window`, rolling) least squares estimates.
+		Row t of each path uses observations through t
+		(only the last `window` of them, for rolling estimates),
+		so `coefs` and `se` are (T x K) and `sigma2` is (T,).
+		(For M>1 equations, `coefs` and `se` are (T x K x M)
+		and `sigma2` is (T x M).)
+		Rows lacking enough observations are NaN.
+
+		Each new observation is a rank-one update of the moment matrix,
+		and (for rolling estimates) each dropped observation a rank-one downdate.
+
+		:Parameters:
+			`window` : int
+				number of observations in each rolling sample
+				(default: None, for recursive estimates)
+			`method` : str
+				'batch' computes all the moment matrices at once
+				(by prefix sums, restarted every `window` observations
+				to limit cancellation) and then factors them together;
+				'update' carries a Cholesky factor through rank-one
+				updates and downdates (`cholupdate`), O(K**2) per observation
+		"""
+		X, Y = self.X, self.Y
+		nobs, ncoefs = X.shape
+		if window is not None and not ncoefs <= window <= nobs:
+			raise ValueError("window must be between ncoefs and nobs.")
+		#not enough observations before row `first`
+		first = ncoefs - 1 if window is None else window - 1
+		if method == 'batch':
+			xTx, xTy, yTy = _window_moments(X, Y, window)
+			coefs, xTxinv, ssr = _solve_moments(xTx, xTy, yTy, first)
+		elif method == 'update':
+			coefs, xTxinv, ssr = _recursive_factor(X, Y, window)
+		else:
+			raise ValueError("Unknown method %r." % method)
+		n = np.arange(1, nobs+1) if window is None else np.minimum(np.arange(1, nobs+1), window)
+		df = n - ncoefs
+		with np.errstate(divide='ignore', invalid='ignore'):
+			sigma2 = np.where(df[:,None] > 0, ssr / df[:,None], np.nan)
+		se = np.sqrt(sigma2[:,None,:] * np.diagonal(xTxinv, axis1=1, axis2=2)[:,:,None])
+		if self.neqs == 1:
+			coefs, se, sigma2 = coefs[:,:,0], se[:,:,0], sigma2[:,0]
+		coefs[:first] = np.nan
+		se[:first] = np.nan
+		sigma2[:first] = np.nan
+		return coefs, se, sigma2
+
+
+
+
+class OLSBootstrap(object):
+	"""Provides bootstrap replicates of the coefficients
+	of a single-equation `OLS` instance (see `OLS.bootstrap`),
+	along with bootstrap standard errors and confidence intervals.
+
+	:Ivariables:
+		`coefs` : array
+			(B x K) array, one row of coefficient estimates per replicate
+		`kind` : str
+			the resampling scheme
+		`ols` : OLS
+			the original estimates
+	:see: Efron, B. & Tibshirani, R. J.: An Introduction to the Bootstrap.
+	      New York: Chapman & Hall, 1993.  (Chapter 14 for BCa intervals.)
+	"""
+	def __init__(self, ols, coefs, kind):
+		self.ols = ols
+		self.coefs = coefs
+		self.kind = kind
+	@property
+	def se(self):
+		"""bootstrap standard errors"""
+		return self.coefs.std(axis=0, ddof=1)
+	def percentile_interval(self, alpha=0.05):
+		"""Return (2 x K) array, the lower and upper bounds
+		of the percentile interval with coverage 1-alpha.
+		"""
+		return np.quantile(self.coefs, [alpha/2, 1-alpha/2], axis=0)
+	def jackknife(self):
+		"""Return (T x K) array, the leave-one-out coefficient estimates
+		(computed from the full sample fit, not by refitting).
+		"""
+		ols = self.ols
+		X, e = ols.X, ols.resids
+		XA = np.dot(X, ols.xTxinv)
+		h = np.einsum('tk,tk->t', XA, X)   #leverages
+		return ols.coefs - XA * (e / (1 - h))[:,None]
+	def bca_interval(self, alpha=0.05):
+		"""Return (2 x K) array, the lower and upper bounds
+		of the bias-corrected and accelerated (BCa) interval
+		with coverage 1-alpha.
+		The acceleration is estimated by the (observation) jackknife.
+		The bias correction is kept finite when all replicates
+		lie on one side of the estimate.
+		"""
+		coefs, b = self.coefs, self.ols.coefs
+		B = len(coefs)
+		z0 = Sstats.norm.ppf(np.clip((coefs < b).mean(axis=0), 0.5/B, 1 - 0.5/B))
+		jack = self.jackknife()
+		d = jack.mean(axis=0) - jack
+		a = (d**3).sum(axis=0) / (6 * ((d**2).sum(axis=0))**1.5)
+		zs = Sstats.norm.ppf([alpha/2, 1-alpha/2])[:,None]
+		levels = Sstats.norm.cdf(z0 + (z0 + zs) / (1 - a * (z0 + zs)))
+		result = np.empty((2, coefs.shape[1]))
+		for k in range(coefs.shape[1]):
+			result[:,k] = np.quantile(coefs[:,k], levels[:,k])
+		return result
+
+def _bootstrap_chunk(args):
+	"""Return (nreps x K) array, coefficient replicates for one chunk.
+	(Module level, so that it can run in a worker process.)
+	"""
+	X, y, coefs, xTxinv, resids, kind, blocksize, nreps, seed = args
+	rng = np.random.default_rng(seed)
+	nobs, ncoefs = X.shape
+	if kind in ('pairs', 'block'):
+		if kind == 'pairs':
+			idx = rng.integers(0, nobs, (nreps, nobs))
+		else:  #moving blocks, concatenated and trimmed to nobs
+			nblocks = -(-nobs // blocksize)
+			starts = rng.integers(0, nobs - blocksize + 1, (nreps, nblocks))
+			idx = (starts[:,:,None] + np.arange(blocksize)).reshape(nreps, -1)[:,:nobs]
+		#resampling is reweighting: count the draws of each observation
+		offsets = nobs * np.arange(nreps)[:,None]
+		w = np.bincount((idx + offsets).ravel(), minlength=nreps*nobs).reshape(nreps, nobs).astype(float)
+		#stacked normal equations: X'WX and X'Wy for every replicate
+		xx = (X[:,:,None] * X[:,None,:]).reshape(nobs, -1)
+		xTx = np.dot(w, xx).reshape(nreps, ncoefs, ncoefs)
+		xTy = np.dot(w, X * y[:,None])
+		try:
+			return np.linalg.solve(xTx, xTy[:,:,None])[:,:,0]
+		except np.linalg.LinAlgError:  #some resample is singular
+			result = np.full((nreps, ncoefs), np.nan)
+			for r in range(nreps):
+				try:
+					result[r] = np.linalg.solve(xTx[r], xTy[r])
+				except np.linalg.LinAlgError:
+					pass
+			return result
+	#residual-based schemes: y* = fitted + e*, so b* = b + (X'X)^{-1} X'e*
+	if kind == 'residual':
+		centered = resids - resids.mean()
+		estar = centered[rng.integers(0, nobs, (nreps, nobs))]
+	elif kind == 'wild':  #Rademacher weights
+		estar = resids * rng.choice(np.array([-1.0, 1.0]), (nreps, nobs))
+	else:
+		raise ValueError("Unknown bootstrap kind %r." % kind)
+	return coefs + np.dot(np.dot(estar, X), xTxinv.T)
+
+class StreamingOLS(object):
+	"""Provides least squares estimates from data
+	that arrive in chunks (e.g., blocks of memory-mapped arrays),
+	so the full data set need never be in memory.
+	Only sufficient statistics are kept:
+	the number of observations, the means, and the centered cross products
+	of the regressors and the dependent variables.
+	Chunks are combined with the pairwise update of Chan, Golub, and LeVeque,
+	which avoids the cancellation of raw cross products;
+	estimators built from different chunks (e.g., in worker processes)
+	combine with `merge`.
+
+	Coefficients are ordered as in `OLS` (constant last),
+	and as in `OLS`, `dep` may hold M>1 equations.
 
+	Example use::
 
+		model = StreamingOLS()
+		for y, X in chunks:
+			model.update(y, X)
+		print(model.coefs, model.se)
+
+	:see: Chan, T. F., Golub, G. H. & LeVeque, R. J.: Algorithms for computing
+	      the sample variance: analysis and recommendations.
+	      American Statistician 37, 242-247, 1983.
+	"""
+	def __init__(self, constant=True):
+		"""
+		:Parameters:
+			`constant` : bool
+				True to add an intercept (as in `OLS`)
+		"""
+		self.constant = constant
+		self.nobs = 0
+		self.neqs = None
+		self.nvars = None
+		self._fitted = None   #cached result of `_fit`
+	def _stats(self, y, X):
+		"""Return (n, xmean, ymean, Cxx, Cxy, Cyy) for one chunk."""
+		n = len(X)
+		xmean, ymean = X.mean(axis=0), y.mean(axis=0)
+		Xc, yc = X - xmean, y - ymean
+		return n, xmean, ymean, np.dot(Xc.T, Xc), np.dot(Xc.T, yc), np.einsum('ij,ij->j', yc, yc)
+	def update(self, y, X):
+		"""Return self, after adding a chunk of observations.
+
+		:Parameters:
+			`y` : array
+				(n x M) array (or 1d for a single equation), the LHS variables
+			`X` : array
+				(n x K) array, the RHS variables, in columns
+		"""
+		y = np.asarray(y, dtype=float)
+		X = np.asarray(X, dtype=float)
+		if y.ndim != 2:
+			y = y.reshape(-1,1)
+		if X.ndim != 2:
+			X = X.reshape(-1,1)
+		if len(y) != len(X):
+			raise ValueError("Number of observations do not agree.")
+		if self.nvars is None:
+			self.nvars, self.neqs = X.shape[1], y.shape[1]
+			self._single = self.neqs == 1
+		elif (X.shape[1], y.shape[1]) != (self.nvars, self.neqs):
+			raise ValueError("Chunk shapes do not agree with earlier chunks.")
+		if len(X):
+			self._combine(self._stats(y, X))
+		return self
+	def update_from(self, chunks):
+		"""Return self, after adding each (y, X) pair in `chunks`
+		(e.g., as produced by `iter_chunks`).
+		"""
+		for y, X in chunks:
+			self.update(y, X)
+		return self
+	def merge(self, other):
+		"""Return self, after adding the observations summarized by `other`,
+		another `StreamingOLS` instance (e.g., from a worker process).
+		"""
+		if other.nobs == 0:
+			return self
+		if self.nvars is None:
+			self.nvars, self.neqs, self._single = other.nvars, other.neqs, other._single
+		elif (other.nvars, other.neqs) != (self.nvars, self.neqs):
+			raise ValueError("Cannot merge estimators of different shapes.")
+		self._combine((other.nobs, other.xmean, other.ymean, other.Cxx, other.Cxy, other.Cyy))
+		return self
+	def _combine(self, stats):
+		n, xmean, ymean, Cxx, Cxy, Cyy = stats
+		self._fitted = None   #new observations invalidate the fit
+		if self.nobs == 0:
+			self.nobs, self.xmean, self.ymean = n, xmean, ymean
+			self.Cxx, self.Cxy, self.Cyy = Cxx, Cxy, Cyy
+			return
+		n0 = self.nobs
+		total = n0 + n
+		dx, dy = xmean - self.xmean, ymean - self.ymean
+		w = n0 * n / total
+		self.Cxx = self.Cxx + Cxx + w * np.outer(dx, dx)
+		self.Cxy = self.Cxy + Cxy + w * np.outer(dx, dy)
+		self.Cyy = self.Cyy + Cyy + w * dy * dy
+		self.xmean = self.xmean + dx * (n / total)
+		self.ymean = self.ymean + dy * (n / total)
+		self.nobs = total
+	@property
+	def ncoefs(self):
+		return self.nvars + bool(self.constant)
+	@property
+	def df_e(self):
+		return self.nobs - self.ncoefs
+	def _fit(self):
+		"""Return (coefs, xTxinv, ess), with the constant (if any) last.
+		The result is cached until the next `update` or `merge`.
+		"""
+		if self._fitted is not None:
+			return self._fitted
+		if self.nobs == 0:
+			raise ValueError("No observations.")
+		n, xmean, ymean = self.nobs, self.xmean, self.ymean
+		if self.constant:
+			#slopes from centered moments; intercept from the means
+			L = la.cholesky(self.Cxx)
+			Linv = solve_triangular(L, np.eye(self.nvars), lower=True)
+			z = np.dot(Linv, self.Cxy)
+			slopes = np.dot(Linv.T, z)
+			intercept = ymean - np.dot(xmean, slopes)
+			coefs = np.vstack((slopes, intercept))
+			Cinv = np.dot(Linv.T, Linv)
+			#inverse of the full xTx (by partitioned inversion)
+			a = np.dot(Cinv, xmean)
+			xTxinv = np.empty((self.ncoefs, self.ncoefs))
+			xTxinv[:-1,:-1] = Cinv
+			xTxinv[:-1,-1] = xTxinv[-1,:-1] = -a
+			xTxinv[-1,-1] = 1.0 / n + np.dot(xmean, a)
+		else:
+			xTx = self.Cxx + n * np.outer(xmean, xmean)
+			xTy = self.Cxy + n * np.outer(xmean, ymean)
+			L = la.cholesky(xTx)
+			Linv = solve_triangular(L, np.eye(self.nvars), lower=True)
+			z = np.dot(Linv, xTy)
+			coefs = np.dot(Linv.T, z)
+			xTxinv = np.dot(Linv.T, Linv)
+		ess = self._ess(coefs)
+		self._fitted = coefs, xTxinv, ess
+		return self._fitted
+	def _ess(self, coefs):
+		"""Return array, the sum of squared residuals of each equation,
+		computed from the centered moments.
+		"""
+		n, xmean, ymean = self.nobs, self.xmean, self.ymean
+		if self.constant:
+			ess = self.Cyy - np.einsum('km,km->m', coefs[:-1], self.Cxy)
+		else:
+			#residual mean and centered residual sum of squares
+			emean = ymean - np.dot(xmean, coefs)
+			ess = (self.Cyy - 2 * np.einsum('km,km->m', coefs, self.Cxy)
+				+ np.einsum('km,kl,lm->m', coefs, self.Cxx, coefs) + n * emean**2)
+		return np.maximum(ess, 0.0)
+	def _squeeze(self, a):
+		return a[...,0] if self._single else a
+	@property
+	def coefs(self):
+		"""coefficient estimates (K+1 x M, constant last)"""
+		return self._squeeze(self._fit()[0])
+	@property
+	def ess(self):
+		"""sum of squared residuals"""
+		return self._squeeze(self._fit()[2])
+	@property
+	def sigma2(self):
+		"""(resids' * resids)/(T-K)"""
+		return self.ess / self.df_e
+	@property
+	def xTxinv(self):
+		"""inverse of X'X (including any constant)"""
+		return self._fit()[1]
+	@property
+	def cov(self):
+		"""parameter covariance matrix (MxKxK for M>1 equations)"""
+		coefs, xTxinv, ess = self._fit()
+		sigma2 = self._squeeze(ess / self.df_e)
+		return np.asarray(sigma2)[...,None,None] * xTxinv
+	@property
+	def se(self):
+		"""coefficient standard errors"""
+		coefs, xTxinv, ess = self._fit()
+		return self._squeeze(np.sqrt(np.diagonal(xTxinv)[:,None] * (ess / self.df_e)))
+	@property
+	def tvals(self):
+		"""t-ratios for the coefficient estimates"""
+		return self.coefs / self.se
+	@property
+	def pvals(self):
+		"""p-values for coef t-ratios, based on Student-t distribution"""
+		return 2 * Sstats.t.sf(np.abs(self.tvals), self.df_e)
+	@property
+	def R2(self):
+		"""R-squared (centered)"""
+		return 1 - self.ess / self._squeeze(self.Cyy)
+
+def _blocked_ess(X, Y, coefs, blocksize=2**16):
+	"""Return 1d array, the sum of squared residuals of each column of `Y`,
+	accumulated over row blocks (so the full residual array is never formed).
+	"""
+	ess = np.zeros(Y.shape[1])
+	for start in range(0, len(Y), blocksize):
+		e = Y[start:start+blocksize] - np.dot(X[start:start+blocksize], coefs)
+		ess += np.einsum('ij,ij->j', e, e)
+	return ess
+
+def iter_chunks(dep, indep, chunksize=2**16):
+	"""Return generator of (y, X) pairs, the successive
+	row blocks of `dep` and `indep` (e.g., memory-mapped arrays,
+	so that only one block at a time is read into memory).
+	"""
+	nobs = len(dep)
+	if len(indep) != nobs:
+		raise ValueError("Number of observations do not agree.")
+	for start in range(0, nobs, chunksize):
+		stop = start + chunksize
+		yield np.asarray(dep[start:stop]), np.asarray(indep[start:stop])
+
+def cholupdate(R, x, downdate=False):
+	"""Return None.  Update (in place) the upper triangular
+	Cholesky factor `R` (K x K+M) of `A` so that `R[:,:K]'R[:,:K]`
+	factors `A + outer(x[:K],x[:K])` (or, if `downdate`, `A - outer(x[:K],x[:K])`).
+	Any extra columns of `R` (e.g., `R^{-T} X'y`) are carried along,
+	and on return `x[K:]` holds their new residual components
+	(so a sum of squared residuals changes by `x[K:]**2`).
+
+	Updates use Givens rotations and downdates use hyperbolic rotations,
+	so `x` is overwritten.
+
+	:see: Golub, G. H. & Van Loan, C. F.: Matrix Computations, section 6.5.4.
+	"""
+	K = R.shape[0]
+	for k in range(K):
+		rkk, xk = R[k,k], x[k]
+		if downdate:
+			r2 = rkk*rkk - xk*xk
+			if not r2 > 0:
+				raise np.linalg.LinAlgError("Downdate leaves a matrix that is not positive definite.")
+			s = xk / rkk
+			c = math.sqrt(r2) / rkk
+			Rk = (R[k,k:] - s * x[k:]) / c
+			x[k:] = (x[k:] - s * R[k,k:]) / c
+		else:
+			r = math.hypot(rkk, xk)
+			if r == 0:
+				continue
+			c, s = rkk / r, xk / r
+			Rk = c * R[k,k:] + s * x[k:]
+			x[k:] = c * x[k:] - s * R[k,k:]
+		R[k,k:] = Rk
+		x[k] = 0.0
+
+def _window_moments(X, Y, window=None):
+	"""Return (xTx, xTy, yTy), the moment arrays
+	(T x K x K, T x K x M, and T x M) for the samples ending at each observation:
+	all observations so far or (given `window`) the last `window` observations.
+	Rolling sums restart their prefix sums every `window` observations,
+	so each difference involves at most two windows of data.
+	"""
+	xx = X[:,:,None] * X[:,None,:]
+	xy = X[:,:,None] * Y[:,None,:]
+	yy = Y * Y
+	if window is None:
+		return tuple(np.cumsum(a, axis=0) for a in (xx, xy, yy))
+	result = list()
+	nobs = len(X)
+	nblocks = -(-nobs // window)
+	for a in (xx, xy, yy):
+		padded = np.zeros((nblocks * window,) + a.shape[1:])
+		padded[:nobs] = a
+		blocks = padded.reshape((nblocks, window) + a.shape[1:])
+		prefix = np.cumsum(blocks, axis=1)  #restarts each block
+		sums = prefix.copy()
+		#add what remains of the previous block: total - prefix
+		sums[1:] += prefix[:-1,-1:] - prefix[:-1]
+		result.append(sums.reshape(padded.shape)[:nobs])
+	return tuple(result)
+
+def _solve_moments(xTx, xTy, yTy, first=0):
+	"""Return (coefs, xTxinv, ssr) for stacked moment arrays,
+	by batched Cholesky factorization (NaN where not positive definite,
+	and for the rows before `first`).
+	"""
+	nobs, ncoefs = xTx.shape[:2]
+	eye = np.eye(ncoefs)
+	xTx = xTx.copy()
+	xTx[:first] = eye
+	try:
+		L = np.linalg.cholesky(xTx)
+		ok = np.ones(nobs, dtype=bool)
+	except np.linalg.LinAlgError:  #factor one at a time
+		L = np.full_like(xTx, np.nan)
+		ok = np.zeros(nobs, dtype=bool)
+		for t in range(nobs):
+			try:
+				L[t] = np.linalg.cholesky(xTx[t])
+				ok[t] = True
+			except np.linalg.LinAlgError:
+				pass
+	ok[:first] = False
+	L[~ok] = eye
+	Linv = np.linalg.solve(L, eye)   #batched triangular inverses
+	z = Linv @ xTy                   #L^{-1} X'y
+	xTxinv = np.swapaxes(Linv, 1, 2) @ Linv
+	coefs = np.swapaxes(Linv, 1, 2) @ z
+	ssr = np.maximum(yTy - (z * z).sum(axis=1), 0.0)
+	coefs[~ok] = np.nan
+	xTxinv[~ok] = np.nan
+	ssr[~ok] = np.nan
+	return coefs, xTxinv, ssr
+
+def _recursive_factor(X, Y, window=None):
+	"""Return (coefs, xTxinv, ssr) as `_solve_moments`,
+	but carry the Cholesky factor of [X Y]'[X Y]
+	through rank-one updates (and, given `window`, downdates).
+	"""
+	nobs, ncoefs = X.shape
+	XY = np.hstack((X, Y))
+	R = np.zeros((ncoefs, XY.shape[1]))
+	ssr = np.zeros(Y.shape[1])
+	Rs = np.empty((nobs,) + R.shape)
+	ssrs = np.empty((nobs, Y.shape[1]))
+	for t in range(nobs):
+		x = XY[t].copy()
+		cholupdate(R, x)
+		ssr += x[ncoefs:]**2
+		if window is not None and t >= window:
+			x = XY[t-window].copy()
+			cholupdate(R, x, downdate=True)
+			ssr -= x[ncoefs:]**2
+		Rs[t] = R
+		ssrs[t] = ssr
+	Rxx, z = Rs[:,:,:ncoefs], Rs[:,:,ncoefs:]
+	diag = np.diagonal(Rxx, axis1=1, axis2=2)
+	ok = (diag != 0).all(axis=1)
+	eye = np.eye(ncoefs)
+	Rxx[~ok] = eye
+	Rinv = np.linalg.solve(Rxx, eye)
+	coefs = Rinv @ z
+	xTxinv = Rinv @ np.swapaxes(Rinv, 1, 2)
+	ssrs = np.maximum(ssrs, 0.0)
+	coefs[~ok] = np.nan
+	xTxinv[~ok] = np.nan
+	ssrs[~ok] = np.nan
+	return coefs, xTxinv, ssrs
 
 
 def linreg(X, Y):
@@ -455,17 +1083,20 @@ class OLSvn:
 	
 	"""
 
-	def __init__(self,y,x,y_varnm = 'y',x_varnm = ''):
+	def __init__(self,y,x,y_varnm = 'y',x_varnm = '', minimal=False):
 		"""
 		Initializing the ols class. 
+		With `minimal=True`, residuals are not stored
+		(`e` is recomputed on each access).
 		"""
-		self.y = y
-		self.x = c_[ones(x.shape[0]),x]
+		self.y = np.asarray(y, dtype=float)
+		x = np.asarray(x, dtype=float)
+		self.x = np.column_stack((np.ones(x.shape[0]), x))
 		self.y_varnm = y_varnm
 		if not isinstance(x_varnm,list): 
-			self.x_varnm = ['const'] + list(x_varnm)
-		else:
-			self.x_varnm = ['const'] + x_varnm
+			x_varnm = list(x_varnm) if x_varnm else ['x%d' % (i+1) for i in range(self.x.shape[1]-1)]
+		self.x_varnm = ['const'] + x_varnm
+		self.minimal = minimal
 
 		# Estimate model using OLS
 		self.estimate()
@@ -473,9 +1104,15 @@ class OLSvn:
 	def estimate(self):
 
 		# estimating coefficients, and basic stats
-		self.inv_xx = inv(dot(self.x.T,self.x))
-		xy = dot(self.x.T,self.y)
-		self.b = dot(self.inv_xx,xy)					# estimate coefficients
+		# (other statistics are computed on first access)
+		if self.minimal:								# R only; Q'y from R'(Q'y) = x'y
+			R = la.qr(self.x, mode='r')
+			Qy = solve_triangular(R, np.dot(self.x.T,self.y), trans='T')
+		else:
+			Q, R = la.qr(self.x)
+			Qy = np.dot(Q.T,self.y)
+		self._R = R										# factor reused for inv_xx
+		self.b = solve_triangular(R, Qy)				# estimate coefficients
 
 		self.nobs = self.y.shape[0]						# number of observations
 		self.ncoef = self.x.shape[1]					# number of coef.
@@ -483,59 +1120,96 @@ class OLSvn:
 		#TODO: fix!
 		self.df_r = self.ncoef - 1						# degrees of freedom, regression 
 
-		self.e = self.y - dot(self.x,self.b)			# residuals
-		self.sse = dot(self.e,self.e)/self.df_e			# SSE
-		self.se = sqrt(diagonal(self.sse*self.inv_xx))	# coef. standard errors
-		self.t = self.b / self.se						# coef. t-statistics
-		self.p = (1-Sstats.t.cdf(abs(self.t), self.df_e)) * 2	# coef. p-values
-
-		self.R2 = 1 - self.e.var()/self.y.var()			# model R-squared
-		self.R2adj = 1-(1-self.R2)*((self.nobs-1)/(self.nobs-self.ncoef))	# adjusted R-square
-
-		self.F = (self.R2/self.df_r) / ((1-self.R2)/self.df_e)	# model F-statistic
-		self.Fpv = 1-Sstats.f.cdf(self.F, self.df_r, self.df_e)	# F-statistic p-value
+		if self.minimal:								# error sum of squares, by row blocks
+			self.ess = _blocked_ess(self.x, self.y[:,None], self.b[:,None])[0]
+			self._e = None
+		else:
+			e = self.y - np.dot(self.x,self.b)			# residuals
+			self.ess = np.dot(e,e)						# error sum of squares
+			self._e = e
+		self._cache = dict()							# cached diagnostics
+
+	@property
+	def e(self):
+		"""residuals"""
+		if self._e is not None:
+			return self._e
+		return self.y - np.dot(self.x,self.b)
+	@cached_property
+	def inv_xx(self):
+		Rinv = solve_triangular(self._R, np.eye(self.ncoef))
+		return np.dot(Rinv, Rinv.T)
+	@cached_property
+	def sse(self):
+		return self.ess/self.df_e						# SSE
+	@cached_property
+	def se(self):
+		return np.sqrt(np.diagonal(self.sse*self.inv_xx))	# coef. standard errors
+	@cached_property
+	def t(self):
+		return self.b / self.se							# coef. t-statistics
+	@cached_property
+	def p(self):
+		return 2 * Sstats.t.sf(np.abs(self.t), self.df_e)	# coef. p-values
+	@cached_property
+	def R2(self):
+		#residual variance from ess and the residual mean
+		emean = self.y.mean() - np.dot(self.x.mean(axis=0), self.b)
+		return 1 - (self.ess/self.nobs - emean**2)/self.y.var()	# model R-squared
+	@cached_property
+	def R2adj(self):
+		return 1-(1-self.R2)*((self.nobs-1)/(self.nobs-self.ncoef))	# adjusted R-square
+	@cached_property
+	def F(self):
+		return (self.R2/self.df_r) / ((1-self.R2)/self.df_e)	# model F-statistic
+	@cached_property
+	def Fpv(self):
+		return Sstats.f.sf(self.F, self.df_r, self.df_e)	# F-statistic p-value
 
 	def dw(self):
 		"""
 		Calculates the Durbin-Waston statistic
 		"""
-		de = diff(self.e,1)
-		dw = dot(de,de) / dot(self.e,self.e);
-
-		return dw
+		if 'dw' not in self._cache:
+			de = np.diff(self.e,1)
+			self._cache['dw'] = np.dot(de,de) / self.ess
+		return self._cache['dw']
 
 	def omni(self):
 		"""
 		Omnibus test for normality
 		"""
-		return Sstats.normaltest(self.e) 
+		if 'omni' not in self._cache:
+			self._cache['omni'] = Sstats.normaltest(self.e)
+		return self._cache['omni']
 	
 	def JB(self):
 		"""
 		Calculate residual skewness, kurtosis, and do the JB test for normality
 		"""
-
-		# Calculate residual skewness and kurtosis
-		skew = Sstats.skew(self.e) 
-		kurtosis = 3 + Sstats.kurtosis(self.e) 
-		
-		# Calculate the Jarque-Bera test for normality
-		JB = (self.nobs/6) * (square(skew) + (1/4)*square(kurtosis-3))
-		JBpv = 1-Sstats.chi2.cdf(JB,2);
-
-		return JB, JBpv, kurtosis, skew
+		if 'JB' not in self._cache:
+			e = self.e
+			# Calculate residual skewness and kurtosis
+			skew = Sstats.skew(e) 
+			kurtosis = 3 + Sstats.kurtosis(e) 
+			
+			# Calculate the Jarque-Bera test for normality
+			JB = (self.nobs/6) * (np.square(skew) + (1/4)*np.square(kurtosis-3))
+			JBpv = Sstats.chi2.sf(JB,2)
+			self._cache['JB'] = JB, JBpv, kurtosis, skew
+		return self._cache['JB']
 
 	def ll(self):
 		"""
 		Calculate model log-likelihood and two information criteria
 		"""
-		
-		# Model log-likelihood, AIC, and BIC criterion values 
-		ll = -(self.nobs*1/2)*(1+np.log(2*math.pi)) - (self.nobs/2)*np.log(np.dot(self.e,self.e)/self.nobs)
-		aic = -2*ll/self.nobs + (2*self.ncoef/self.nobs)
-		bic = -2*ll/self.nobs + (self.ncoef*np.log(self.nobs))/self.nobs
-
-		return ll, aic, bic
+		if 'll' not in self._cache:
+			# Model log-likelihood, AIC, and BIC criterion values 
+			ll = -(self.nobs*1/2)*(1+np.log(2*math.pi)) - (self.nobs/2)*np.log(self.ess/self.nobs)
+			aic = -2*ll/self.nobs + (2*self.ncoef/self.nobs)
+			bic = -2*ll/self.nobs + (self.ncoef*np.log(self.nobs))/self.nobs
+			self._cache['ll'] = ll, aic, bic
+		return self._cache['ll']
 	
 	def summary(self):
 		"""
@@ -547,7 +1221,7 @@ class OLSvn:
 
 		# extra stats
 		ll, aic, bic = self.ll()
-		JB, JBpv, skew, kurtosis = self.JB()
+		JB, JBpv, kurtosis, skew = self.JB()
 		omni, omnipv = self.omni()
 
 		# printing output to screen
@@ -563,8 +1237,8 @@ class OLSvn:
 		==============================================================================
 		""")
 
-		for tpl in zip(self.x_varm,self.b,self.se,self.t,self.p):
-			print("% -5s			% -5.6f		% -5.6f		% -5.6f		% -5.6f".format(tpl))
+		for tpl in zip(self.x_varnm,self.b,self.se,self.t,self.p):
+			print("% -5s			% -5.6f		% -5.6f		% -5.6f		% -5.6f" % tpl)
 
 		print(f"""=============================================================================='
 		Models stats							Residual stats
@@ -573,7 +1247,7 @@ class OLSvn:
 		Adjusted R-squared	{self.R2adj:-5.6f}			Omnibus stat		{omni:-5.6f}
 		F-statistic			{self.F:-5.6f}			Prob(Omnibus stat)	{omnipv:-5.6f}
 		Prob (F-statistic)	{self.Fpv:-5.6f}			JB stat				{JB:-5.6f}
-		Log likelihood		{self.ll:-5.6f}			Prob(JB)			{JBpv:-5.6f}
+		Log likelihood		{ll:-5.6f}			Prob(JB)			{JBpv:-5.6f}
 		AIC criterion		{aic:-5.6f}			Skew				{skew:-5.6f}
 		BIC criterion		{bic:-5.6f}			Kurtosis			{kurtosis:-5.6f}
 		==============================================================================
@@ -607,3 +1281,146 @@ def rolsf(x, y, p, th, lam):
 	p = (p-g*np.outer(a,a))/lam
 	return th, p
  
+
+def rolsf_path(x, y, p, th, lam, method='batch', keep_cov=True, blocksize=512):
+	"""Return: (ths, ps), the paths of parameter estimates
+	and covariance matrices from running the recursive least squares
+	filter of `rolsf` over a whole sample.
+	Row t of `ths` (and `ps`) is the estimate after observation t.
+	Many independent series can be filtered together:
+	leading dimensions of `x` and `y` are batch dimensions.
+
+	Enter with x(...,T,N) = inputs, y(...,T) = outputs,
+	p(...,N,N) = initial covariance, th(...,N) = initial estimate,
+	lam = forgetting factor.
+
+	:Parameters:
+		`method` : str
+			'batch' (default) uses the closed form of the filter,
+			which is exponentially weighted least squares:
+			inv(P_t) = lam*inv(P_(t-1)) + x x' and inv(P_t) th_t = lam*inv(P_(t-1)) th_(t-1) + x y,
+			so observations are processed together
+			(by blocked prefix sums and batched solves, a block of time periods at a time);
+			'mil' steps through the sample with the
+			Matrix Inversion Lemma update of `rolsf`;
+			'ud' steps through the sample with Bierman's
+			UD factorization (P = U D U'),
+			which keeps the covariance symmetric and positive definite
+		`keep_cov` : bool
+			False to return only the final covariance matrix
+			(instead of the (...,T,N,N) path);
+			for 'batch', the estimates then come from linear solves,
+			without inverting each moment matrix
+		`blocksize` : int
+			number of periods processed together by 'batch'
+			(which holds (...,blocksize,N,N) moment matrices)
+	:see: Bierman, G. J.: Factorization Methods for Discrete Sequential Estimation.
+	      New York: Academic Press, 1977.
+	"""
+	x = np.asarray(x, dtype=float)
+	y = np.asarray(y, dtype=float)
+	batch_shape = x.shape[:-2]
+	nobs, n = x.shape[-2:]
+	if y.shape != x.shape[:-1]:
+		raise ValueError("y must have shape x.shape[:-1].")
+	#flatten batch dimensions
+	x = x.reshape(-1, nobs, n)
+	y = y.reshape(-1, nobs)
+	nseries = len(x)
+	th = np.array(np.broadcast_to(th, batch_shape + (n,)), dtype=float).reshape(nseries, n)
+	p = np.array(np.broadcast_to(p, batch_shape + (n,n)), dtype=float).reshape(nseries, n, n)
+	ths = np.empty((nseries, nobs, n))
+	ps = np.empty((nseries, nobs, n, n)) if keep_cov else None
+	if method == 'batch':
+		#moment matrices for one block of periods at a time (carrying the last ones)
+		A = np.linalg.inv(p)
+		b = np.einsum('sij,sj->si', A, th)
+		for start in range(0, nobs, blocksize):
+			xt, yt = x[:,start:start+blocksize], y[:,start:start+blocksize]
+			At = _ewsum(xt[:,:,:,None] * xt[:,:,None,:], A, lam)
+			bt = _ewsum(xt * yt[:,:,None], b, lam)
+			if keep_cov:
+				pt = ps[:,start:start+blocksize] = np.linalg.inv(At)
+				ths[:,start:start+blocksize] = np.einsum('stij,stj->sti', pt, bt)
+			else:
+				ths[:,start:start+blocksize] = np.linalg.solve(At, bt[...,None])[...,0]
+			A, b = At[:,-1], bt[:,-1]
+		p = np.linalg.inv(A)
+	elif method == 'mil':
+		for t in range(nobs):
+			xt = x[:,t]
+			a = np.einsum('sij,sj->si', p, xt)
+			g = 1. / (np.einsum('si,si->s', xt, a) + lam)
+			e = y[:,t] - np.einsum('si,si->s', xt, th)
+			th += a * (g * e)[:,None]
+			p = (p - g[:,None,None] * a[:,:,None] * a[:,None,:]) / lam
+			ths[:,t] = th
+			if keep_cov:
+				ps[:,t] = p
+	elif method == 'ud':
+		U, D = _ud_factor(p)
+		for t in range(nobs):
+			xt = x[:,t]
+			f = np.einsum('sji,sj->si', U, xt)    #U'x
+			v = D * f
+			alpha = np.full(nseries, float(lam))
+			b = np.zeros((nseries, n))
+			for j in range(n):  #Bierman's measurement update
+				alpha_old = alpha
+				alpha = alpha_old + f[:,j] * v[:,j]
+				D[:,j] *= alpha_old / alpha
+				lam_j = -f[:,j] / alpha_old
+				Uj = U[:,:j,j].copy()
+				U[:,:j,j] += b[:,:j] * lam_j[:,None]
+				b[:,:j] += Uj * v[:,j,None]
+				b[:,j] = v[:,j]
+			e = y[:,t] - np.einsum('si,si->s', xt, th)
+			th += b * (e / alpha)[:,None]
+			D /= lam
+			ths[:,t] = th
+			if keep_cov:
+				ps[:,t] = np.einsum('sij,sj,skj->sik', U, D, U)
+		p = np.einsum('sij,sj,skj->sik', U, D, U)
+	else:
+		raise ValueError("Unknown method %r." % method)
+	ths = ths.reshape(batch_shape + (nobs, n))
+	if keep_cov:
+		ps = ps.reshape(batch_shape + (nobs, n, n))
+	else:
+		ps = p.reshape(batch_shape + (n, n))
+	return ths, ps
+
+def _ewsum(z, init, lam):
+	"""Return array, the exponentially weighted sums
+	S_t = lam*S_(t-1) + z_t (along axis 1), starting from S_(-1) = `init`.
+	Within blocks, S_t = lam**t * (lam*S_(-1) + sum_i lam**(-i) z_i),
+	with blocks short enough that lam**(-i) stays below 1e8.
+	"""
+	nobs = z.shape[1]
+	if lam == 1:
+		blocksize = nobs
+	else:
+		blocksize = max(1, min(nobs, int(math.log(1e8) / -math.log(lam))))
+	extra = (1,) * (z.ndim - 2)
+	result = np.empty_like(z)
+	carry = init
+	for start in range(0, nobs, blocksize):
+		stop = min(start + blocksize, nobs)
+		powers = lam ** np.arange(stop - start, dtype=float)
+		weighted = z[:,start:stop] / powers.reshape((1, -1) + extra)
+		sums = np.cumsum(weighted, axis=1)
+		sums += lam * carry[:,None]
+		sums *= powers.reshape((1, -1) + extra)
+		result[:,start:stop] = sums
+		carry = sums[:,-1]
+	return result
+
+def _ud_factor(p):
+	"""Return (U, D), with U unit upper triangular and D the diagonal,
+	such that p = U diag(D) U' (for a stack of positive definite p).
+	"""
+	#Cholesky of the reversed matrix gives an upper triangular factor
+	rev = p[:,::-1,::-1]
+	G = np.linalg.cholesky(rev)[:,::-1,::-1]   #p = G G', G upper triangular
+	d = np.diagonal(G, axis1=1, axis2=2)
+	return G / d[:,None,:], d**2
@@ -16,8 +16,16 @@ __docformat__ = "restructuredtext en"
 
 import csv
 import types
-import urllib
+import urllib.request
+import os
+import io
+import sys
+import json
+import warnings
+import itertools
+import hashlib
 import datetime
+import functools
 import re, glob  #just for grep
 import logging
 logging.getLogger().setLevel(logging.WARN) #sets root logger level
@@ -28,16 +36,16 @@ logging.getLogger().setLevel(logging.WARN) #sets root logger level
 #	pylab.load()
 #	scipy.io.read_array()
 
+import numpy as np
 import matplotlib.dates
-from matplotlib.dates import date2num, MONTHLY, YEARLY
+from matplotlib.dates import date2num, DAILY, MONTHLY, YEARLY
 try: from scipy import nan
 except ImportError: nan=1e300*1e300-1e300*1e300
 #see http://www.cs.ucla.edu/classes/winter04/cs131/hw/hw4.html for problems w this ^
 
-def fetch(file_name,file_type='databank'):
+def fetch(file_name,file_type='databank',cache=False):
 	if file_type=='databank':
-		fp = open(file_name,'r')
-		data,smpl,label = read_db(fp) #need to change comments to label
+		data,smpl,label = read_db(file_name,cache=cache) #need to change comments to label
 		return data, smpl, label
 	else:
 		raise ValueError("Unsupported file type")
@@ -62,23 +70,68 @@ def next_stripped_notempty(fp):  #ignore blank lines
 		if line: break
 	return line
 
-def read_db(fp):
+def read_db(fp, cache=False, cachedir=None):
 	"""Return tuple: data, smpl, comments.
 	Reads an open-database file.
+	The header is parsed line by line,
+	but the data block is converted in bulk to a float64 array
+	(falling back to line-by-line parsing, which discards
+	comments and corrupt data, only if that fails).
+
+	:Parameters:
+		`fp` : str or file
+			file name (or open file)
+		`cache` : bool
+			if True (and `fp` is a file name), keep a binary sidecar
+			(a .npy file of the data plus a .json file of the header),
+			which is used (memory mapped) for later reads
+			as long as the size and modification time of the file are unchanged
+		`cachedir` : str
+			directory for the sidecar files (default: alongside `fp`)
+	:see: http://www.american.edu/econ/pytrix/opendatabank.txt
 	"""
 	#fp may be a string instead of a file handle
-	if isinstance(fp,str):
-		fp = file(fp,'r')
-	assert isinstance(fp,file), "%s not recognized as a file"%(fp)
+	if isinstance(fp, (str, os.PathLike)):
+		path = os.fspath(fp)
+		if cache:
+			cached = _load_db_cache(path, cachedir)
+			if cached is not None:
+				return cached
+		with open(path, 'r') as fh:
+			text = fh.read()
+	else:
+		assert hasattr(fp, 'read'), "%s not recognized as a file"%(fp)
+		path = None
+		text = fp.read()
+	data, smpl, comments = _parse_db(text)
+	if cache and path:
+		_save_db_cache(path, cachedir, data, smpl, comments)
+	return data, smpl, comments
+
+def _parse_db(text):
+	"""Return tuple: data, smpl, comments, parsed from
+	the contents `text` of an open-database file.
+	"""
 	#empty dict to hold comments
 	comments = dict()
 	ckey = ''
 	cval = ''
-	#empty list to hold data
-	data = []
-	#get the first non-empty line
-	line = next_stripped_notempty(fp)
-	while line.startswith('"'):   #it's a comment
+	header = []  #frequency (if dated), start, and end
+	pos, nchars = 0, len(text)
+	while len(header) < 2 or (header[0].startswith('-') and len(header) < 3):
+		if pos >= nchars:
+			raise ValueError('Incomplete databank header.')
+		eol = text.find('\n', pos)
+		if eol < 0:
+			eol = nchars
+		line = text[pos:eol].strip()
+		pos = eol + 1
+		if not line:  #ignore blank lines
+			continue
+		if header or not line.startswith('"'):
+			header.append(line)
+			continue
+		#it's a comment
 		if line.endswith('"'):
 			line=line[:-1].rstrip()
 		if line.startswith('"c'):   #it's a new comment
@@ -96,14 +149,11 @@ def read_db(fp):
 			comments[ckey] += '\n'+cval
 		else:
 			comments[ckey] = cval
-		line = next_stripped_notempty(fp)
-	if line.startswith('-'):  #fixed frequency series
-		freq = -int(line)
-		line = next_stripped_notempty(fp)
+	if header[0].startswith('-'):  #fixed frequency series
+		freq = -int(header.pop(0))
 	else: # undated series
 		freq = 'u'
-	start = line
-	end = next_stripped_notempty(fp)
+	start, end = header
 	if freq in [1,4,12]:
 		start = datestr2date(start,freq)
 		end = datestr2date(end,freq)
@@ -112,18 +162,75 @@ def read_db(fp):
 	else:
 		raise ValueError("Unrecognized frequency.")
 	smpl = Sample(start, end, freq)
-	for line in fp.readlines():  #TODO: work with multifile
-		if line.startswith('"'):
-			logging.warn("comment in data discarded")
-			continue #ignore comments in data
-		else:
-			try:
-				data.append(float(line))
-			except ValueError:
-				logging.warn("corrupt data discarded:"+line)
-	#logging.info(str(comments))
+	block = text[pos:]
+	try:
+		data = np.array(block.split(), dtype=float)
+	except ValueError:
+		data = []
+		for line in block.splitlines():  #TODO: work with multifile
+			line = line.strip()
+			if not line:
+				continue
+			if line.startswith('"'):
+				logging.warn("comment in data discarded")
+				continue #ignore comments in data
+			else:
+				try:
+					data.append(float(line))
+				except ValueError:
+					logging.warn("corrupt data discarded:"+line)
+		data = np.array(data, dtype=float)
 	return data, smpl, comments
 
+def _db_cache_paths(path, cachedir):
+	"""Return tuple: paths of the .npy and .json sidecar files for `path`."""
+	path = os.path.abspath(path)
+	base = os.path.basename(path)
+	if cachedir is None:
+		cachedir = os.path.dirname(path)
+	else:  #files from different directories may share a cache directory
+		base = hashlib.md5(path.encode('utf-8')).hexdigest()[:12] + '_' + base
+	base = os.path.join(cachedir, base)
+	return base + '.npy', base + '.json'
+
+def _load_db_cache(path, cachedir):
+	"""Return tuple (data, smpl, comments) from the sidecar files for `path`,
+	or None if they are missing or stale.
+	"""
+	npy, meta = _db_cache_paths(path, cachedir)
+	try:
+		stat = os.stat(path)
+		with open(meta, 'r') as fh:
+			header = json.load(fh)
+		if (header['size'], header['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+			return None
+		data = np.load(npy, mmap_mode='r')
+	except (OSError, ValueError, KeyError):
+		return None
+	smpl = Sample.from_ordinals(header['start_ord'], header['end_ord'], header['freq'])
+	return data, smpl, header['comments']
+
+def _save_db_cache(path, cachedir, data, smpl, comments):
+	"""Return None. Write the sidecar files for `path` (see `read_db`)."""
+	npy, meta = _db_cache_paths(path, cachedir)
+	stat = os.stat(path)
+	header = dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+		freq=smpl.freq, start_ord=smpl.start_ord, end_ord=smpl.end_ord,
+		comments=comments)
+	try:
+		os.makedirs(os.path.dirname(npy), exist_ok=True)
+		#write to temporary files and rename, so readers never see partial files
+		tmp = '%s.%d.tmp' % (npy, os.getpid())
+		with open(tmp, 'wb') as fh:
+			np.save(fh, data)
+		os.replace(tmp, npy)
+		tmp = '%s.%d.tmp' % (meta, os.getpid())
+		with open(tmp, 'w') as fh:
+			json.dump(header, fh)
+		os.replace(tmp, meta)
+	except OSError:
+		logging.warn("cannot write databank cache for %s"%(path,))
+
 def write_db(file_name, data, smpl=None, comments=None, freq=None, start=None, end=None):
 	"""Return None. Write data to an opendatabank file.
 	Priority to smpl if provided.
@@ -143,6 +250,8 @@ def write_db(file_name, data, smpl=None, comments=None, freq=None, start=None, e
 		except:
 			logging.debug("No sample provided: treating as undated data.")
 			smpl = (1,len(data))
+	if isinstance(smpl, Sample) and not smpl.freq:  #undated
+		smpl = (smpl.start, smpl.end)
 	if isinstance(smpl, tuple):
 		freq = None
 		start = smpl[0]
@@ -165,6 +274,7 @@ def write_db(file_name, data, smpl=None, comments=None, freq=None, start=None, e
 		invalid file or directory name?"""%(file_name)
 		logging.error(msg)
 		raise IOError
+	comments = dict(comments or ())
 	comments['Last updated'] = str(datetime.date.today())
 	for key in comments:
 		fp.write('"c'+key+': '+comments[key]+'\n')
@@ -206,12 +316,67 @@ def date2bop(dt, freq):
 		new_dt = datetime.date(dt.year,1+((dt.month-1)//3)*3,1)
 	elif freq==12:
 		new_dt = datetime.date(dt.year,dt.month,1)
+	elif freq==365:
+		new_dt = dt
 	else:
 		raise ValueError('Unsupported frequency: %s'%(freq))
 	if new_dt != dt:
 		logging.info("Date changed to start of period for frequency of %s times per year."%(freq))
 	return new_dt
-	
+
+def date2ordinal(dt, freq):
+	"""Return int, the ordinal of the period in which `dt` falls:
+	the number of periods (years, quarters, months, or days)
+	since the beginning of the year 0 (days: see `datetime.date.toordinal`).
+	Undated samples (freq None) use the integer `dt` itself.
+
+	:param dt: datetime.date object (or int, if `freq` is None)
+	:param freq: int, representaton of frequency
+	"""
+	if freq is None:
+		return int(dt)
+	if freq == 365:
+		return dt.toordinal()
+	if freq not in (1,4,12):
+		raise ValueError('Unsupported frequency: %s'%(freq))
+	return (dt.year*12 + dt.month - 1)//(12//freq)
+
+def ordinal2date(p, freq):
+	"""Return datetime.date, the beginning of the period with ordinal `p`
+	(or, if `freq` is None, the int `p`).
+
+	:see: `date2ordinal`
+	"""
+	if freq is None:
+		return int(p)
+	if freq == 365:
+		return datetime.date.fromordinal(p)
+	if freq not in (1,4,12):
+		raise ValueError('Unsupported frequency: %s'%(freq))
+	m = p*(12//freq)
+	return datetime.date(m//12, m%12 + 1, 1)
+
+def add_periods(dt, n, freq):
+	"""Return datetime.date, the beginning of the period
+	`n` periods after the period in which `dt` falls
+	(or, for undated samples where `freq` is None, the integer dt+n).
+
+	:param dt: datetime.date object (or int, if `freq` is None)
+	:param n: int, number of periods (may be negative)
+	:param freq: int, representaton of frequency
+	"""
+	freq = freq2num(freq)
+	return ordinal2date(date2ordinal(dt, freq) + n, freq)
+
+def count_periods(start, end, freq):
+	"""Return int, the number of periods from the period in which `start`
+	falls through the period in which `end` falls (inclusive).
+
+	:see: `add_periods`
+	"""
+	freq = freq2num(freq)
+	return date2ordinal(end, freq) - date2ordinal(start, freq) + 1
+
 def parse_datestr(datestr):
 	"""Return dict containing year, quarter, month, day, freq.
 
@@ -288,13 +453,37 @@ def date2dbdate(dtdate,freq):
 	freq = freq2num(freq)
 	dtstr = str(dtdate.year)
 	if freq==12:
-		dtstr = dtstr + '.' + str(date.month)
+		dtstr = dtstr + '.%02d'%(dtdate.month,)
 	if freq==4:
 		dtstr = dtstr + '.' + str((2+dtdate.month)//3)
 	logging.info("dtstr: "+dtstr)
 	return dtstr
 
 
+def parse_fred_header(header):
+	"""Return dict, the comments in a `FRED2` file `header`.
+	Skips blank lines.
+	"""
+	keyval = ['','']
+	comments = dict()
+	for line in header.split("\n"):
+		if line and line[0].isalpha(): #shd start a new comment
+			try:
+				idx = line.index(':')
+				if keyval[0]:  #flush comment in progress
+					comments[keyval[0]]=keyval[1]
+				keyval = [ s.strip() for s in line.split(':',1) ]
+			except: #must be a badly formatted comment continuation
+				if keyval[0]:
+					keyval[1] = keyval[1] + ' ' + line.strip()
+				else:
+					logging.warn("Orphan comment line discarded.")
+		elif line: #continue an old comment
+			keyval[1] += ' ' + line.strip()
+	if keyval[0]:  #flush the last comment
+		comments[keyval[0]]=keyval[1]
+	return comments
+
 class ReadFRED(object):
 	"""Read data from `FRED2`_ files.
 	Example use::
@@ -325,7 +514,7 @@ class ReadFRED(object):
 		source = self.source
 		if isinstance(source,str):
 			if source.startswith('http'):
-				try: fh = urllib.urlopen(source)
+				try: fh = io.TextIOWrapper(urllib.request.urlopen(source))
 				except IOError:
 					logging.error("Cannot open URL.")
 					return
@@ -335,7 +524,7 @@ class ReadFRED(object):
 					logging.error("Cannot open file %s."%(source))
 					return
 		else:
-			fh = filehandle
+			fh = source
 		return fh
 	def parse_source(self, fh):
 		"""Parse source into header, dates, and data.
@@ -368,31 +557,15 @@ class ReadFRED(object):
 				except: 
 					logging.warn("Missing value set to nan.")
 					data.append(nan)
-			self.dates = dates
-			self.data = data
+		self.dates = dates
+		self.data = data
 	def parse_header(self):
 		"""Parse header into individual comments.
 		Skips blank lines.
 		"""
-		keyval = ['','']
-		comments = dict()
-		for line in self.header.split("\n"):
-			if line and line[0].isalpha(): #shd start a new comment
-				try:
-					idx = line.index(':')
-					if keyval[0]:  #flush comment in progress
-						comments[keyval[0]]=keyval[1]
-					keyval = [ s.strip() for s in line.split(':',1) ]
-				except: #must be a badly formatted comment continuation
-					if keyval[0]:
-						keyval[1] = keyval[1] + ' ' + line.strip()
-					else:
-						logging.warn("Orphan comment line discarded.")
-			elif line: #continue an old comment
-				keyval[1] += ' ' + line.strip()
-		self.comments = comments
+		self.comments = parse_fred_header(self.header)
 	def write_db(self, file_name):
-		smpl = self.get_sample()
+		smpl = self.sample
 		write_db(file_name,self.data,smpl=smpl,comments={},freq=None,start=None,end=None)
 	@property
 	def sample(self):
@@ -409,11 +582,12 @@ def read_ifs_csv(filename, commentlines=10):
 	Very basic reader for IFS CSV files.
 	Only reads sequential valid observations.
 	"""
-	reader = csv.reader(open(filename))
+	fh = open(filename, newline='')
+	reader = csv.reader(fh)
 	#get comments
 	commentdict = dict()
 	for _ in range(commentlines):
-		row = reader.next()
+		row = next(reader)
 		key = row[0]
 		commentdict[key] = row[1:]
 	#get data and dates
@@ -425,7 +599,7 @@ def read_ifs_csv(filename, commentlines=10):
 			if not startdata: continue
 			else: break
 		startdata = True
-		date, vals = row[0], map(float,row[1:])
+		date, vals = row[0], [float(xi) for xi in row[1:]]
 		dates.append( datestr2date(date) )
 		data.append(vals)
 	#make comments by series
@@ -436,7 +610,8 @@ def read_ifs_csv(filename, commentlines=10):
 			for i in range(nseries):
 				comments[i][key] = commentdict[key][i]
 		else:
-			logging.info("Missing comments?"+commendict[key])
+			logging.info("Missing comments? %s"%(commentdict[key],))
+	fh.close()
 	return data, dates, comments
 
 def read_fred(source):
@@ -477,41 +652,270 @@ def read_odbmulti(fname):
 		print(data)
 	fp.close()
 
+#file extension -> kind of file, for `load_dir`
+file_kinds = {'.txt': 'fred', '.db': 'databank', '.csv': 'ifs'}
+
+def load_dir(dirname, freq=None, kinds=None, nprocesses=1, cache=False, cachedir=None):
+	"""Return tuple: data, smpl, ids.
+	Load every FRED text (.txt), databank (.db), and IFS CSV (.csv)
+	file in directory `dirname` into one date-aligned array:
+	`data` is T x N (one column per series, NaN where a series has no observation),
+	`smpl` is the Sample of its rows, and `ids` lists the N series ids
+	(the file name without extension, plus ':i' for the i-th series in an IFS file).
+	Files are parsed in bulk (see `read_db` and `read_fred_bulk`)
+	by a pool of `nprocesses` workers.
+
+	:Parameters:
+		`dirname` : str
+			directory to load
+		`freq` : int or str
+			frequency to load (default: the most common); files with
+			another frequency are skipped, with a warning
+		`kinds` : sequence of str
+			kinds of file to load (default: all of 'fred', 'databank', 'ifs')
+		`nprocesses` : int
+			number of worker processes
+		`cache` : bool
+			if True, keep the parsed series in `cachedir`,
+			keyed by file size and modification time,
+			so unchanged files are not parsed again
+		`cachedir` : str
+			cache directory (default: a .econpy_cache subdirectory of `dirname`)
+	"""
+	kinds = set(kinds or file_kinds.values())
+	paths = []
+	for entry in sorted(os.scandir(dirname), key=lambda entry: entry.name):
+		kind = file_kinds.get(os.path.splitext(entry.name)[1].lower())
+		if kind in kinds and entry.is_file():
+			paths.append((os.path.abspath(entry.path), kind))
+	#reuse the cached series of unchanged files
+	parsed = dict()
+	stats = dict()
+	if cache:
+		if cachedir is None:
+			cachedir = os.path.join(dirname, '.econpy_cache')
+		index, store = _load_dir_cache(cachedir)
+		for path, kind in paths:
+			stat = os.stat(path)
+			stats[path] = [stat.st_size, stat.st_mtime_ns]
+			entry = index.get(path)
+			if entry and entry['stat'] == stats[path]:
+				#copies, so no view keeps the store mapped while it is rewritten
+				#(replacing a mapped file fails on Windows)
+				parsed[path] = [(sid, f, store[0, offset:offset+n].astype(np.int64), np.array(store[1, offset:offset+n]))
+					for sid, f, offset, n in entry['series']]
+		del store  #release the memory map
+	jobs = [(path, kind) for path, kind in paths if path not in parsed]
+	if nprocesses > 1 and len(jobs) > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(nprocesses) as pool:
+			results = list(pool.map(_load_series_file, jobs, chunksize=max(1, len(jobs)//(4*nprocesses))))
+	else:
+		results = [_load_series_file(job) for job in jobs]
+	parsed.update(zip([path for path, kind in jobs], results))
+	if cache and (jobs or len(index) != len(paths)):
+		_save_dir_cache(cachedir, [(path, stats[path], parsed[path]) for path, kind in paths])
+	series = [item for path, kind in paths for item in parsed[path]]
+	freqs = [item[1] for item in series]
+	if freq is None and freqs:
+		freq = max(set(freqs), key=freqs.count)
+	else:
+		freq = freq2num(freq)
+	skipped = [item[0] for item in series if item[1] != freq]
+	if skipped:
+		logging.warn("load_dir: skipped series of other frequencies: %s"%(skipped,))
+	series = [item for item in series if item[1] == freq and len(item[2])]
+	if not series:
+		return np.empty((0, 0)), None, []
+	start = min(item[2][0] for item in series)
+	end = max(item[2][-1] for item in series)
+	data = np.full((end - start + 1, len(series)), np.nan)
+	for j, (sid, _, ordinals, values) in enumerate(series):
+		data[ordinals - start, j] = values
+	return data, Sample.from_ordinals(start, end, freq), [item[0] for item in series]
+
+def _load_dir_cache(cachedir):
+	"""Return tuple: index, store, the `load_dir` cache in `cachedir`
+	(empty if missing or unreadable).
+	The index maps each file path to its size and modification time
+	and to (id, freq, offset, length) for each of its series;
+	the store is a memory-mapped 2 x n array whose rows hold
+	the concatenated period ordinals and values.
+	"""
+	try:
+		with open(os.path.join(cachedir, 'load_dir.json'), 'r') as fh:
+			index = json.load(fh)
+		store = np.load(os.path.join(cachedir, 'load_dir.npy'), mmap_mode='r')
+	except (OSError, ValueError):
+		return dict(), np.empty((2, 0))
+	return index, store
+
+def _save_dir_cache(cachedir, files):
+	"""Return None. Write the `load_dir` cache for `files`,
+	a list of (path, stat, series) tuples.
+	"""
+	index = dict()
+	chunks = []
+	offset = 0
+	for path, stat, series in files:
+		entry = []
+		for sid, f, ordinals, values in series:
+			entry.append((sid, f, offset, len(values)))
+			chunks.append(np.array([ordinals, values], dtype=float))
+			offset += len(values)
+		index[path] = dict(stat=stat, series=entry)
+	store = np.concatenate(chunks, axis=1) if chunks else np.empty((2, 0))
+	try:
+		os.makedirs(cachedir, exist_ok=True)
+		#write to temporary files and rename, so readers never see partial files
+		for name, write in (('load_dir.npy', lambda fh: np.save(fh, store)),
+				('load_dir.json', lambda fh: fh.write(json.dumps(index).encode('utf-8')))):
+			target = os.path.join(cachedir, name)
+			tmp = '%s.%d.tmp' % (target, os.getpid())
+			with open(tmp, 'wb') as fh:
+				write(fh)
+			os.replace(tmp, target)
+	except OSError:
+		logging.warn("load_dir: cannot write cache in %s"%(cachedir,))
+
+def _load_series_file(args):
+	"""Return list of (id, freq, ordinals, values) tuples,
+	the series in one file (or an empty list if it cannot be parsed).
+	"""
+	path, kind = args
+	try:
+		return _parse_series_file(path, kind)
+	except Exception as e:
+		logging.warn("load_dir: cannot parse %s (%s)"%(path, e))
+		return []
+
+def _parse_series_file(path, kind):
+	"""Return list of (id, freq, ordinals, values) tuples, the series in one file."""
+	sid = os.path.splitext(os.path.basename(path))[0]
+	if kind == 'databank':
+		data, smpl, comments = read_db(path)
+		return [(sid, smpl.freq, smpl.start_ord + np.arange(len(data)), np.asarray(data))]
+	if kind == 'fred':
+		dates, values, comments = read_fred_bulk(path)
+		freq = freq2num(comments.get('Frequency', 'U'))
+		return [(sid, freq, datetime64_ordinals(dates, freq), values)]
+	if kind == 'ifs':
+		data, dates, comments = read_ifs_csv(path)
+		#infer the frequency from the month gap between observations
+		gap = 12 if len(dates) < 2 else (dates[1].year - dates[0].year)*12 + dates[1].month - dates[0].month
+		freq = {12: 1, 3: 4, 1: 12}[gap]
+		ordinals = np.array([date2ordinal(dt, freq) for dt in dates])
+		data = np.array(data, dtype=float).reshape(len(dates), -1)
+		return [('%s:%d'%(sid, i), freq, ordinals, data[:,i]) for i in range(data.shape[1])]
+	raise ValueError('Unknown file kind: %s'%(kind,))
+
+def datetime64_ordinals(dates, freq):
+	"""Return int array, the period ordinals (see `date2ordinal`)
+	of the datetime64 array `dates`.
+	"""
+	if freq == 365:
+		return dates.astype('datetime64[D]').astype(np.int64) + datetime.date(1970,1,1).toordinal()
+	if freq not in (1,4,12):
+		raise ValueError('Unsupported frequency: %s'%(freq))
+	months = dates.astype('datetime64[M]').astype(np.int64) + 1970*12
+	return months//(12//freq)
+
+def read_fred_bulk(path):
+	"""Return tuple: dates, data, comments.
+	Read a `FRED2`_ text file, converting the date and data columns in bulk:
+	`dates` is a datetime64[D] array and `data` a float64 array
+	(missing values, marked '.', are NaN).
+	Falls back to `ReadFRED` if bulk conversion fails.
+
+	.. _`FRED2`: http://research.stlouisfed.org/fred2/
+	"""
+	with open(path, 'r') as fh:
+		text = fh.read()
+	pos = text.find('\nDATE')
+	if text.startswith('DATE'):
+		pos = -1
+	elif pos < 0:
+		raise ValueError("%s: no DATE line"%(path,))
+	header = text[:pos+1]
+	eol = text.find('\n', pos+1)
+	tokens = text[eol+1:].split() if eol >= 0 else []
+	try:
+		if len(tokens) % 2:
+			raise ValueError('odd number of fields')
+		dates = np.array(tokens[0::2], dtype='datetime64[D]')
+		values = np.array(tokens[1::2])
+		values[values == '.'] = 'nan'
+		values = values.astype(float)
+	except ValueError:
+		series = ReadFRED(path)
+		dates = np.array(series.dates, dtype='datetime64[D]')
+		values = np.array(series.data, dtype=float)
+	return dates, values, parse_fred_header(header)
+
 class Sample:
 	"""A 'sample' (i.e., date range) class for tseries.series objects.
+	A sample is represented by the integer period ordinals
+	`start_ord` and `end_ord` (see `date2ordinal`),
+	so that lengths, index lookup, intersection, and alignment
+	are integer arithmetic.
+	Dates are generated only on request (as a read-only datetime64 array,
+	shared by all samples with the same periods).
 
 	:note: each observation is dated to first day of its period
 	"""
 	def __init__(self, start, end, freq=None, dates=None, condition=None):
 		self.freq = freq2num(freq)
-		if freq:
+		if self.freq:
 			#get *beginning* of period in which `start` falls
 			self.start = date2bop(start, freq)
 			#get *beginning* of period in which `end` falls
 			self.end = date2bop(end, freq)
-			self._dates = dates
-			self.condition = condition
 		else:
 			self.start, self.end = int(start), int(end)
-			self._dates = dates or list(range(start,end+1))
-			self.condition = condition
-		logging.info("Class Sample: "+str(self))
-		logging.info("Class Sample: freq = "+str(freq))
+		self.start_ord = date2ordinal(self.start, self.freq)
+		self.end_ord = date2ordinal(self.end, self.freq)
+		self._dates = dates
+		self.condition = condition
+		logging.info("Class Sample: %s (freq = %s)", self, freq)
+	@classmethod
+	def from_ordinals(cls, start_ord, end_ord, freq=None):
+		"""Return Sample, from the period ordinals of its first and last periods."""
+		freq = freq2num(freq)
+		smpl = cls.__new__(cls)
+		smpl.freq = freq
+		smpl.start_ord, smpl.end_ord = int(start_ord), int(end_ord)
+		smpl.start = ordinal2date(start_ord, freq)
+		smpl.end = ordinal2date(end_ord, freq)
+		smpl._dates = None
+		smpl.condition = None
+		return smpl
 	def __str__(self):
 		return str(self.start)+' to '+str(self.end)
 	#define equality comparison
 	def __eq__(self, smpl):
-		return (self.start == smpl.start)and(self.end==smpl.end)and(self.freq==smpl.freq)
+		if not isinstance(smpl, Sample):
+			return NotImplemented
+		return (self.start_ord == smpl.start_ord)and(self.end_ord==smpl.end_ord)and(self.freq==smpl.freq)
 	def __ne__(self, smpl):
-		return (self.start != smpl.start)or(self.end!=smpl.end)or(self.freq!=smpl.freq)
+		result = self.__eq__(smpl)
+		return result if result is NotImplemented else not result
+	def __hash__(self):
+		return hash((self.start_ord, self.end_ord, self.freq))
 	def __len__(self):
-		return len(self.dates)
+		return max(0, self.end_ord - self.start_ord + 1)
 	def copy(self):
-		return Sample(self.start,self.end,self.freq,self.condition)
+		smpl = Sample.from_ordinals(self.start_ord, self.end_ord, self.freq)
+		smpl._dates = self._dates  #share any generated dates
+		smpl.condition = self.condition
+		return smpl
 	def set_start(self,dt):
-		self.start = date2bop(dt,freq)
+		self.start = date2bop(dt,self.freq) if self.freq else int(dt)
+		self.start_ord = date2ordinal(self.start, self.freq)
+		self._dates = None
 	def set_end(self,dt):
-		self.end = date2bop(dt,freq)  #chk bop?
+		self.end = date2bop(dt,self.freq) if self.freq else int(dt)
+		self.end_ord = date2ordinal(self.end, self.freq)
+		self._dates = None
 	def get_rrule(self):
 		"""Convert sample `smpl` dates to rrule.  """
 		if self.freq == 12:
@@ -520,36 +924,54 @@ class Sample:
 			return matplotlib.dates.rrule(MONTHLY,interval=3,dtstart=self.start,until=self.end)
 		elif self.freq == 1:
 			return matplotlib.dates.rrule(YEARLY,dtstart=self.start,until=self.end)
+		elif self.freq == 365:
+			return matplotlib.dates.rrule(DAILY,dtstart=self.start,until=self.end)
 		else:
 			raise ValueError('class Sample: unknown frequency')
 	def get_date_index(self,dt):
-		assert isinstance(dt,datetime.date), "class Sample: Requires datetime.date instance as argument."
-		if self.dates is None:
-			self.set_dates()
-		assert self.dates[0]<=dt<=self.dates[-1], "class Sample: %s outside sample."%(dt)
-		#logging.info("Sample: dates = "+str(self.dates))
-		logging.debug("Class Sample: seeking index for dt = "+str(dt))
-		try:
-			date_idx = self.dates.index(dt)
-		except ValueError:
-			new_dt = date2bop(dt,self.freq)
-			logging.warning("Sample: "+str(dt)+ "within sample but not in dates. Seeking "+str(new_dt)+" instead.")
-		return self.dates.index(dt)
-	def intersect(self,smpl):
-		assert (self.freq == smpl.freq), "Cannot intersect samples of different frequency."
-		start = max(self.start,smpl.start)
-		end = min(self.end,smpl.end)
+		"""Return int, the index in the sample of the period in which `dt` falls."""
+		if self.freq:
+			assert isinstance(dt,datetime.date), "class Sample: Requires datetime.date instance as argument."
+		idx = date2ordinal(dt, self.freq) - self.start_ord
+		if not 0 <= idx < len(self):
+			raise ValueError("class Sample: %s outside sample."%(dt,))
+		return idx
+	def index_slice(self, smpl):
+		"""Return slice, the observations of `self` that lie in `smpl`
+		(which must be a subsample of the same frequency).
+		"""
+		assert (self.freq == smpl.freq), "Cannot align samples of different frequency."
+		start = smpl.start_ord - self.start_ord
+		stop = smpl.end_ord - self.start_ord + 1
+		if start < 0 or stop > len(self):
+			raise ValueError("class Sample: %s not within %s."%(smpl, self))
+		return slice(start, stop)
+	def intersect(self, *smpls):
+		"""Return Sample, the periods common to `self` and all `smpls`
+		(or None if there are none).
+		"""
+		for smpl in smpls:
+			assert (self.freq == smpl.freq), "Cannot intersect samples of different frequency."
+		start = max([self.start_ord] + [smpl.start_ord for smpl in smpls])
+		end = min([self.end_ord] + [smpl.end_ord for smpl in smpls])
 		if start > end:
 			logging.warning("class Sample: empty intersection.")
 			return None
 		else:
-			return Sample(start,end,self.freq)
+			return Sample.from_ordinals(start, end, self.freq)
 	def get_dates(self):
 		logging.warn('Deprecated method get_dates; use the dates property')
 		return self.dates
 	def set_dates(self,dates=None):  #TODO: use for date checking of supplied dates
 		if dates is None:
-			self._dates =  [xi.date() for xi in self.get_rrule()]
+			dates = self.datearray.tolist()
+		self._dates = dates
+	@property
+	def datearray(self):
+		"""Return read-only datetime64[D] array of the period start dates
+		(an int array for undated samples).
+		"""
+		return _date_array(self.start_ord, self.end_ord, self.freq)
 	@property
 	def dates(self):
 		"""Return list of datetime.date objects corresponding to sample."""
@@ -557,18 +979,245 @@ class Sample:
 			self.set_dates()
 		return self._dates
 
+def align(*smpls):
+	"""Return tuple, (common, slices):
+	the intersection of the samples `smpls`, and for each sample
+	the slice of its observations that lie in the common sample.
+	"""
+	common = smpls[0].intersect(*smpls[1:])
+	if common is None:
+		return None, [slice(0, 0) for smpl in smpls]
+	return common, [smpl.index_slice(common) for smpl in smpls]
+
+@functools.lru_cache(maxsize=256)
+def _date_array(start_ord, end_ord, freq):
+	n = end_ord - start_ord + 1
+	if freq is None:
+		result = np.arange(start_ord, end_ord + 1)
+	elif freq == 365:
+		result = np.datetime64(datetime.date.fromordinal(start_ord), 'D') + np.arange(n)
+	else:
+		step = 12//freq
+		months = (start_ord + np.arange(n))*step - 1970*12
+		result = months.astype('datetime64[M]').astype('datetime64[D]')
+	result.flags.writeable = False
+	return result
+
 
 def freq2num(freq):
-	if freq in (1,4,12,52) or freq is None:
+	if freq in (1,4,12,52,365) or freq is None:
 		result = freq
 	elif isinstance(freq, str):
 		key = freq[0].upper()
 		try:
-			result = dict(A=1,Q=4,M=12,W=52,U=None)[key]
+			result = dict(A=1,Q=4,M=12,W=52,D=365,U=None)[key]
 		except KeyError:
 			raise ValueError('Unsupported frequency: %s'%(freq))
 	return result
 
+def iter_cols(source='stdin', columns=None, chunksize=2**16, comments='#', delimiter=None,
+		names=False, dtype=float, skiprows=0, blocksize=2**22):
+	"""Return generator of 2d arrays, the selected columns of
+	a text file, in blocks of `chunksize` rows (the last may be shorter).
+	The file is read in raw blocks of about `blocksize` bytes,
+	each parsed in bulk (with `numpy.loadtxt`),
+	so memory use does not grow with the file size.
+
+	:Parameters:
+		`source` : str, file, or buffer
+			file name, 'stdin', an open file (text or binary),
+			or a buffer such as bytes or an `mmap.mmap` of a file
+		`columns` : sequence of int or str
+			column numbers (1-based) or names (default: all columns)
+		`chunksize` : int
+			number of rows per block
+		`comments` : str
+			comment marker; the rest of a line after it is ignored
+		`delimiter` : str
+			column delimiter (default: white space)
+		`names` : bool
+			if True, the first (non-comment) line holds the column names
+		`dtype` : data type
+			type of the returned arrays
+		`skiprows` : int
+			number of lines to skip at the start of the file
+		`blocksize` : int
+			approximate number of bytes to read at a time
+	:see: `col2list`, `cols2tuples`, `readcol`, `ColumnWriter`
+	"""
+	if columns is not None and (isinstance(columns, (int, str))):
+		columns = [columns]
+	if not names and columns is not None and any(isinstance(col, str) for col in columns):
+		raise ValueError('iter_cols: column names require names=True')
+	blocks = _iter_lineblocks(source, blocksize)
+	#skip rows and get the header
+	block = b''
+	header = None
+	while skiprows or (names and header is None):
+		if not block:
+			block = next(blocks, None)
+			if block is None:
+				return
+			continue
+		eol = block.find(b'\n')
+		line, block = (block, b'') if eol < 0 else (block[:eol], block[eol+1:])
+		if skiprows:
+			skiprows -= 1
+			continue
+		line = line.decode('utf-8')
+		if comments:
+			line = line.split(comments, 1)[0]
+		if line.strip():
+			header = [name.strip() for name in line.split(delimiter)]
+	usecols = None
+	if columns is not None:
+		missing = [col for col in columns if isinstance(col, str) and col not in header]
+		if missing:
+			raise ValueError('iter_cols: no columns named %s'%(missing,))
+		usecols = [header.index(col) if isinstance(col, str) else col - 1 for col in columns]
+	pending, npending = [], 0
+	for block in itertools.chain([block], blocks):
+		if not block:
+			continue
+		with warnings.catch_warnings():
+			warnings.simplefilter('ignore')  #blocks of comments only are empty
+			arr = np.loadtxt(io.BytesIO(block), dtype=dtype, comments=comments,
+				delimiter=delimiter, usecols=usecols, ndmin=2)
+		if not len(arr):
+			continue
+		pending.append(arr)
+		npending += len(arr)
+		while npending >= chunksize:
+			arr = np.concatenate(pending) if len(pending) > 1 else pending[0]
+			yield arr[:chunksize]
+			pending, npending = ([arr[chunksize:]], npending - chunksize)
+	if npending:
+		yield np.concatenate(pending)
+
+def _iter_lineblocks(source, blocksize):
+	"""Return generator of bytes, the contents of `source`
+	in blocks of whole lines (see `iter_cols`).
+	"""
+	if not isinstance(source, str) and hasattr(source, 'rfind'):
+		#a buffer (bytes, mmap.mmap, ...): slice it
+		size = len(source)
+		start = 0
+		while start < size:
+			stop = min(start + blocksize, size)
+			if stop < size:
+				eol = source.rfind(b'\n', start, stop)
+				if eol < 0:  #a line longer than blocksize
+					eol = source.find(b'\n', stop)
+				stop = size if eol < 0 else eol + 1
+			yield bytes(source[start:stop])
+			start = stop
+		return
+	if source == 'stdin':
+		fh, opened = sys.stdin, None
+	elif isinstance(source, (str, os.PathLike)):
+		fh = opened = open(source, 'rb')
+	else:
+		fh, opened = source, None
+	try:
+		rest = b''
+		while True:
+			block = fh.read(blocksize)
+			if not block:
+				break
+			if isinstance(block, str):
+				block = block.encode('utf-8')
+			block = rest + block
+			eol = block.rfind(b'\n')
+			if eol < 0:
+				rest = block
+				continue
+			rest = block[eol+1:]
+			yield block[:eol+1]
+		if rest:
+			yield rest
+	finally:
+		if opened is not None:
+			opened.close()
+
+class ColumnWriter(object):
+	"""Buffered writer of columns of numbers.
+	Each `write` takes a 1d array (one number per line)
+	or a 2d array (one row per line); output is collected
+	and written in blocks of about `buffersize` characters.
+	Use as a context manager, or call `close`.
+	Example use::
+
+		with ColumnWriter('out.txt') as writer:
+			for block in iter_cols('in.txt', columns=(1,3)):
+				writer.write(block)
+
+	:see: `iter_cols`
+	"""
+	def __init__(self, outfile='', fmt=None, delimiter=' ', newline='\n', buffersize=2**20):
+		"""
+		:Parameters:
+			`outfile` : str or file
+				file name or open (text) file (default: stdout)
+			`fmt` : str
+				format for each number (default: `str`)
+			`delimiter` : str
+				column separator
+			`newline` : str
+				line terminator
+			`buffersize` : int
+				number of characters to collect before writing
+		"""
+		if not outfile:
+			self.fh, self._opened = sys.stdout, False
+		elif isinstance(outfile, (str, os.PathLike)):
+			self.fh, self._opened = open(outfile, 'w'), True
+		else:
+			self.fh, self._opened = outfile, False
+		self.fmt = fmt
+		self.delimiter = delimiter
+		self.newline = newline
+		self.buffersize = buffersize
+		self._buffer = []
+		self._nbuffered = 0
+	def write(self, block):
+		"""Return None. Write the 1d or 2d array (or sequence) `block`."""
+		if isinstance(block, np.ndarray):
+			rows = block.tolist()
+		else:
+			rows = list(block)
+		if not rows:
+			return
+		if isinstance(rows[0], (list, tuple)):
+			if self.fmt:
+				rowfmt = self.delimiter.join([self.fmt]*len(rows[0])) + self.newline
+				text = (rowfmt*len(rows)) % tuple(itertools.chain.from_iterable(rows))
+			else:
+				text = ''.join(self.delimiter.join(map(str, row)) + self.newline for row in rows)
+		else:
+			if self.fmt:
+				text = ((self.fmt + self.newline)*len(rows)) % tuple(rows)
+			else:
+				text = self.newline.join(map(str, rows)) + self.newline
+		self._buffer.append(text)
+		self._nbuffered += len(text)
+		if self._nbuffered >= self.buffersize:
+			self.flush()
+	def flush(self):
+		"""Return None. Write any buffered output."""
+		if self._buffer:
+			self.fh.write(''.join(self._buffer))
+			self._buffer, self._nbuffered = [], 0
+		self.fh.flush()
+	def close(self):
+		"""Return None. Flush, and close the file if opened by the writer."""
+		self.flush()
+		if self._opened:
+			self.fh.close()
+	def __enter__(self):
+		return self
+	def __exit__(self, *exc_info):
+		self.close()
+
 def col2list(fname='stdin',colnum=1,commentchar='#'):
 	"""Read vector from stdin (keyboard) or file.  
 	Read 1 number per line from stdin or from 'file' if specified.
@@ -585,19 +1234,16 @@ def col2list(fname='stdin',colnum=1,commentchar='#'):
 	:rtype: list
 	:note: White space is stripped.
 		Blank lines are ignored.
-	:requires: import sys
 	:see: `cols2lists`
+	:see: `iter_cols` (to read large files in blocks)
 	:see: getv http://www.phys.uu.nl/~haque/computing/WPark_recipes_in_python.html
 	:author: Alan G. Isaac
 	:since: 2005-08-19
 	"""
-	if fname == 'stdin':
-		fp = sys.stdin
-	else:
-		fp = open(fname,'r')
-	return [float(a.split()[colnum-1])
-	        for a in fp
-	        if (a.strip() and not a[0].startswith(commentchar))]
+	result = []
+	for block in iter_cols(fname, columns=[colnum], comments=commentchar):
+		result.extend(block[:,0].tolist())
+	return result
 
 
 def cols2tuples(fname='stdin', colnum=(1,2), commentchar='#'):
@@ -621,23 +1267,16 @@ def cols2tuples(fname='stdin', colnum=(1,2), commentchar='#'):
 		where each tuple contains a vector
 	:note: White space is stripped.
 		Blank lines are ignored.
-	:requires: import sys
 	:see: `col2list`
+	:see: `iter_cols` (to read large files in blocks)
 	:see: getv2 http://www.phys.uu.nl/~haque/computing/WPark_recipes_in_python.html
 	:author: Alan G. Isaac
 	:since: 2005-08-19
 	"""
-	x = []
-	if fname == 'stdin':
-		fp = sys.stdin
-	else:
-		fp = open(fname,'r')
-	for a in fp:
-		#skip blank and commented lines
-		if (a and not a.startswith(commentchar)):
-			a=a.split()
-			x.append([float(a[cn-1]) for cn in colnum])
-	return zip(*x)
+	blocks = list(iter_cols(fname, columns=colnum, comments=commentchar))
+	if not blocks:
+		return [() for cn in colnum]
+	return [tuple(col) for col in np.concatenate(blocks).T.tolist()]
 
 
 def printv(x, outfile='', sep='\n'):
@@ -647,22 +1286,14 @@ def printv(x, outfile='', sep='\n'):
 	Write to stdout or 'outfile' if specified.
 
 	:param `x`: list of numbers
+	:see: `ColumnWriter` (to write large data in blocks)
 	"""
-	import sys
 	out = sep.join(str(xi) for xi in x)
 	if not outfile:
 		sys.stdout.write(out)
 	else:
-		open(outfile, 'w').write(out)
-
-
-
-
-
-
-
-
-
+		with open(outfile, 'w') as fh:
+			fh.write(out)
 
 
 def readcol(fname,comments='%',columns=None,delimiter=None,dep=0,arraytype='list'):
@@ -692,9 +1323,6 @@ the default is the matlab character '%'.
 				have: numeric array (numeric) or character array 
 				(numstring) or list (list). By default it's the list mode used 
 
-				matfile data is not currently supported, but see
-				Nigel Wade's matfile ftp://ion.le.ac.uk/matfile/matfile.tar.gz
-
 	Example usage::
 
 		x,y = transpose(readcol('test.dat'))  # data in two columns
@@ -704,59 +1332,15 @@ the default is the matlab character '%'.
 
 	:author: Hu Mufr
 	:comment: initial function from pylab, improve by myself for my need 
+	:see: `iter_cols` (to read large files in blocks)
 	"""
-	from numarray import array,transpose
-
-	fh = file(fname)
-
-	X = []
-	numCols = None
-	nline = 0
-	if columns is None:
-		for line in fh:
-			nline += 1
-			if dep is not None and nline <= dep: continue
-			line = line[:line.find(comments)].strip()
-			if not len(line): continue
-			if arraytype=='numeric':
-				row = [float(val) for val in line.split(delimiter)]
-			else:
-				row = [val.strip() for val in line.split(delimiter)]
-			thisLen = len(row)
-			if numCols is not None and thisLen != numCols:
-				raise ValueError('All rows must have the same number of columns')
-			X.append(row)
-	else:
-		for line in fh:
-			nline +=1
-			if dep is not None and nline <= dep: continue
-			line = line[:line.find(comments)].strip()
-			if not len(line): continue
-			row = line.split(delimiter)
-			if arraytype=='numeric':
-				row = [float(row[i-1]) for i in columns]
-			elif arraytype=='numstring':
-				row = [row[i-1].strip() for i in columns]
-			else:
-				row = [row[i-1].strip() for i in columns]
-		thisLen = len(row)
-	
-		if numCols is not None and thisLen != numCols:
-			raise ValueError('All rows must have the same number of columns')
-		X.append(row)
-
-	if arraytype=='numeric':
-		X = array(X)
-		r,c = X.shape
-		if r==1 or c==1:
-			X.shape = max([r,c]),
-	elif arraytype == 'numstring':
-		import numarray.strings			# pb si numeric+pylab
-		X = numarray.strings.array(X)
-		r,c = X.shape
-		if r==1 or c==1:
-			X.shape = max([r,c]),
-		
+	dtype = float if arraytype=='numeric' else str
+	blocks = list(iter_cols(fname, columns=columns, comments=comments,
+		delimiter=delimiter, dtype=dtype, skiprows=dep or 0))
+	X = np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=dtype)
+	if arraytype=='list':
+		return X.tolist()
+	r,c = X.shape
+	if r==1 or c==1:
+		X.shape = max([r,c]),
 	return X
-
-
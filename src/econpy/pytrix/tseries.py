@@ -21,6 +21,7 @@ logging.getLogger().setLevel(logging.WARN) #sets root logger level
 #(after Python 2.4 can use basicConfig)
 import math
 import itertools
+import functools
 import matplotlib
 matplotlib.use('TkAgg')
 import pylab
@@ -30,12 +31,13 @@ import tkinter as Tk
 
 #package imports
 from .pytrix import Vector, Vplus   #`Series` subclasses `Vector`
-from .pytrixIO import freq2num, Sample, fetch, write_db
+from .pytrixIO import freq2num, Sample, fetch, write_db, add_periods, date2ordinal, ordinal2date
 from .stat import Dstat1
 
 try:
 	import numpy as np
 	from numpy import linalg
+	from numpy.lib.stride_tricks import sliding_window_view
 except ImportError:
 	logging.error("numpy required for this module")
 	raise
@@ -104,25 +106,32 @@ class coef(Vector):
 class Series(Vplus):
 	"""Basic class for fixed frequency time series.
 	(Subclasses pytrix.vplus which subclasses pytrix.vector.)
+	The data are held in a 1d float64 array.
+	Dates are not stored but are computed from the sample start,
+	the frequency, and the observation index,
+	so that lags, leads, and slices are views of the data.
 
 	:todo: rethink full and current smpl
 	"""
 	def __init__(self, data, smpl=None, comments=None, **kwds):
 		logging.debug("\n\tEntering Series.__init__.")
 		self.result_class = Series  #override vplus
-		self.data = list(data)
-		self.nobs = len(data)
+		self.data = np.asarray(data, dtype=float)  #no copy if already a float64 array
+		if self.data.ndim != 1:
+			raise ValueError('class Series: data must be 1d')
+		self.nobs = len(self.data)
 		self.comments = comments or dict()
 		if 'length' in kwds:
 			assert(self.nobs==kwds['length']),"Data length does not match provided length"
 		if smpl is None:
 			self.smpl_full = (1,self.nobs)
 		elif isinstance(smpl,tuple):
-			assert(self.nobs==1+self.smpl_full[1]-self.smpl_full[0]), "Number of obs does not match sample."
+			assert(self.nobs==1+smpl[1]-smpl[0]), "Number of obs does not match sample."
 			self.smpl_full = smpl
 		elif isinstance(smpl, Sample):
-			assert len(data)==len(smpl.dates), "Number of obs does not match sample."
-			self.smpl_full = smpl.copy()
+			#date arithmetic, so the sample's dates need not be generated
+			assert self.nobs==len(smpl), "Number of obs does not match sample."
+			self.smpl_full = smpl  #samples are shared, not copied
 		else:
 			raise TypeError('class Series: %s is an unrecognized smpl type.'%smpl)
 		#self.label = label             #TODO: add label object?
@@ -133,13 +142,69 @@ class Series(Vplus):
 		return "series:\n"+str(self.data)
 	def __getitem__(self, item):  #http://www.python.org/doc/2.3.4/whatsnew/section-slices.html
 		return self.data.__getitem__(item)
+	def _subsmpl(self, offset, nobs):
+		"""Return sample (tuple or Sample) for `nobs` observations,
+		starting `offset` observations into the full sample.
 		"""
-		if isinstance(item, slice):
-			indices = item.indices(len(self.data))  #TODO: shd this interact w sample??
-			return [self.calc_item(i) for i in range(*indices)]  #TODO:return list or series (w appropriate sample)??
+		smpl = self.smpl_full
+		if isinstance(smpl, tuple):
+			start = smpl[0] + offset
+			return (start, start + nobs - 1)
+		start = smpl.start_ord + offset
+		return Sample.from_ordinals(start, start + nobs - 1, smpl.freq)
+	def _result(self, data):
+		"""Return Series, with the data `data` and the sample of `self`."""
+		return Series(data, smpl=self.smpl_full)
+	def _operand(self, other):
+		if isinstance(other, Vector):
+			self.require_samecore(other)
+			return np.asarray(other.data)
+		return other
+	def __add__(self, other):
+		return self._result(self.data + self._operand(other))
+	__radd__ = __add__
+	def __sub__(self, other):
+		return self._result(self.data - self._operand(other))
+	def __rsub__(self, other):
+		return self._result(self._operand(other) - self.data)
+	def __mul__(self, other):
+		return self._result(self.data * self._operand(other))
+	__rmul__ = __mul__
+	def __truediv__(self, other):
+		return self._result(self.data / self._operand(other))
+	def __rtruediv__(self, other):
+		return self._result(self._operand(other) / self.data)
+	def __pow__(self, expon):
+		return self._result(self.data ** self._operand(expon))
+	def __neg__(self):
+		return self._result(-self.data)
+	def __abs__(self):
+		return self._result(np.abs(self.data))
+	def __eq__(self, other):
+		try:
+			self.require_samecore(other)
+		except TypeError:  #not conformable
+			return False
+		return bool(np.array_equal(self.data, other.data))
+	__hash__ = None
+	def date(self, idx):
+		"""Return date (or, for undated series, int) of observation `idx`."""
+		if idx < 0:
+			idx += self.nobs
+		smpl = self.smpl_full
+		if isinstance(smpl, tuple):
+			return smpl[0] + idx
+		return ordinal2date(smpl.start_ord + idx, smpl.freq)
+	def date_index(self, dt):
+		"""Return int, index of the observation for date `dt`."""
+		smpl = self.smpl_full
+		if isinstance(smpl, tuple):
+			idx = dt - smpl[0]
 		else:
-			return self.calc_item(item)
-		"""
+			idx = date2ordinal(dt, smpl.freq) - smpl.start_ord
+		if not 0 <= idx < self.nobs:
+			raise ValueError('class Series: %s outside sample.'%(dt,))
+		return idx
 	def stat(self):
 		# for comparable functionality see http://aspn.activestate.com/ASPN/Cookbook/Python/Recipe/409413
 		if not self.dstat:
@@ -161,47 +226,44 @@ class Series(Vplus):
 	#TODO: shd we use __call__ for shifting?
 	#see: http://docs.python.org/ref/callable-types.html
 	def shift(self, offset):
-		"""Return lead or lag of series: x.shift(n) = F^n x
+		"""Return lead or lag of series: x.shift(n) = F^n x.
+		The data of the result is a view of the data of `self`.
 		"""
 		assert(isinstance(offset,int))
 		if offset < 0: #lag series
-			new_data = self.data[0:offset]
-			new_dates = self.smpl_full.dates[-offset:]
+			return Series(self.data[:offset], smpl=self._subsmpl(-offset, self.nobs+offset))
 		if offset > 0: #lead series
-			new_data = self.data[offset:]
-			new_dates = self.smpl_full.dates[:-offset]
-		if offset == 0:
-			return self.copy()
-		else:
-			return series(new_data,Sample(new_dates[0],new_dates[-1],freq=self.smpl_full.freq,dates=new_dates))
+			return Series(self.data[offset:], smpl=self._subsmpl(0, self.nobs-offset))
+		return Series(self.data, smpl=self.smpl_full)
+	def lag(self, k=1):
+		"""Return L^k x (a view; see `shift`)."""
+		return self.shift(-k)
 	def d(self, n=1, s=0):
 		"""Return (1-L)^n(1-L^s)x."""
 		assert(s==int(s) and n==int(n)), "Fractional differences not supported."
 		assert(s >= 0 and n >=0), "Postive differences required"	#TODO
-		dnsx = self[:]
+		dnsx = self.data
 		if s>0:
-			dnsx = [dnsx[i]-dnsx[i-s] for i in range(s,len(dnsx))]
+			dnsx = dnsx[s:] - dnsx[:-s]
 		if n>0:
-			for idx in range(n):
-				dnsx = [dnsx[xi]-dnsx[xi-1] for xi in range(1,len(dnsx))]
-		logging.info('series.d(): Full sample of series: '+str(self.smpl_full))
-		if isinstance(self.smpl_full,tuple):
-			dsmpl = (self.smpl_full[0]+n+s,self.smpl_full[1]) 
-			logging.debug('series.d(): Modified tuple: '+str(dsmpl))
-		else:
-			old_dates = self.smpl_full.dates
-			dsmpl = Sample(old_dates[n+s],
-							  old_dates[-1],
-							  freq=self.smpl_full.freq)
-			logging.debug('series.d(): Modified sample: '+str(dsmpl))
+			dnsx = np.diff(dnsx, n)
+		dsmpl = self._subsmpl(n+s, len(dnsx))
 		logging.debug("series.d(): n=%i,s=%i,dsmpl=%s"%(n,s,dsmpl))
-		return series(dnsx,smpl=dsmpl)
-	def transform(self, fn):
-		if isinstance(self.smpl_full,Sample):
-			smpl_copy=self.smpl_full.copy()
-		else:
-			smpl_copy=self.smpl_full
-		return series([fn(xi) for xi in self],smpl=smpl_copy)
+		return Series(dnsx,smpl=dsmpl)
+	def transform(self, fn, vectorized=False):
+		"""Return Series, `fn` applied to each observation.
+		A NumPy ufunc is applied to the whole data array,
+		as is any `fn` when `vectorized` is True
+		(so `fn` must then map arrays to arrays of the same shape);
+		other functions are applied element by element.
+		"""
+		if isinstance(fn, np.ufunc) or vectorized:
+			result = np.asarray(fn(self.data), dtype=float)
+			if result.shape != self.data.shape:
+				raise ValueError('class Series: vectorized transform changed the shape of the data')
+			return self._result(result)
+		result = np.fromiter((fn(xi) for xi in self.data.tolist()), dtype=float, count=self.nobs)
+		return self._result(result)
 	def detrend_linear(self, zeroperiod=0): #TODO allow normalization to different date
 		#wd it be worth doing it directly, e.g. TODO
 		if have_scipy:
@@ -214,72 +276,60 @@ class Series(Vplus):
 		X = zip(intercept,trend)
 		return OLS(self.data,X).resids   #from ls.py
 	def tolist(self, copy=True):
-		"""Return series data, possibly subsampled.
-
+		"""Return series data as a list,
+		or (if `copy` is False) the data array itself.
 		"""
 		logging.debug("Enter Series.tolist.")
 		if copy:
-			data = list(self.data)
+			data = self.data.tolist()
 		else:
 			data = self.data
 		return data
 	def write2databank(self, file_name):
 		write_db(file_name=file_name, data=self.tolist(), smpl=self.smpl_full, comments=self.comments)
-	def subsample(self, smpl=None, freq=None):
-		"""Return list of series data, possibly subsampled.
+	def subsample(self, smpl=None, freq=None, how='first', drop_partial=False):
+		"""Return Series, possibly subsampled
+		and possibly converted to a lower frequency.
 
 		:note: freq overrides smpl.freq
-		:note: currently tolist already returns a list; see get_item in vector class
-		:todo: frequency conversion  NEEDS MUCH WORK!!!
+		:note: a tuple `smpl` is (start index, end index), inclusive;
+		       the bounds of a Sample are located by date arithmetic (see `date_index`)
+		:see: `convert_freq` for `how` and `drop_partial`
 		"""
 		logging.info("Enter Series.subsample.")
-		data = self.tolist(copy=True)
+		data = self.data
 		full = self.smpl_full
+		start = self.date(0)
 		if smpl is not None:
-			assert (isinstance(self.smpl_full,Sample) and isinstance(smpl,Sample))
-			assert (smpl.start >= self.smpl_full.start)and(smpl.end <= self.smpl_full.end)
-			logging.debug("\n\tSubsample based on smpl.")
-			#we do NOT (!) change frequency at this point
 			if isinstance(smpl, tuple):
-				logging.warn('using tuple')
-				idx_start = smpl[0]
-				idx_end = smpl[1]
+				idx_start, idx_end = smpl
+				if not 0 <= idx_start <= idx_end < self.nobs:
+					raise ValueError('class Series: %s is not a valid index range.'%(smpl,))
 			elif isinstance(smpl, Sample):
-				logging.warn('using Sample')
-				idx_start = full.get_date_index(smpl.start)
-				idx_end = full.get_date_index(smpl.end)
+				idx_start = self.date_index(smpl.start)
+				idx_end = self.date_index(smpl.end)
 			else:
 				raise ValueError('smpl must be tuple or sample instance')
 			data = data[idx_start:idx_end+1]
+			start = self.date(idx_start)
+		if isinstance(full, tuple):
+			if freq is not None:
+				raise ValueError('undated series do not support frequency conversion')
+			return Series(data=data, smpl=(start, start+len(data)-1), comments=self.comments)
+		oldfreq = full.freq
+		if freq is not None:
+			newfreq = freq2num(freq)
+		elif isinstance(smpl, Sample) and smpl.freq:
+			newfreq = smpl.freq
 		else:
-			logging.info('smpl is None')
-		newfreq = freq2num(freq or smpl.freq)
-		if smpl and (smpl.freq != newfreq):
-			msg = """Frequency of %s
-			does not match smpl frequency of %s"%(newfreq,smpl.freq)).
-			Adjusting smpl frequency."""
-			logging.warn(msg)
-			smpl = Sample(smpl.start, smpl.end, freq=newfreq)
-		oldfreq = full.freq 
+			newfreq = oldfreq
 		if newfreq != oldfreq:
-			old2new = {
-				(4,1) : slice(0, len(data), 4),
-				(12,1) : slice(0, len(data), 12),
-				}
 			logging.debug("Frequency conversion required.")
-			try:
-				myslice = old2new[(oldfreq, newfreq)]
-			except KeyError:
-				raise NotImplementedError('Unsupported frequency conversion.')
-			data = data[myslice]
-		else:
-			myslice = slice(0, len(data), 1)
-		if smpl is None:  #construct a sample for dated series
-			if isinstance(self.smpl_full,Sample):
-				dates = self.smpl_full.dates[myslice]
-				start, end = dates[0], dates[-1]
-				smpl = Sample(start=start, end=end, freq=freq, dates=dates)
-		return Series(data=data, smpl=smpl, comments=self.comments)
+			data, start = convert_freq(data, start, oldfreq, newfreq, how=how, drop_partial=drop_partial)
+			if start is None:  #every target period was partial
+				raise ValueError('class Series: no complete periods of frequency %d in sample.'%newfreq)
+		end = add_periods(start, len(data)-1, newfreq)
+		return Series(data=data, smpl=Sample(start, end, freq=newfreq), comments=self.comments)
 	def plot(self, plottype='line', smpl=None):
 		if not smpl:
 			dates = self.smpl_full.dates
@@ -287,17 +337,10 @@ class Series(Vplus):
 		else:
 			# specified sample may be outside data range: compensate
 			#TODO: fix for undated data
-			smpl_sub = Sample(max(smpl.start,self.smpl_full.start),
-			                  min(smpl.end,self.smpl_full.end),
-			                  self.smpl_full.freq)
+			smpl_sub = self.smpl_full.intersect(smpl)
 			dates = smpl_sub.dates
-			# make list of dates for full sample (from its rrule)
-			temp = self.smpl_full.dates
-			# get the index for the start & end dates of the subsample
-			idx_start = temp.index(dates[0])
-			idx_end = temp.index(dates[-1])
-			# get the data corresponding to the subsample
-			data = self.data[idx_start:idx_end+1]
+			# get the data corresponding to the subsample (by date arithmetic)
+			data = self.data[self.smpl_full.index_slice(smpl_sub)]
 		fig = matplotlib.figure.Figure(figsize=(5,4))
 		ax = fig.add_subplot(111)
 		if plottype == 'line':
@@ -308,9 +351,83 @@ class Series(Vplus):
 		#pylab.plot(range(len(self.data)),self.data,'r-')
 		#pylab.show()
 
+_aggregators = dict(
+	sum = np.add.reduceat,
+	max = np.maximum.reduceat,
+	min = np.minimum.reduceat,
+	)
+
+def convert_freq(data, start, freq, newfreq, how='mean', drop_partial=False):
+	"""Return tuple, (newdata, newstart),
+	the data converted to the lower frequency `newfreq`
+	and the (beginning of period) date of its first observation.
+	Each new period aggregates the observations that fall in it,
+	located by date arithmetic (no date lists are built).
+
+	:Parameters:
+		`data` : array
+			T x S array of S series (one per column), or 1d array
+		`start` : datetime.date
+			date of the first observation
+		`freq` : int or str
+			frequency of `data` (D, M, Q, or A)
+		`newfreq` : int or str
+			new (lower) frequency (M, Q, or A)
+		`how` : str
+			aggregation rule: 'first', 'last', 'mean', 'sum', 'max', or 'min'
+		`drop_partial` : bool
+			drop the first and last new periods if not fully covered by `data`
+	"""
+	freq, newfreq = freq2num(freq), freq2num(newfreq)
+	if newfreq not in (1, 4, 12) or freq not in (1, 4, 12, 365) or newfreq >= freq:
+		raise NotImplementedError('Unsupported frequency conversion.')
+	data = np.asarray(data)
+	T = len(data)
+	if not T:
+		raise ValueError('convert_freq: no observations')
+	newstep = 12//newfreq
+	#month ordinals (year*12 + month - 1) of the observations
+	if freq == 365:
+		days = np.datetime64(start, 'D') + np.arange(T)
+		months = days.astype('datetime64[M]').astype(np.int64) + 1970*12
+	else:
+		step = 12//freq
+		m0 = start.year*12 + (start.month-1)//step*step
+		months = m0 + step*np.arange(T)
+	periods = months//newstep
+	starts = np.concatenate([[0], np.flatnonzero(np.diff(periods)) + 1])
+	counts = np.diff(np.append(starts, T))
+	periods = periods[starts]  #one per new period
+	if drop_partial:
+		#expected number of observations in each new period
+		if freq == 365:
+			bounds = np.array([periods, periods + 1])*newstep - 1970*12
+			bounds = bounds.astype('datetime64[M]').astype('datetime64[D]')
+			expected = (bounds[1] - bounds[0]).astype(np.int64)
+		else:
+			expected = newstep//step
+		keep = counts == expected
+		keep[1:-1] = True  #only the end periods can be partial
+		starts, counts, periods = starts[keep], counts[keep], periods[keep]
+		if not len(starts):
+			return data[:0], None
+		data = data[:starts[-1] + counts[-1]]  #reduceat runs to the end of data
+	if how == 'first':
+		newdata = data[starts]
+	elif how == 'last':
+		newdata = data[starts + counts - 1]
+	elif how == 'mean':
+		newdata = np.add.reduceat(data, starts, axis=0) / counts.reshape((-1,) + (1,)*(data.ndim-1))
+	elif how in _aggregators:
+		newdata = _aggregators[how](data, starts, axis=0)
+	else:
+		raise ValueError('Unknown aggregation rule: %s'%(how,))
+	m = int(periods[0])*newstep
+	return newdata, datetime.date(m//12, m%12 + 1, 1)
+
 class series(Series):
-	def __init__(self):
-		Series.__init__(self)
+	def __init__(self, *args, **kwds):
+		Series.__init__(self, *args, **kwds)
 		logging.warn("\n\tWe have deprecated `series`; please use `Series`.")
 
 def show_tkagg(figure, title=''):
@@ -329,7 +446,7 @@ def show_tkagg(figure, title=''):
 
 
 		
-def varlags(xtk, lags):
+def varlags(xtk, lags, copy=False, flat=True, trim=False):
 	"""Return tuple, the data prepared for a VAR.
 	
 	Usage::
@@ -344,49 +461,144 @@ def varlags(xtk, lags):
 	                values of xtk corresponding to the values in x
 	                i.e, the appropriate rows of x(-1)~x(-2)~etc.
 
+	By default both are read-only views of `xtk` (built with
+	`sliding_window_view`), so no data is copied.
+	The flat x(-1)~x(-2) layout is a view only when K=1;
+	for K>1 it is one (preallocated) copy,
+	unless `flat` is False, in which case `xlags` is
+	the (T - lags) x lags x K view with xlags[:,i-1] = x(-i).
+
 	Parameters
 	----------
 	`xtk` :  array or list (2d: T x K)
 	   the K VAR variables in K columns, row 0 being most recent observeration
 	`lags` : int
 	   number of lags of xtk (a positive integer)
+	`copy` : bool
+	   return writable copies instead of views
+	`flat` : bool
+	   return `xlags` as 2d (the default) or as a 3d view
+	`trim` : bool
+	   first drop leading and trailing rows of `xtk` with missing (NaN) values
 
 	:author: Alan G. Isaac
 	:since: 5 Aug 2004
 	:date: 2010-06-01
 	:note: get current version from pyGAUSS.py
+	:see: `varlags_memmap`
 	"""
 	xtk = np.asarray(xtk)
 	try:
 		T, K = xtk.shape
 	except ValueError:
 		raise ValueError('Input array must be 2d')
-	xlagslst = [ xtk[lags-i:-i] for i in range(1,lags+1)]
-	xlags = np.hstack( xlagslst )
-	assert ((T-lags,K) == xtk[lags:].shape)
-	assert ((T-lags,lags*K) == xlags.shape)
-	return xtk[lags:].copy(), xlags
+	if trim:
+		ok = np.flatnonzero(~np.isnan(xtk).any(axis=1))
+		xtk = xtk[ok[0]:ok[-1]+1] if len(ok) else xtk[:0]
+		T = len(xtk)
+	if not 0 < lags < T:
+		raise ValueError('lags must be positive and less than the number of observations')
+	#windows[t,k,j] = xtk[t+j,k]; reverse j so that xlags[t,i-1,k] = xtk[t+lags-i,k]
+	windows = sliding_window_view(xtk, lags, axis=0)[:T-lags, :, ::-1]
+	xlags = windows.transpose(0, 2, 1)
+	if flat:
+		xlags = xlags.reshape(T-lags, lags*K)  #a view if possible, else one copy
+	x = xtk[lags:]
+	if copy:
+		x, xlags = x.copy(), xlags.copy()
+	else:
+		x = x.view()
+		x.flags.writeable = False
+	return x, xlags
+
+def varlags_memmap(xtk, lags, filename, chunksize=2**16):
+	"""Return tuple, (x, xlags), as for `varlags`,
+	but with `xlags` a (T - lags) x lags*K memory-mapped array
+	stored in the .npy file `filename`.
+	`xtk` (which may itself be memory mapped) is read
+	in blocks of `chunksize` rows, so memory use does not grow
+	with T or with `lags`.
+
+	:see: `varlags`
+	"""
+	T, K = np.shape(xtk)
+	if not 0 < lags < T:
+		raise ValueError('lags must be positive and less than the number of observations')
+	xlags = np.lib.format.open_memmap(filename, mode='w+',
+		dtype=np.asarray(xtk[:1]).dtype, shape=(T-lags, lags*K))
+	for start in range(0, T-lags, chunksize):
+		stop = min(start + chunksize, T - lags)
+		block = np.asarray(xtk[start:stop+lags])
+		xlags[start:stop] = varlags(block, lags)[1]
+	xlags.flush()
+	return xtk[lags:], xlags
 
 
 def hpfilter(x, penalty=1600):
 	"""Return tuple, (cycle, trend).
+	Solves the pentadiagonal system (I + penalty D'D) trend = x
+	with a banded LDL' factorization, which is O(T) in time and memory
+	and is cached by (T, penalty), so filtering many series of the
+	same length reuses one factorization.
+	Requires only numpy.
 
 	Parameters
 	----------
 	x : array-like
-		The 1d timeseries to filter.
+		The 1d timeseries to filter,
+		or a 2d (T x S) array of S series (one per column).
 	penalty : float
 		The Hodrick-Prescott smoothing parameter. A value of 1600 is
 		suggested for quarterly data. Ravn and Uhlig suggest using a value
 		of 6.25 (1600/4**4) for annual data and 129600 (1600*3**4) for monthly
 		data.
 
-	Assumes x is 1d; penalty is often called 'lambda'.
+	Penalty is often called 'lambda'.
 	"""
-	if have_sm:
-		return sm.tsa.filters.hpfilter(x, penalty)
+	x = np.asarray(x, dtype=float)
+	if x.ndim not in (1, 2):
+		raise ValueError('hpfilter: x must be 1d or 2d')
+	T = len(x)
+	if T < 3:  #no second differences to penalize
+		return np.zeros_like(x), x.copy()
+	l1, l2, d = _hp_factor(T, float(penalty))
+	if x.ndim == 1:  #Python floats beat length-1 array rows
+		z = x.tolist()
+		l1, l2, d = l1.tolist(), l2.tolist(), d.tolist()
 	else:
-		return hpfilter03(x, penalty)
+		z = np.array(x)
+	#solve L z = x (forward), then L' trend = z/d (backward), in place
+	z[1] -= l1[1]*z[0]
+	for i in range(2, T):
+		z[i] -= l1[i]*z[i-1] + l2[i]*z[i-2]
+	for i in range(T):
+		z[i] /= d[i]
+	z[T-2] -= l1[T-1]*z[T-1]
+	for i in range(T-3, -1, -1):
+		z[i] -= l1[i+1]*z[i+1] + l2[i+2]*z[i+2]
+	trend = np.asarray(z)
+	return x - trend, trend
+
+@functools.lru_cache(maxsize=32)
+def _hp_factor(T, penalty):
+	"""Return: (l1, l2, d), the banded LDL' factorization of the
+	HP matrix I + penalty D'D (D is the T-2 x T second-difference matrix).
+	Row i of the unit lower triangular L has l2[i] and l1[i] in columns i-2, i-1
+	(l1[0], l2[0], and l2[1] are unused).
+	"""
+	ones = np.ones(T-2)
+	a0 = (1 + penalty*np.convolve(ones, (1, 4, 1))).tolist()
+	a1 = [0.0] + (penalty*np.convolve(ones, (-2, -2))).tolist()  #a1[i] = A[i,i-1]
+	a2 = penalty
+	l1, l2, d = [0.0]*T, [0.0]*T, [0.0]*T
+	d[0] = a0[0]
+	l1[1] = a1[1]/d[0]
+	d[1] = a0[1] - l1[1]*l1[1]*d[0]
+	for i in range(2, T):
+		l2[i] = a2/d[i-2]
+		l1[i] = (a1[i] - l2[i]*l1[i-1]*d[i-2])/d[i-1]
+		d[i] = a0[i] - l1[i]*l1[i]*d[i-1] - l2[i]*l2[i]*d[i-2]
+	return np.array(l1), np.array(l2), np.array(d)
 
 
 '''
@@ -643,6 +855,8 @@ if __name__ == "__main__":
 		assert np.allclose(cycle0, cycle3)
 		cycle2, trend2 = hpfilter02(X, 1600)
 		assert np.allclose(cycle0, cycle2)
+		cycle, trend = hpfilter(X, 1600)
+		assert np.allclose(cycle0, cycle)
 		#cycle1, trend1 = hpfilter01(X, 1600)
 		#assert np.allclose(cycle0, cycle1)
 	"""
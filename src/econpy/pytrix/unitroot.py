@@ -7,6 +7,12 @@ Example use::
 	adf_ls(rw, 4, prt=True)
 	#print ADF results for lags up to lag=4
 	adf(rw, 4)
+	#lag selection (by AIC) for many series (the columns of an N x S array)
+	results = adf_batch(rws, 4)
+	results['constant']['tval']
+	#finite-sample critical values and p-values (simulated once, then cached)
+	adf_critvals(100, 'constant')
+	adf_batch(rws, 4, nreps=100000)['constant']['pval']
 
 :note: Based on GAUSS code by Alan G. Isaac and David Rapach.  (KPSS test missing.)
 :note: written for: Python 2.5 and SciPy
@@ -29,6 +35,7 @@ __lastmodified__ = '2007-09-10'
 import logging
 logging.basicConfig(level=logging.WARN)
 
+import os
 import numpy as np
 from .ls import OLS
 from .tseries import varlags
@@ -82,16 +89,16 @@ def adf_ls(y, p, prt=False):
 	results = dict()  #holds the three sets of regression results
 	#1. no constant
 	logging.info('noconstant')
-	results['noconstant'] =  OLS(dy, rhs, constant=None)
+	results['noconstant'] =  OLS(dy, rhs, constant=None, minimal=True)
 	#2. add constant to regressors
 	logging.info('constant')
-	results['constant'] =  OLS(dy, rhs)
+	results['constant'] =  OLS(dy, rhs, minimal=True)
 	#3. add (midpt centered) trend to regressors
 	logging.info('constant_trend')
-	results['constant_trend'] =  OLS(dy, rhs, trend=T//2)
+	results['constant_trend'] =  OLS(dy, rhs, trend=T//2, minimal=True)
 	if prt :
 		print(adf_cv1)
-		print """
+		print("""
 ADF results for %s lags
 ------------------------------------------------------------
                  ADF regression coefficients
@@ -100,43 +107,43 @@ ADF results for %s lags
               ----------------------------------
               No Constant  Constant    Trend
    RHS var    No Trend     No Trend    Constant
---------------------------------------------------""" % (p,)
+--------------------------------------------------""" % (p,))
 		ids = ('noconstant', 'constant', 'constant_trend')
 		fmt_b = "%11.3f"
 		fmt_t = "%11s"
 		#print results for lagged level
-		print 'x(-1)'.rjust(10) + " "*3,
-		print (fmt_b*3)%tuple( results[id].coefs[0] for id in ids )
-		print " "*13,
-		print (fmt_t*3)%tuple( "(%1.2f)"%(results[id].tvals[0]) for id in ids )
+		print('x(-1)'.rjust(10) + " "*3, end=' ')
+		print((fmt_b*3)%tuple( results[id].coefs[0] for id in ids ))
+		print(" "*13, end=' ')
+		print((fmt_t*3)%tuple( "(%1.2f)"%(results[id].tvals[0]) for id in ids ))
 		#print results for lagged differences
 		for i in range(1,p+1) :
-			print ('dx(-%i)'%(i,)).rjust(10) + " "*3,
-			print (fmt_b*3)%tuple( results[id].coefs[i] for id in ids )
-			print " "*13,
-			print (fmt_t*3)%tuple( "(%1.2f)"%(results[id].tvals[i]) for id in ids )
+			print(('dx(-%i)'%(i,)).rjust(10) + " "*3, end=' ')
+			print((fmt_b*3)%tuple( results[id].coefs[i] for id in ids ))
+			print(" "*13, end=' ')
+			print((fmt_t*3)%tuple( "(%1.2f)"%(results[id].tvals[i]) for id in ids ))
 		#print results for constant
-		print 'Constant'.rjust(10) + " "*(3+11),     #pad for skipping 'noconstant'
-		print (fmt_b*2)%tuple( results[id].coefs[p+1] for id in ids[1:] )
-		print " "*(10+3+11),
-		print (fmt_t*2)%tuple( "(%1.2f)"%(results[id].tvals[p+1]) for id in ids[1:] )
+		print('Constant'.rjust(10) + " "*(3+11), end=' ')     #pad for skipping 'noconstant'
+		print((fmt_b*2)%tuple( results[id].coefs[p+1] for id in ids[1:] ))
+		print(" "*(10+3+11), end=' ')
+		print((fmt_t*2)%tuple( "(%1.2f)"%(results[id].tvals[p+1]) for id in ids[1:] ))
 		#print results for trend
-		print 'Trend'.rjust(10) + " "*(3+2*11),
-		print (fmt_b)%tuple( results[id].coefs[-1] for id in ids[-1:] )
-		print " "*(10+3+2*11),
-		print (fmt_t)%tuple( "(%1.2f)"%(results[id].tvals[p+2]) for id in ids[-1:] )
+		print('Trend'.rjust(10) + " "*(3+2*11), end=' ')
+		print((fmt_b)%tuple( results[id].coefs[-1] for id in ids[-1:] ))
+		print(" "*(10+3+2*11), end=' ')
+		print((fmt_t)%tuple( "(%1.2f)"%(results[id].tvals[p+2]) for id in ids[-1:] ))
 		#print sum of squared residuals
-		print 'ESS'.rjust(10) + " "*3,
-		print (fmt_b*3)%tuple( results[id].ess for id in ids )
-		print """------------------------------------------------------------
+		print('ESS'.rjust(10) + " "*3, end=' ')
+		print((fmt_b*3)%tuple( results[id].ess for id in ids ))
+		print("""------------------------------------------------------------
 Note: trend is centered at sample midpoint.
 Note: coefficient on constant depends on trend centering.
-Note: ESS = error sum of squares (i.e., sum of squared resids)."""
+Note: ESS = error sum of squares (i.e., sum of squared resids).""")
 		#TODO: Could use SSR for Dickey Fuller (1981) Phi tests */
 	return results
 
 
-def adf(y, p):
+def adf(y, p, nreps=None):
 	"""Return: None.
 	Prints augmented Dickey-Fuller results for lags up to lag p.
 
@@ -145,6 +152,10 @@ def adf(y, p):
 			N-element sequence (the time series of interest)
 		p : scalar
 			maximum lag (autocorrelation order)
+		nreps : int or None
+			if not None, print finite-sample critical values
+			(from `adf_cvtable`, with `nreps` replications)
+			instead of the asymptotic ones
 	:requires: function `adf_ls` (provided)
 	:requires: 	function 'varlags' (imported fr tseries)
 	:requires: 	class 'OLS' (import from ls)
@@ -160,10 +171,13 @@ def adf(y, p):
 	"""
 	#local obs,i,b,ty,temp,oldcv,oldnv;
 	obs = np.shape(y)[0]
-	print adf_cv1  #table of critical values
-	print """You began with a series of %s observations, in which case
-Harris (1992) recommends using %s lags.""" % (obs,int(12*(obs/100)**(1/4)))
-	print """
+	if nreps:
+		print(adf_cv_text(obs - 1 - p, nreps))
+	else:
+		print(adf_cv1)  #table of critical values
+	print("""You began with a series of %s observations, in which case
+Harris (1992) recommends using %s lags.""" % (obs,int(12*(obs/100)**(1/4))))
+	print("""
 ------------------------------------------------------------
                ADF coef on lagged level
                        (t-ratio)
@@ -171,19 +185,298 @@ Harris (1992) recommends using %s lags.""" % (obs,int(12*(obs/100)**(1/4)))
                ----------------------------------
       Lags     No Constant  Constant    Constant        Obs
                No Trend     No Trend    & Trend
-------------------------------------------------------------"""
+------------------------------------------------------------""")
 	ids = ('noconstant', 'constant', 'constant_trend')
 	fmt_b = "%11.3f"*3
 	fmt_t = "%11s"*3
 	for i in range(p+1) :
 		results = adf_ls(y, i, prt=False)  #dict of results: id -> OLS instance
-		print str(i).rjust(10) + " "*3,
-		print fmt_b%tuple( results[id].coefs[0] for id in ids ),
-		print "%11d"%results['constant'].nobs
-		print " "*13,
-		print fmt_t%tuple( "(%1.2f)"%(results[id].tvals[0]) for id in ids )
-		print
-	print "------------------------------------------------------------"
+		print(str(i).rjust(10) + " "*3, end=' ')
+		print(fmt_b%tuple( results[id].coefs[0] for id in ids ), end=' ')
+		print("%11d"%results['constant'].nobs)
+		print(" "*13, end=' ')
+		print(fmt_t%tuple( "(%1.2f)"%(results[id].tvals[0]) for id in ids ))
+		print()
+	print("------------------------------------------------------------")
+
+
+adf_specs = ('noconstant', 'constant', 'constant_trend')
+
+def adf_batch(ys, maxlag, specs=adf_specs, ic='aic', nprocesses=1, chunksize=1000, nreps=None):
+	"""Return: `results`, a dictionary (keyed like `adf_ls`)
+	of augmented Dickey-Fuller results for lags 0 through `maxlag`,
+	for every series (column) of `ys`.
+	Each value is a dictionary of arrays:
+	'coefs' and 'tvals' (S x maxlag+1) hold the coefficient
+	on the lagged level and its t-ratio for each series and lag,
+	'ics' (S x maxlag+1) holds the information criterion,
+	and 'lag', 'coef' and 'tval' (S,) hold the results at the
+	lag selected by minimizing `ic`.
+	Given `nreps`, 'pval' (S,) holds finite-sample p-values
+	of 'tval' (see `adf_pvalue`).
+
+	All lag orders use the common sample of N-1-maxlag observations,
+	so the information criteria are comparable across lags.
+	The maximal lag matrix is built once per series,
+	and one (batched) QR decomposition per deterministic specification
+	then gives every nested lag order:
+	with columns ordered as deterministics, lagged differences,
+	lagged level, and difference, the regression on the first k columns
+	is read off the leading block of R.
+
+	:Parameters:
+		ys : array
+			N x S array (each column a univariate time series), or N-element sequence
+		maxlag : int
+			maximum lag (autocorrelation order)
+		specs : sequence of str
+			any of 'noconstant', 'constant', 'constant_trend'
+		ic : str
+			'aic' or 'bic'
+		nprocesses : int
+			number of worker processes (series are split into chunks)
+		chunksize : int
+			number of series per batched decomposition
+		nreps : int or None
+			replications for the simulated p-value table
+	:see: `adf_ls`
+	"""
+	ys = np.asarray(ys, dtype=float)
+	if ys.ndim == 1:
+		ys = ys[:,None]
+	if ys.ndim != 2:
+		raise ValueError('Input array should be 1d or 2d')
+	if ic not in ('aic', 'bic'):
+		raise ValueError("ic must be 'aic' or 'bic'")
+	for spec in specs:
+		if spec not in adf_specs:
+			raise ValueError('unknown specification: %s' % (spec,))
+	N, S = ys.shape
+	if N - 1 - maxlag < maxlag + 4:
+		raise ValueError('too few observations for maxlag=%d' % (maxlag,))
+	chunks = [(ys[:, start:start+chunksize], maxlag, tuple(specs), ic)
+		for start in range(0, S, chunksize)]
+	if nprocesses > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(nprocesses) as pool:
+			parts = list(pool.map(_adf_chunk, chunks))
+	else:
+		parts = [_adf_chunk(chunk) for chunk in chunks]
+	results = dict()
+	for spec in specs:
+		coefs, tvals, ics = (np.concatenate([part[spec][i] for part in parts]) for i in range(3))
+		lag = ics.argmin(axis=1)
+		idx = np.arange(S)
+		results[spec] = dict(coefs=coefs, tvals=tvals, ics=ics,
+			lag=lag, coef=coefs[idx, lag], tval=tvals[idx, lag], nobs=N-1-maxlag)
+		if nreps:
+			results[spec]['pval'] = adf_pvalue(results[spec]['tval'], N-1-maxlag, spec, nreps=nreps)
+	return results
+
+def _adf_chunk(args):
+	"""Return: dict, spec -> (coefs, tvals, ics), each (S x maxlag+1),
+	for one chunk of series (the columns of `ys`).
+	"""
+	ys, maxlag, specs, ic = args
+	N, S = ys.shape
+	T = N - 1 - maxlag
+	dy = np.diff(ys, axis=0)
+	#layout, per series: lagged differences 1..maxlag, lagged level, difference
+	Z = np.empty((S, T, maxlag + 2))
+	for i in range(1, maxlag + 1):
+		Z[:,:,i-1] = dy[maxlag-i:-i].T
+	Z[:,:,maxlag] = ys[maxlag:-1].T
+	Z[:,:,maxlag+1] = dy[maxlag:].T
+	penalty = (2 if ic == 'aic' else np.log(T)) / T
+	results = dict()
+	for spec in specs:
+		ndet = adf_specs.index(spec)
+		if ndet:
+			det = np.ones((T, ndet))
+			if ndet > 1:
+				det[:,1] = np.arange(T) - T//2
+			X = np.concatenate([np.broadcast_to(det, (S, T, ndet)), Z], axis=2)
+		else:
+			X = Z
+		R = np.linalg.qr(X, mode='r')
+		c = ndet + maxlag          #column of the lagged level
+		a = R[:, :c+1, c]
+		z = R[:, :, c+1]
+		#suffix sums over rows k..c (and k..c+1) give the partialled-out moments
+		vv = np.cumsum((a * a)[:, ::-1], axis=1)[:, ::-1]
+		uv = np.cumsum((a * z[:, :c+1])[:, ::-1], axis=1)[:, ::-1]
+		uu = np.cumsum((z * z)[:, ::-1], axis=1)[:, ::-1]
+		ks = ndet + np.arange(maxlag + 1)
+		vv, uv, uu = vv[:, ks], uv[:, ks], uu[:, ks]
+		coefs = uv / vv
+		ess = uu - uv * coefs
+		nparams = ks + 1
+		tvals = coefs / np.sqrt(ess / (T - nparams) / vv)
+		ics = np.log(ess / T) + penalty * nparams
+		results[spec] = (coefs, tvals, ics)
+	return results
+
+
+#probabilities at which simulated DF distributions are tabulated
+cv_probs = np.arange(1, 2000) / 2000
+#directory of the on-disk critical value tables (None to keep them in memory only)
+cv_cachedir = os.environ.get('ECONPY_CACHE', os.path.join(os.path.expanduser('~'), '.econpy'))
+_cv_tables = dict()  #(T, spec, nreps, seed, chunksize) -> quantiles at `cv_probs`
+
+def adf_simulate(T, spec='constant', nreps=100000, seed=None, nprocesses=1, chunksize=10000):
+	"""Return: 1d array, `nreps` sorted Dickey-Fuller t-ratios
+	simulated under the null of a driftless random walk,
+	for regressions with `T` observations.
+	Random walks are drawn in blocks of `chunksize`,
+	and each block is tested in batch (see `adf_batch`).
+	Blocks get independent streams spawned from `seed`,
+	so results do not depend on `nprocesses`.
+
+	:Parameters:
+		T : int
+			number of observations in the DF regression
+		spec : str
+			'noconstant', 'constant', or 'constant_trend'
+		nreps : int
+			number of replications
+		seed : int or None
+			seed for `numpy.random.SeedSequence`
+		nprocesses : int
+			number of worker processes
+		chunksize : int
+			number of random walks per block
+	"""
+	if spec not in adf_specs:
+		raise ValueError('unknown specification: %s' % (spec,))
+	T = int(T)
+	sizes = [min(chunksize, nreps - start) for start in range(0, nreps, chunksize)]
+	seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+	chunks = [(T, spec, size, ss) for size, ss in zip(sizes, seeds)]
+	if nprocesses > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(nprocesses) as pool:
+			parts = list(pool.map(_dfsim_chunk, chunks))
+	else:
+		parts = [_dfsim_chunk(chunk) for chunk in chunks]
+	return np.sort(np.concatenate(parts))
+
+def _dfsim_chunk(args):
+	"""Return: 1d array, DF t-ratios for one block of simulated random walks.
+	"""
+	T, spec, size, ss = args
+	rng = np.random.default_rng(ss)
+	ys = np.zeros((T + 1, size))
+	np.cumsum(rng.standard_normal((T, size)), axis=0, out=ys[1:])
+	return _adf_chunk((ys, 0, (spec,), 'aic'))[spec][1][:,0]
+
+def adf_cvtable(T, spec='constant', nreps=100000, cachedir=None, seed=None, chunksize=10000, **kwargs):
+	"""Return: 1d array, the simulated quantiles (at `cv_probs`)
+	of the Dickey-Fuller t-ratio for `T` observations.
+	Tables are cached in memory and (unless `cachedir` is False)
+	in an on-disk table keyed by (T, spec, nreps),
+	so they are simulated only once.
+	A seeded table is reproducible, so its key also includes
+	`seed` and `chunksize` (which together fix the random streams).
+
+	:Parameters:
+		T : int
+			number of observations in the DF regression
+		spec : str
+			'noconstant', 'constant', or 'constant_trend'
+		nreps : int
+			number of replications
+		cachedir : str, None, or False
+			directory of the on-disk tables (default: `cv_cachedir`)
+		seed : int or None
+			seed for `adf_simulate`
+		chunksize : int
+			number of random walks per block, for `adf_simulate`
+		kwargs : dict
+			passed to `adf_simulate` (when the table must be simulated)
+	"""
+	if seed is None:
+		key = (int(T), spec, int(nreps), None, None)
+		fname = 'adf_T%d_%s_R%d.npz' % key[:3]
+	else:
+		key = (int(T), spec, int(nreps), int(seed), int(chunksize))
+		fname = 'adf_T%d_%s_R%d_S%d_C%d.npz' % key
+	table = _cv_tables.get(key)
+	if table is not None:
+		return table
+	if cachedir is None:
+		cachedir = cv_cachedir
+	path = None
+	if cachedir:
+		path = os.path.join(cachedir, fname)
+		if os.path.exists(path):
+			with np.load(path) as data:
+				if np.array_equal(data['probs'], cv_probs):
+					table = data['quantiles']
+	if table is None:
+		stats = adf_simulate(T, spec, nreps, seed=seed, chunksize=chunksize, **kwargs)
+		table = np.quantile(stats, cv_probs)
+		if path:
+			os.makedirs(cachedir, exist_ok=True)
+			tmp = '%s.%d.tmp' % (path, os.getpid())
+			with open(tmp, 'wb') as fh:
+				np.savez(fh, probs=cv_probs, quantiles=table)
+			os.replace(tmp, path)  #atomic, so concurrent writers are harmless
+	_cv_tables[key] = table
+	return table
+
+def adf_critvals(T, spec='constant', levels=(0.01, 0.05, 0.10), **kwargs):
+	"""Return: array, finite-sample critical values of the DF t-ratio
+	(one-sided, H1: stationary) for `T` observations at `levels`.
+
+	:see: `adf_cvtable`
+	"""
+	return np.interp(levels, cv_probs, adf_cvtable(T, spec, **kwargs))
+
+def adf_pvalue(tval, T, spec='constant', **kwargs):
+	"""Return: array, finite-sample p-values of DF t-ratio(s) `tval`
+	for `T` observations, interpolated in the simulated table.
+	P-values are clipped to the range of `cv_probs`.
+
+	:see: `adf_cvtable`
+	"""
+	return np.interp(tval, adf_cvtable(T, spec, **kwargs), cv_probs)
+
+def adf_cv_text(T, nreps=100000, **kwargs):
+	"""Return: str, a table of finite-sample critical values
+	for `T` observations, formatted like `adf_cv1`.
+
+	:see: `adf_critvals`
+	"""
+	lines = ["",
+		"One-sided test of H0: Unit root vs. H1: Stationary",
+		"Simulated critical values for T=%d (t-ratio, %d replications):" % (T, nreps),
+		"-"*60,
+		"  1%      5%      10%      Model",
+		"-"*60]
+	labels = ('Simple ADF (no constant or trend)',
+		'ADF with constant (no trend)',
+		'ADF with constant & trend')
+	for spec, label in zip(adf_specs, labels):
+		cvs = adf_critvals(T, spec, nreps=nreps, **kwargs)
+		lines.append("%5.2f   %5.2f   %5.2f     %s" % (tuple(cvs) + (label,)))
+	lines.append("-"*60)
+	return "\n".join(lines)
+
+def adf_response_surface(Ts, spec='constant', levels=(0.01, 0.05, 0.10), **kwargs):
+	"""Return: 3 x L array, coefficients (b0, b1, b2) of
+	the response surfaces cv(T) = b0 + b1/T + b2/T**2,
+	fitted by OLS to the simulated critical values for samples `Ts`,
+	one column for each of the L `levels`.
+	(So b0 estimates the asymptotic critical value.)
+
+	:see: MacKinnon, J.G., 1991, "Critical values for cointegration tests"
+	:see: `adf_critvals`
+	"""
+	cvs = np.array([adf_critvals(T, spec, levels, **kwargs) for T in Ts])
+	Ts = np.asarray(Ts, dtype=float)
+	ols = OLS(cvs, np.column_stack([1/Ts, 1/Ts**2]), minimal=True)
+	coefs = np.asarray(ols.coefs).reshape(3, -1)
+	return coefs[[2, 0, 1]]  #OLS puts the constant last
 
 
 
@@ -5,13 +5,30 @@ Unit tests for the `abms` examples..
 :see: http://agiletesting.blogspot.com/2005/01/python-unit-testing-part-1-unittest.html
 :see: http://aspn.activestate.com/ASPN/Cookbook/Python/Recipe/305292
 '''
-import operator
-import  random, unittest
+import operator, os
+import importlib.util, random, sys, unittest
 import numpy as np
 
 from econpy.pytrix.utilities import gini, alt_gini
 from econpy.abms import utilities
 from econpy.abms.pestieau1984oep import agents  #chk
+from econpy.abms.agents import agents001
+from econpy.abms.games.simple2p import simple_game, batch_game
+from econpy.abms.ca import lifelike, hashlife
+from econpy.abms.segregate import schelling03
+
+def load_wallich():
+    """Return the Wallich supply-demand module (its directory is not a package)."""
+    import econpy.abms
+    name = 'supplyDemandWallich'
+    if name not in sys.modules:
+        fpath = os.path.join(os.path.dirname(econpy.abms.__file__), 'historical',
+                             'Wallich-2012-PublicChoice', name + '.py')
+        spec = importlib.util.spec_from_file_location(name, fpath)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module  #so workers can unpickle its functions
+        spec.loader.exec_module(module)
+    return sys.modules[name]
 
 class test_utilities(unittest.TestCase):
     wealths = [random.random() for _ in range(30)]
@@ -39,6 +56,335 @@ class test_utilities(unittest.TestCase):
         self.assertTrue(abs(test_gini-shares_gini)< 1e-02,msg=msg) #TODO: improve accuracy
 
 
+class test_slotted_agents(unittest.TestCase):
+    def test_no_dict(self):
+        indiv = agents001.SlotIndiv(sex='F')
+        self.assertFalse(hasattr(indiv, '__dict__'))
+        acct = agents001.SlotFundAccount(None, indiv, 2.0)
+        self.assertFalse(hasattr(acct, '__dict__'))
+        cohort = agents001.SlotCohort([indiv, agents001.SlotIndiv(sex='M')])
+        self.assertFalse(hasattr(cohort, '__dict__'))
+    def test_locked(self):
+        indiv = agents001.SlotIndiv(sex='F')
+        with self.assertRaises(AttributeError):
+            indiv.newattr = 1
+    def test_transactions(self):
+        payer = agents001.SlotIndiv(sex='F')
+        payee = agents001.SlotIndiv(sex='M')
+        payer.cash = 10
+        agents001.transfer(payer, payee, 4)
+        self.assertEqual((payer.networth, payee.networth), (6, 4))
+        with self.assertRaises(agents001.InsufficientFundsError):
+            agents001.transfer(payer, payee, 7)
+    def test_cohort(self):
+        indivs = [agents001.SlotIndiv(sex=x) for x in "MF"*3]
+        cohort = agents001.SlotCohort(indivs)
+        self.assertEqual(list(cohort), indivs)
+        self.assertEqual(len(cohort.males), 3)
+        self.assertTrue(indivs[0] in cohort)
+        cohort.age += 1
+        self.assertTrue(all(indiv.age == 1 for indiv in cohort))
+    def test_subclass(self):
+        #subclasses without `__slots__` may add attributes (e.g., Pestieau)
+        class Indiv(agents001.SlotIndiv):
+            def __init__(self, sex=None, economy=None):
+                agents001.SlotIndiv.__init__(self, sex, economy)
+                self.ability = 1
+        self.assertEqual(Indiv(sex='F').ability, 1)
+
+class test_batch_game(unittest.TestCase):
+    paymat = [[(3,3),(0,5)], [(5,0),(1,1)]]
+    def test_match_objects(self):
+        #mean game payoffs match the object implementation in distribution
+        random.seed(314)
+        pt1 = simple_game.CDIPlayerType((0.1, 0.8, 0.3))
+        pt2 = simple_game.CDIPlayerType((0.6, 0.2, 0.5))
+        ngames = 4000
+        pays = np.empty((ngames, 2))
+        for i in range(ngames):
+            p1 = simple_game.SimplePlayer(pt1)
+            p2 = simple_game.SimplePlayer(pt2)
+            game = simple_game.CDIGame(p1, p2, self.paymat, gameIter=4)
+            game.run()
+            payoff = game.payoff()
+            pays[i] = payoff[p1], payoff[p2]
+        types, p_cdi, _ = batch_game.playertype_arrays([p1, p2])
+        pairs = np.tile([0, 1], (ngames, 1))
+        bpay1, bpay2 = batch_game.play_games(p_cdi[types[pairs[:,0]]],
+            p_cdi[types[pairs[:,1]]], batch_game.payoff_array(self.paymat),
+            gameIter=4, rng=271)
+        se = pays.std(axis=0) * np.sqrt(2 / ngames)
+        self.assertTrue(abs(pays[:,0].mean() - bpay1.mean()) < 4 * se[0])
+        self.assertTrue(abs(pays[:,1].mean() - bpay2.mean()) < 4 * se[1])
+    def test_deterministic(self):
+        #always-defect vs always-cooperate
+        p_cdi = np.array([[1.,1.,1.], [0.,0.,0.]])
+        types = np.array([0, 1, 1, 0])
+        pairs = np.array([[0, 1], [2, 3]])
+        payoffs = batch_game.round_payoffs(types, pairs, p_cdi, self.paymat)
+        self.assertTrue(np.allclose(payoffs, [5, 0, 0, 5]))
+        next_types = batch_game.soup_next_types(types, pairs, payoffs)
+        self.assertTrue(np.all(next_types == 0))
+    def test_soup_round(self):
+        p_cdi = np.array([[0.5, 0.5, 0.5]])
+        pairs, payoffs = batch_game.soup_round(np.zeros(11, dtype=int),
+            p_cdi, self.paymat, rng=0)
+        self.assertEqual(pairs.shape, (5, 2))
+        self.assertEqual(len(np.unique(pairs)), 10)
+        self.assertEqual(payoffs.shape, (11,))
+
+class test_expected_payoffs(unittest.TestCase):
+    paymat = [[(3,3),(0,5)], [(5,0),(1,1)]]
+    def test_pure(self):
+        frozen = simple_game.freeze_payoffs(self.paymat)
+        #tit-for-tat (cooperate first) vs always defect
+        pays = simple_game.expected_payoffs((0,1,0), (1,1,1), frozen, 4)
+        self.assertTrue(np.allclose(pays, (0.75, 2.0)))
+    def test_match_batch(self):
+        p1, p2 = (0.1, 0.8, 0.3), (0.6, 0.2, 0.5)
+        frozen = simple_game.freeze_payoffs(self.paymat)
+        pays = simple_game.expected_payoffs(p1, p2, frozen, 5)
+        n = 200000
+        bpay1, bpay2 = batch_game.play_games(np.tile(p1, (n,1)), np.tile(p2, (n,1)),
+            batch_game.payoff_array(self.paymat), gameIter=5, rng=0)
+        self.assertAlmostEqual(pays[0], bpay1.mean(), places=2)
+        self.assertAlmostEqual(pays[1], bpay2.mean(), places=2)
+    def test_deterministic_round(self):
+        types = [simple_game.CDIPlayerType(p) for p in [(0,1,0), (1,1,1)]]
+        players = [simple_game.SoupPlayer(types[i % 2]) for i in range(20)]
+        rnd = simple_game.SoupRound(players, self.paymat, deterministic=True)
+        rnd.run()
+        for player in players:
+            self.assertEqual(len(player.games_played), 1)
+            opponent = player.players_played[0]
+            expect = simple_game.expected_payoffs(tuple(player.playertype.p_cdi),
+                tuple(opponent.playertype.p_cdi),
+                simple_game.freeze_payoffs(self.paymat), 4)[0]
+            self.assertAlmostEqual(player.roundPayoff(), expect)
+
+class test_grid(unittest.TestCase):
+    paymat = [[(3,3),(0,5)], [(5,0),(1,1)]]
+    moore = [(dx, dy) for dx in (-1,0,1) for dy in (-1,0,1) if (dx, dy) != (0, 0)]
+    def make_torus(self, PlayerClass=simple_game.GridPlayer):
+        self.types = [simple_game.CDIPlayerType(p) for p in [(0,1,0), (1,1,1)]]
+        players = [PlayerClass(self.types[i % 3 == 0]) for i in range(30)]
+        torus = simple_game.SimpleTorus(5, 6, self.moore)
+        torus.populate(players)
+        return torus, players
+    def test_neighbors(self):
+        torus, players = self.make_torus()
+        self.assertEqual(torus.neighbor_idx.shape, (30, 8))
+        self.assertEqual(len(torus.edges), 30 * 8 // 2)
+        for player in players:
+            self.assertEqual(player.neighbors, torus.compute_neighbors(player))
+    def test_round(self):
+        torus, players = self.make_torus()
+        simple_game.GridRound(players, self.paymat, deterministic=True).run()
+        for player in players:
+            self.assertEqual(len(player.games_played), 8)
+            self.assertEqual(set(player.players_played), set(player.neighbors))
+    def test_next_playertypes(self):
+        for PlayerClass in (simple_game.GridPlayer, simple_game.MaxminGridPlayer):
+            maxmin = PlayerClass is simple_game.MaxminGridPlayer
+            torus, players = self.make_torus(PlayerClass)
+            simple_game.GridRound(players, self.paymat, deterministic=True).run()
+            torus.choose_next_playertypes(maxmin=maxmin, rng=0)
+            for player in players:
+                if maxmin:
+                    best = simple_game.maxmin_playertypes(player)
+                else:
+                    best = simple_game.topscore_playertypes(player)
+                self.assertTrue(player.next_playertype in best)
+
+def naive_lifelike(grid, rule, torus):
+    birth, survive = lifelike.parse_rule(rule)
+    nrows, ncols = grid.shape
+    result = np.zeros_like(grid)
+    for r in range(nrows):
+        for c in range(ncols):
+            n = 0
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    rr, cc = r + dr, c + dc
+                    if torus:
+                        rr, cc = rr % nrows, cc % ncols
+                    elif not (0 <= rr < nrows and 0 <= cc < ncols):
+                        continue
+                    n += grid[rr, cc]
+            n -= grid[r, c]
+            result[r, c] = (n in survive) if grid[r, c] else (n in birth)
+    return result
+
+class test_lifelike(unittest.TestCase):
+    def test_methods(self):
+        rng = np.random.default_rng(0)
+        for shape in [(7, 13), (5, 64), (6, 70)]:
+            for torus in (False, True):
+                for rule in ('B3/S23', 'B36/S23', 'B0/S8'):
+                    grid = rng.integers(0, 2, shape).astype(np.uint8)
+                    expect = naive_lifelike(naive_lifelike(grid, rule, torus), rule, torus)
+                    for method in ('convolve', 'bitpacked'):
+                        ca = lifelike.LifeLikeCA(grid, rule, torus=torus, method=method)
+                        ca.step(2)
+                        self.assertTrue(np.array_equal(ca.grid, expect),
+                                        msg=f"{method} {shape} {torus} {rule}")
+    def test_glider(self):
+        grid = np.zeros((8, 8), dtype=np.uint8)
+        grid[:3, :3] = [(0,1,0), (0,0,1), (1,1,1)]
+        ca = lifelike.LifeLikeCA(grid, torus=True)
+        ca.step(32)  #glider moves one cell diagonally every 4 generations
+        self.assertTrue(np.array_equal(ca.grid, grid))
+        self.assertEqual(ca.population, 5)
+        self.assertEqual(ca.generation, 32)
+    def test_parse_rule(self):
+        self.assertEqual(lifelike.parse_rule('b36/s23'), ({3, 6}, {2, 3}))
+        self.assertRaises(ValueError, lifelike.parse_rule, '23/3')
+
+class test_hashlife(unittest.TestCase):
+    def test_match_lifelike(self):
+        rng = np.random.default_rng(0)
+        for rule in ('B3/S23', 'B36/S23'):
+            for gens in (1, 6, 13):
+                grid = np.zeros((64, 64), dtype=np.uint8)
+                grid[28:36, 28:36] = rng.integers(0, 2, (8, 8))
+                hl = hashlife.HashLife(grid, rule)
+                hl.step(gens)
+                ca = lifelike.LifeLikeCA(grid, rule, torus=False)
+                ca.step(gens)
+                self.assertTrue(np.array_equal(hl.get_grid(), ca.grid))
+    def test_glider(self):
+        grid = np.zeros((3, 3), dtype=np.uint8)
+        grid[:] = [(0,1,0), (0,0,1), (1,1,1)]
+        hl = hashlife.HashLife(grid)
+        hl.step(4 * 10**9)  #glider moves one cell diagonally every 4 generations
+        shift = 10**9
+        self.assertEqual(hl.population, 5)
+        self.assertEqual(hl.bounding_box(), (shift, shift, shift + 3, shift + 3))
+        self.assertTrue(np.array_equal(hl.get_grid(origin=(shift, shift)), grid))
+    def test_collect(self):
+        gun = lifelike.gosper_glider_gun()
+        hl = hashlife.HashLife(gun, max_nodes=5000)
+        hl.step(3000)
+        self.assertTrue(hl.nodes < 5000)
+        ref = hashlife.HashLife(gun)
+        ref.step(3000)
+        self.assertEqual(hl.population, ref.population)
+        self.assertEqual(hl.bounding_box(), ref.bounding_box())
+    def test_collect_within_jump(self):
+        grid = np.random.default_rng(0).integers(0, 2, (32, 32))
+        hl = hashlife.HashLife(grid, max_nodes=2000)
+        peak = [0]
+        join = hl.join
+        def counting_join(*quadrants):
+            node = join(*quadrants)
+            peak[0] = max(peak[0], hl.nodes)
+            return node
+        hl.join = counting_join
+        hl.step(2**10)  #a single jump
+        self.assertTrue(peak[0] <= 2010)
+        ref = hashlife.HashLife(grid)
+        ref.step(2**10)
+        self.assertEqual(hl.population, ref.population)
+        self.assertEqual(hl.bounding_box(), ref.bounding_box())
+
+class test_schelling(unittest.TestCase):
+    def brute_nearest(self, positions, i, k):
+        d2 = ((positions - positions[i])**2).sum(axis=1)
+        d2[i] = np.inf
+        return np.sort(d2)[:k]
+    def test_uniform_grid(self):
+        model = schelling03.SchellingModel(500, seed=0)
+        positions = model.positions
+        index = schelling03.UniformGrid(positions, 25)
+        rng = np.random.default_rng(1)
+        for i in rng.integers(0, 500, 50):
+            x, y = rng.uniform(-300, 300, 2)
+            index.move(i, x, y)
+            self.assertTrue(np.array_equal(positions[i], (x, y)))
+            nbrs = index.nearest(i, 8)
+            d2 = ((positions[nbrs] - positions[i])**2).sum(axis=1)
+            self.assertTrue(np.allclose(d2, self.brute_nearest(positions, i, 8)))
+        self.assertEqual(schelling03.UniformGrid(np.zeros((1, 2)), 25).nearest(0, 8), [])
+        self.assertEqual(len(schelling03.UniformGrid(np.zeros((3, 2)), 25).nearest(0, 8)), 2)
+    def test_ratios(self):
+        model = schelling03.SchellingModel(300, seed=0)
+        nbrs = model.neighbors()
+        for i in range(0, 300, 7):
+            d2 = ((model.positions[nbrs[i]] - model.positions[i])**2).sum(axis=1)
+            self.assertTrue(np.allclose(np.sort(d2), self.brute_nearest(model.positions, i, 8)))
+    def test_run(self):
+        for schedule in ('sequential', 'synchronous'):
+            model = schelling03.SchellingModel(300, schedule=schedule, seed=0)
+            on_canvas = model.on_canvas(model.positions)
+            model.run(maxiter=10)
+            self.assertEqual(len(model.history), 10)
+            #moves keep agents on the canvas
+            self.assertTrue(np.all(model.on_canvas(model.positions)[on_canvas]))
+            self.assertTrue(model.history[-1] > model.history[0])
+        self.assertRaises(ValueError, schelling03.SchellingModel, 1)
+        self.assertRaises(ValueError, schelling03.SchellingModel, 10, k=0)
+        model = schelling03.SchellingModel(2, seed=0)  #each agent's only neighbor is the other
+        model.step()
+        self.assertEqual(model.neighbors().tolist(), [[1], [0]])
+
+
+class test_wallich(unittest.TestCase):
+    def setUp(self):
+        self.sd = sd = load_wallich()
+        self.prms = dict(buyerType=sd.HomogeneousBuyer, nBuyers=60, nSellers=5,
+                         nPeriods=40, nReps=3, tShock=10, demand_shock=-3.0)
+    def market_paths(self, prms):
+        ts, units, sales, inventory = zip(*self.sd.getResults(prms))
+        return np.array(units), np.array(sales), np.array(inventory)
+    def test_match_market(self):
+        sd = self.sd
+        for sellerType in (sd.WalrasianSeller, sd.LearningSeller):
+            for (tShock, shock) in ((10, -3.0), (5, 1.5)):
+                prms = sd.Parameters(sellerType=sellerType,
+                                     **dict(self.prms, tShock=tShock, demand_shock=shock))
+                mkt = sd.ArrayMarket(prms)
+                mkt.runsim()
+                expected = self.market_paths(prms)
+                for (got, expect) in zip((mkt.units, mkt.sales, mkt.inventory), expected):
+                    self.assertEqual(got.shape, (3, 40))
+                    self.assertTrue(np.allclose(got, expect, rtol=1e-8, atol=1e-8))
+                    self.assertTrue((mkt.inventory_s >= 0).all())
+    def test_replicates(self):
+        sd = self.sd
+        prms = sd.Parameters(sellerType=sd.LearningSeller, **self.prms)
+        tShock = [5, 10, 15, 20]
+        shocks = [-3.0, -1.0, 1.0, 2.0]
+        serial = sd.runReplicatesArray(prms, tShock=tShock, demand_shock=shocks)
+        parallel = sd.runReplicatesArray(prms, tShock=tShock, demand_shock=shocks, nProcesses=2)
+        for (xs, ys) in zip(serial, parallel):
+            self.assertEqual(xs.shape, (4, 40))
+            self.assertTrue(np.array_equal(xs, ys))
+        #each replicate matches a Market run with its own shock
+        for r in (0, 3):
+            expected = self.market_paths(prms._replace(tShock=tShock[r], demand_shock=shocks[r]))
+            for (got, expect) in zip(serial, expected):
+                self.assertTrue(np.allclose(got[r], expect, rtol=1e-8, atol=1e-8))
+        #averages match runReplicates
+        averages = sd.runReplicates(prms._replace(nPeriods=20))
+        got = sd.runReplicatesArray(prms._replace(nPeriods=20))
+        for (xs, avg) in zip(got, averages):
+            self.assertTrue(np.allclose(xs.mean(axis=0), avg))
+    def test_no_overbuy(self):
+        sd = self.sd
+        prms = sd.Parameters(sellerType=sd.WalrasianSeller, **dict(self.prms, nSellers=1, nReps=1000, c=0.0, d=0.0))
+        mkt = sd.ArrayMarket(prms)
+        #stocks that are (in floating point) nearly multiples of the demand
+        rng = np.random.default_rng(0)
+        qty = rng.uniform(0.01, 1.0, 1000)
+        nfull = rng.integers(1, 60, 1000)
+        mkt.shift = qty  #buyer demand, as c = d = 0
+        mkt.nextprice[:] = 0.0
+        produced = rng.uniform(0, 100, 1000)
+        mkt.inventory_s[:, 0] = (nfull * qty + produced) - produced
+        units, sales = mkt.trade()
+        self.assertTrue((mkt.inventory_s >= 0).all())
+        self.assertTrue(np.allclose(units, nfull * qty))
+        self.assertTrue(np.allclose(mkt.inventory_s, 0))
 
 
 if __name__=="__main__":
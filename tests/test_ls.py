@@ -14,7 +14,7 @@ import unittest
 
 from tests_config import econpy  #tests_config.py modifies sys.path to find econpy
 from econpy.pytrix.pytrix import Vector, Vplus, dot, norm 
-from econpy.pytrix.ls import rolsf, OLS
+from econpy.pytrix.ls import rolsf, rolsf_path, OLS, OLSvn, StreamingOLS, iter_chunks
 
 
 class testPytrix(unittest.TestCase):
@@ -28,6 +28,127 @@ class testPytrix(unittest.TestCase):
 		b1hat, b0hat = model.coefs #constant comes last
 		self.assertTrue(abs(b1hat-b1)<0.1)
 		self.assertTrue(abs(b0hat-b0)<0.1)
+	def test_minimal(self):
+		x = np.random.random((50,2))
+		y = np.dot(x, [1.0, 2.0]) + np.random.random(50)
+		full = OLS(dep=y, indep=x)
+		minimal = OLS(dep=y, indep=x, minimal=True)
+		self.assertTrue(minimal._resids is None)
+		self.assertTrue(np.allclose(minimal.coefs, full.coefs))
+		self.assertAlmostEqual(minimal.ess, full.ess)
+		self.assertTrue(np.allclose(minimal.resids, full.resids))
+		self.assertTrue(np.allclose(minimal.se, full.se))
+		#residual sums accumulate over row blocks
+		multi = OLS(dep=np.column_stack((y, 2*y)), indep=x, minimal=True)
+		self.assertTrue(np.allclose(econpy.pytrix.ls._blocked_ess(multi.X, multi.Y, multi.coefs, 7), multi.ess))
+		self.assertTrue(np.allclose(multi.ess, [full.ess, 4*full.ess]))
+		self.assertAlmostEqual(minimal.R2, 1 - full.resids.var()/y.var())
+		self.assertTrue(np.allclose(full.cov, full.sigma2 * la.inv(np.dot(full.X.T, full.X))))
+		self.assertAlmostEqual(full.llf, minimal.llf)
+		vn = OLSvn(y, x, minimal=True)
+		self.assertTrue(np.allclose(vn.b[[1,2,0]], full.coefs))
+		self.assertTrue(np.allclose(vn.se[[1,2,0]], full.se))
+		self.assertAlmostEqual(vn.R2, full.R2)
+	def test_multi_equation(self):
+		x = np.random.random((100,2))
+		y = np.dot(x, np.random.random((2,4))) + np.random.random((100,4))
+		model = OLS(dep=y, indep=x)
+		self.assertEqual(model.coefs.shape, (3,4))
+		self.assertEqual(model.resids.shape, (100,4))
+		for m in range(4):
+			single = OLS(dep=y[:,m], indep=x)
+			self.assertTrue(np.allclose(model.coefs[:,m], single.coefs))
+			self.assertTrue(np.allclose(model.se[:,m], single.se))
+			self.assertTrue(np.allclose(model.pvals[:,m], single.pvals))
+			self.assertTrue(np.allclose(model.resids[:,m], single.resids))
+			self.assertAlmostEqual(model.ess[m], single.ess)
+			self.assertAlmostEqual(model.R2[m], single.R2)
+	def test_streaming(self):
+		x = np.random.random((500,2)) + 100
+		y = np.dot(x, np.random.random((2,3))) + np.random.random((500,3))
+		for constant in (1, 0):
+			model = OLS(dep=y, indep=x, constant=constant)
+			part1 = StreamingOLS(constant=bool(constant)).update_from(iter_chunks(y[:300], x[:300], 64))
+			part2 = StreamingOLS(constant=bool(constant)).update_from(iter_chunks(y[300:], x[300:], 64))
+			stream = part1.merge(part2)
+			self.assertEqual(stream.nobs, 500)
+			self.assertTrue(np.allclose(stream.coefs, model.coefs))
+			self.assertTrue(np.allclose(stream.se, model.se))
+			self.assertTrue(np.allclose(stream.ess, model.ess))
+		single = StreamingOLS().update(y[:,0], x)
+		self.assertTrue(np.allclose(single.coefs, OLS(dep=y[:,0], indep=x).coefs))
+		#the fit is cached until new observations arrive
+		fit = single._fit()
+		self.assertTrue(single._fit() is fit)
+		single.update(y[:10,0], x[:10])
+		self.assertFalse(single._fit() is fit)
+		self.assertTrue(np.allclose(single.coefs, OLS(dep=np.r_[y[:,0], y[:10,0]], indep=np.r_[x, x[:10]]).coefs))
+	def test_bootstrap(self):
+		x = np.random.random((80,2))
+		y = np.dot(x, [1.0, 2.0]) + np.random.random(80)
+		model = OLS(dep=y, indep=x)
+		for kind in ('pairs', 'residual', 'wild', 'block'):
+			bs = model.bootstrap(200, kind, seed=42)
+			self.assertEqual(bs.coefs.shape, (200,3))
+			self.assertTrue((bs.se > 0).all())
+			for interval in (bs.percentile_interval(), bs.bca_interval()):
+				self.assertEqual(interval.shape, (2,3))
+				self.assertTrue((interval[0] < interval[1]).all())
+		#results do not depend on chunking into processes
+		self.assertTrue(np.allclose(model.bootstrap(50, seed=1, chunksize=20).coefs,
+			model.bootstrap(50, seed=1, chunksize=20, nprocesses=2).coefs))
+		#jackknife matches refitting without each observation
+		jack = bs.jackknife()
+		loo = OLS(dep=np.delete(y, 5), indep=np.delete(x, 5, axis=0))
+		self.assertTrue(np.allclose(jack[5], loo.coefs))
+		for blocksize in (0, 81):
+			self.assertRaises(ValueError, model.bootstrap, 10, 'block', blocksize)
+		#replicates all on one side of the estimate still give finite bounds
+		bs.coefs = model.coefs + np.abs(bs.coefs - model.coefs) + 1e-3
+		self.assertTrue(np.isfinite(bs.bca_interval()).all())
+	def test_rolsf_path(self):
+		x = np.random.random((2,100,3)) - 0.5
+		y = np.dot(x, [1.0, -0.5, 0.25]) + 0.01*np.random.random((2,100))
+		p0, th0, lam = 100.*np.eye(3), np.zeros(3), 0.97
+		#one series with rolsf
+		th, p = th0.copy(), p0.copy()
+		for t in range(100):
+			th, p = rolsf(x[1,t], y[1,t], p, th, lam)
+		for method in ('batch', 'mil', 'ud'):
+			ths, ps = rolsf_path(x, y, p0, th0, lam, method=method)
+			self.assertEqual(ths.shape, (2,100,3))
+			self.assertEqual(ps.shape, (2,100,3,3))
+			self.assertTrue(np.allclose(ths[1,-1], th))
+			self.assertTrue(np.allclose(ps[1,-1], p))
+		ths, p = rolsf_path(x[0], y[0], p0, th0, lam, method='ud', keep_cov=False)
+		self.assertEqual(p.shape, (3,3))
+		#batch results do not depend on the block of periods or on keep_cov
+		ths, ps = rolsf_path(x, y, p0, th0, lam)
+		for blocksize in (7, 100):
+			ths2, p = rolsf_path(x, y, p0, th0, lam, keep_cov=False, blocksize=blocksize)
+			self.assertTrue(np.allclose(ths2, ths))
+			self.assertTrue(np.allclose(p, ps[:,-1]))
+			self.assertTrue(np.allclose(rolsf_path(x, y, p0, th0, lam, blocksize=blocksize)[1], ps))
+	def test_recursive(self):
+		x = np.random.random((60,2))
+		y = np.dot(x, [1.0, 2.0]) + 3 + np.random.random(60)
+		model = OLS(dep=y, indep=x)
+		X = model.X
+		for window in (None, 20):
+			paths = [model.recursive(window, method) for method in ('batch','update')]
+			for t in (20, 35, 59):
+				lo = 0 if window is None else t - window + 1
+				sub = OLS(dep=y[lo:t+1], indep=x[lo:t+1])
+				for coefs, se, sigma2 in paths:
+					self.assertTrue(np.allclose(coefs[t], sub.coefs))
+					self.assertTrue(np.allclose(se[t], sub.se))
+					self.assertAlmostEqual(sigma2[t], sub.sigma2)
+			for coefs, se, sigma2 in paths:
+				self.assertEqual(coefs.shape, (60,3))
+				first = 2 if window is None else window - 1
+				self.assertTrue(np.isnan(coefs[:first]).all())
+				self.assertFalse(np.isnan(coefs[first:]).any())
+		self.assertTrue(np.allclose(model.rols()[-1], model.coefs))
 
 # +++++++++++++++++++++++++++++++++++++++++++
 #                rolsftest.py
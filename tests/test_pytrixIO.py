@@ -0,0 +1,183 @@
+'''
+Unit tests for pytrixIO.
+'''
+__author__ = 'Alan G. Isaac (and others as specified)'
+
+import datetime, mmap, os, shutil, tempfile
+import numpy as np
+import unittest
+from unittest import mock
+
+from tests_config import econpy  #tests_config.py modifies sys.path to find econpy
+from econpy.pytrix.pytrixIO import Sample, align, date2ordinal, ordinal2date
+from econpy.pytrix.pytrixIO import read_db, write_db, load_dir, read_fred_bulk, _save_dir_cache
+from econpy.pytrix.pytrixIO import iter_cols, ColumnWriter, col2list, cols2tuples, readcol, printv
+
+
+class testSample(unittest.TestCase):
+	def test_ordinals(self):
+		for freq, dt in ((1, datetime.date(1999,1,1)), (4, datetime.date(1999,10,1)),
+				(12, datetime.date(1999,11,1)), (365, datetime.date(1999,11,17)), (None, 7)):
+			p = date2ordinal(dt, freq)
+			self.assertEqual(ordinal2date(p, freq), dt)
+			self.assertEqual(ordinal2date(p+1, freq) > dt, True)
+	def test_sample(self):
+		smpl = Sample(datetime.date(2000,2,3), datetime.date(2003,11,30), freq='Q')
+		self.assertEqual(smpl.start, datetime.date(2000,1,1))
+		self.assertEqual(len(smpl), 16)
+		self.assertEqual(smpl.dates, [xi.date() for xi in smpl.get_rrule()])
+		self.assertEqual(smpl.get_date_index(datetime.date(2001,5,17)), 5)
+		self.assertRaises(ValueError, smpl.get_date_index, datetime.date(2004,1,1))
+		#copies share generated dates
+		smpl2 = smpl.copy()
+		self.assertEqual(smpl2, smpl)
+		self.assertTrue(smpl2.dates is smpl.dates)
+		self.assertTrue(Sample(smpl.start, smpl.end, 4).datearray is smpl.datearray)
+		self.assertEqual(smpl.datearray[-1], np.datetime64('2003-10-01'))
+		daily = Sample(datetime.date(2000,2,27), datetime.date(2000,3,2), freq='D')
+		self.assertEqual(len(daily), 5)
+		self.assertEqual(daily.dates[2], datetime.date(2000,2,29))
+		undated = Sample(3, 9)
+		self.assertEqual(undated.dates, list(range(3, 10)))
+		self.assertEqual(undated.get_date_index(5), 2)
+	def test_align(self):
+		a = Sample(datetime.date(2000,1,1), datetime.date(2003,12,1), freq='M')
+		b = Sample(datetime.date(2001,6,1), datetime.date(2005,12,1), freq='M')
+		c = Sample(datetime.date(1990,1,1), datetime.date(2002,3,1), freq='M')
+		common, slices = align(a, b, c)
+		self.assertEqual(common, Sample(datetime.date(2001,6,1), datetime.date(2002,3,1), freq='M'))
+		for smpl, slc in zip((a, b, c), slices):
+			self.assertEqual(smpl.dates[slc], common.dates)
+		self.assertEqual(a.intersect(Sample(datetime.date(2005,1,1), datetime.date(2006,1,1), 12)), None)
+
+
+class testDatabank(unittest.TestCase):
+	def setUp(self):
+		self.dirname = tempfile.mkdtemp()
+	def tearDown(self):
+		shutil.rmtree(self.dirname)
+	def test_read_db(self):
+		fname = os.path.join(self.dirname, 'x.db')
+		smpl = Sample(datetime.date(1990,1,1), datetime.date(1999,12,1), freq='M')
+		x = np.random.default_rng(0).random(len(smpl))
+		write_db(fname, x, smpl=smpl, comments={'Display Name': 'x'})
+		data, smpl2, comments = read_db(fname)
+		self.assertTrue(np.allclose(data, x))
+		self.assertEqual(smpl2, smpl)
+		self.assertEqual(comments['Display Name'], 'x')
+		#comments and corrupt values in the data block are discarded
+		with open(fname, 'w') as fh:
+			fh.write('"cDisplay Name: y\n\n-4\n2000.1\n2000.4\n1.5\n"note\n2.5\nbad\n3\n4\n')
+		data, smpl2, comments = read_db(open(fname))
+		self.assertTrue((data == (1.5, 2.5, 3, 4)).all())
+		self.assertEqual(comments['Display Name'], 'y')
+		self.assertEqual(smpl2, Sample(datetime.date(2000,1,1), datetime.date(2000,10,1), freq=4))
+	def test_read_db_cache(self):
+		fname = os.path.join(self.dirname, 'u.db')
+		write_db(fname, [1.0, 2.0, 3.0], comments={'Source': 'test'})
+		cachedir = os.path.join(self.dirname, 'cache')
+		data, smpl, comments = read_db(fname, cache=True, cachedir=cachedir)
+		self.assertEqual(len(os.listdir(cachedir)), 2)
+		data2, smpl2, comments2 = read_db(fname, cache=True, cachedir=cachedir)
+		self.assertTrue(isinstance(data2, np.memmap))
+		self.assertTrue((data2 == data).all())
+		self.assertEqual((smpl2.start, smpl2.end, smpl2.freq), (1, 3, None))
+		self.assertEqual(comments2, comments)
+		#a changed file invalidates the cache
+		write_db(fname, [1.0, 2.0, 3.0, 4.0], comments={'Source': 'test'})
+		data3 = read_db(fname, cache=True, cachedir=cachedir)[0]
+		self.assertEqual(len(data3), 4)
+
+	def test_load_dir(self):
+		fred = 'Title: Currency\nFrequency: Monthly\nNotes: a note\n   continued\n\nDATE        VALUE\n'
+		fred += ''.join('2000-%02d-01  %s\n'%(m, '.' if m == 3 else m) for m in range(1, 7))
+		with open(os.path.join(self.dirname, 'CURR.txt'), 'w') as fh:
+			fh.write(fred)
+		dates, values, comments = read_fred_bulk(os.path.join(self.dirname, 'CURR.txt'))
+		self.assertEqual(dates[1], np.datetime64('2000-02-01'))
+		self.assertTrue(np.isnan(values[2]))
+		self.assertEqual(comments['Notes'], 'a note continued')
+		smpl = Sample(datetime.date(1999,11,1), datetime.date(2000,2,1), freq='M')
+		write_db(os.path.join(self.dirname, 'x.db'), [1., 2., 3., 4.], smpl=smpl, comments={})
+		smpl = Sample(datetime.date(1999,1,1), datetime.date(1999,10,1), freq='Q')
+		write_db(os.path.join(self.dirname, 'q.db'), [1., 2., 3., 4.], smpl=smpl, comments={})
+		for nprocesses in (1, 2):
+			data, smpl, ids = load_dir(self.dirname, cache=True, nprocesses=nprocesses)
+			self.assertEqual(ids, ['CURR', 'x'])  #most common frequency
+			self.assertEqual(smpl, Sample(datetime.date(1999,11,1), datetime.date(2000,6,1), freq='M'))
+			self.assertTrue(np.isnan(data[:2,0]).all() and np.isnan(data[4:,1]).all())
+			self.assertEqual(list(data[2:4,0]), [1., 2.])
+			self.assertEqual(list(data[:4,1]), [1., 2., 3., 4.])
+		self.assertTrue(os.path.exists(os.path.join(self.dirname, '.econpy_cache', 'load_dir.json')))
+		#a changed file refreshes the cache, which holds no views of the old (mapped) store
+		saved = []
+		def save(cachedir, files):
+			saved.extend(values for path, stat, series in files for sid, f, ordinals, values in series)
+			_save_dir_cache(cachedir, files)
+		write_db(os.path.join(self.dirname, 'x.db'), [5., 6., 7., 8., 9.],
+			smpl=Sample(datetime.date(1999,11,1), datetime.date(2000,3,1), freq='M'), comments={})
+		with mock.patch('econpy.pytrix.pytrixIO._save_dir_cache', save):
+			data, smpl, ids = load_dir(self.dirname, cache=True)
+		self.assertEqual(len(saved), 3)
+		self.assertTrue(all(type(values) is np.ndarray for values in saved))
+		self.assertEqual(list(data[:5,1]), [5., 6., 7., 8., 9.])
+		self.assertEqual(list(load_dir(self.dirname, cache=True)[0][:5,1]), [5., 6., 7., 8., 9.])
+		data, smpl, ids = load_dir(self.dirname, freq='Q', kinds=['databank'])
+		self.assertEqual(ids, ['q'])
+		self.assertEqual(list(data[:,0]), [1., 2., 3., 4.])
+
+
+class testColumns(unittest.TestCase):
+	def setUp(self):
+		self.dirname = tempfile.mkdtemp()
+		self.fname = os.path.join(self.dirname, 'cols.txt')
+		with open(self.fname, 'w') as fh:
+			fh.write('# a comment\nid x y\n1 2.5 3\n# another\n2 3.5 4 # trailing\n\n3 4.5 5\n')
+	def tearDown(self):
+		shutil.rmtree(self.dirname)
+	def test_iter_cols(self):
+		expected = np.array([[2.5, 1], [3.5, 2], [4.5, 3]])
+		blocks = list(iter_cols(self.fname, columns=['x', 'id'], names=True))
+		self.assertEqual(len(blocks), 1)
+		self.assertTrue((blocks[0] == expected).all())
+		#exact block sizes, even when raw blocks split the file finely
+		blocks = list(iter_cols(self.fname, columns=[2, 1], skiprows=2, chunksize=2, blocksize=8))
+		self.assertEqual([len(block) for block in blocks], [2, 1])
+		self.assertTrue((np.concatenate(blocks) == expected).all())
+		with open(self.fname, 'rb') as fh:
+			mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+			blocks = list(iter_cols(mm, columns=(2, 1), skiprows=2, blocksize=5))
+			mm.close()
+		self.assertTrue((np.concatenate(blocks) == expected).all())
+		with open(self.fname) as fh:  #text file
+			self.assertTrue((next(iter_cols(fh, columns='y', names=True))[:,0] == (3, 4, 5)).all())
+		#column names need a header line, and must appear in it
+		self.assertRaises(ValueError, next, iter_cols(self.fname, columns=['x']))
+		self.assertRaises(ValueError, next, iter_cols(self.fname, columns=['x', 'z'], names=True))
+	def test_legacy_readers(self):
+		fname = os.path.join(self.dirname, 'b.txt')
+		with open(fname, 'w') as fh:
+			fh.write('1 2\n3 4\n#c\n5 6\n')
+		self.assertEqual(col2list(fname, 2), [2., 4., 6.])
+		self.assertEqual(cols2tuples(fname), [(1., 3., 5.), (2., 4., 6.)])
+		self.assertTrue((readcol(fname, comments='#', arraytype='numeric')[:,1] == (2, 4, 6)).all())
+		self.assertEqual(readcol(fname, comments='#', columns=[2]), [['2'], ['4'], ['6']])
+	def test_writer(self):
+		fname = os.path.join(self.dirname, 'out.txt')
+		x = np.random.default_rng(0).random((50, 3))
+		with ColumnWriter(fname, buffersize=100) as writer:
+			for start in range(0, 50, 7):
+				writer.write(x[start:start+7])
+		self.assertTrue((np.loadtxt(fname) == x).all())  #str round-trips floats
+		with ColumnWriter(fname, fmt='%.1f', delimiter=',') as writer:
+			writer.write(np.ones((2, 2)))
+			writer.write([0.5])
+		with open(fname) as fh:
+			self.assertEqual(fh.read(), '1.0,1.0\n1.0,1.0\n0.5\n')
+		printv([1, 2.5, 3], fname)  #no trailing separator
+		with open(fname) as fh:
+			self.assertEqual(fh.read(), '1\n2.5\n3')
+
+
+if __name__=="__main__":
+	unittest.main()
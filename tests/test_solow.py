@@ -0,0 +1,72 @@
+'''
+Unit tests for the Solow growth simulation.
+
+:see: http://docs.python.org/lib/minimal-example.html for an intro to unittest
+'''
+import tracemalloc, unittest
+import numpy as np
+
+from tests_config import econpy  #tests_config.py modifies sys.path to find econpy
+from econpy.growth.solow import solow
+
+
+class _Draws(object):
+    """Replays fixed uniform draws, as a generator's `random`."""
+    def __init__(self, draws):
+        self.draws = draws
+        self.i = 0
+    def random(self, out, dtype):
+        out[...] = self.draws[self.i:self.i + out.size].reshape(out.shape)
+        self.i += out.size
+
+class test_SolowEconomy(unittest.TestCase):
+    def test_matches_composite(self):
+        #same shocks -> same capital as CompositeSolowConsumer
+        draws = np.random.default_rng(5).random(20 * 10)
+        shocks = iter(draws.tolist())
+        saved = solow.health_shock
+        solow.health_shock = lambda: next(shocks)
+        try:
+            composite = solow.CompositeSolowConsumer(solow.bgp_capital(20), 20)
+            for _ in range(10):
+                K, N = composite.get_kn()
+                Y = solow.f(K, N)
+                composite.adjust_kn(solow.d, solow.gN + solow.gA)
+                composite.receive(solow.alpha * Y, 'rents')
+                composite.receive((1 - solow.alpha) * Y, 'wages')
+        finally:
+            solow.health_shock = saved
+        economy = solow.SolowEconomy(20)
+        economy.rng = _Draws(draws)
+        for t in range(10):
+            economy.step()
+        ks = [c.k for c in composite.consumers]
+        self.assertTrue(np.allclose(economy.k[0], ks))
+        self.assertAlmostEqual(economy.get_unemployment()[0], composite.get_unemployment())
+    def test_ensemble(self):
+        economy = solow.SolowEconomy(50, n_economies=4, dtype=np.float32, seed=7)
+        economy.run(20, record_every=10)
+        history = economy.history
+        self.assertEqual(len(history['gini']), 2)
+        self.assertEqual(history['Y'][-1].shape, (4,))
+        self.assertTrue(((0 <= history['gini'][-1]) & (history['gini'][-1] < 1)).all())
+        self.assertEqual(economy.k.dtype, np.float32)
+        #seeded runs are reproducible
+        other = solow.SolowEconomy(50, n_economies=4, dtype=np.float32, seed=7)
+        other.run(20, record_every=0)
+        self.assertTrue(np.array_equal(economy.k, other.k))
+    def test_memory(self):
+        economy = solow.SolowEconomy(10000, n_economies=10, seed=0)
+        self.assertEqual(economy.s.strides, (0, 0))  #a common saving rate is not copied
+        economy.step()
+        #a period allocates no (n_economies, n_consumers) arrays
+        tracemalloc.start()
+        economy.step()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertTrue(peak < economy.k.nbytes / 4)
+        s = np.linspace(0.1, 0.3, 10000)
+        self.assertTrue(np.allclose(solow.SolowEconomy(10000, n_economies=2, s=s).s[1], s))
+
+if __name__=="__main__":
+    unittest.main()
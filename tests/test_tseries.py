@@ -7,11 +7,14 @@ Unit tests for tseries.
 '''
 __author__ = 'Alan G. Isaac (and others as specified)'
 
+import datetime, os, shutil, tempfile
 import numpy as np
+import numpy.linalg as la
 import unittest
 
 from tests_config import econpy  #tests_config.py modifies sys.path to find econpy
-from econpy.pytrix.tseries import varlags
+from econpy.pytrix.tseries import varlags, varlags_memmap, Series, hpfilter, convert_freq
+from econpy.pytrix.pytrixIO import Sample
 
 
 class testTseries(unittest.TestCase):
@@ -21,6 +24,131 @@ class testTseries(unittest.TestCase):
 		self.assertTrue((x[2:]==xnew).all())
 		self.assertTrue((xlags[:,:2]==x[1:-1]).all())
 		self.assertTrue((xlags[:,2:]==x[:-2]).all())
+		#views by default
+		self.assertTrue(np.shares_memory(xnew, x))
+		self.assertFalse(xnew.flags.writeable)
+		y = x[:,:1]
+		ynew, ylags = varlags(y, 3)
+		self.assertTrue(np.shares_memory(ylags, y))
+		self.assertTrue((ylags == np.hstack([y[2:-1], y[1:-2], y[:-3]])).all())
+		xnew, xlags3 = varlags(x, 2, flat=False)
+		self.assertTrue(np.shares_memory(xlags3, x))
+		self.assertTrue((xlags3.reshape(8, 4) == xlags).all())
+		xnew, xlags = varlags(x, 2, copy=True)
+		self.assertTrue(xnew.flags.writeable and xlags.flags.writeable)
+		#missing values at the ends are trimmed
+		z = x.astype(float)
+		z[0,1] = np.nan
+		xnew, xlags = varlags(z, 2, trim=True)
+		self.assertTrue((xnew == x[3:]).all())
+		self.assertTrue((xlags[:,:2] == x[2:-1]).all())
+	def test_varlags_memmap(self):
+		x = np.arange(40.).reshape((20,2))
+		dirname = tempfile.mkdtemp()
+		try:
+			xnew, xlags = varlags_memmap(x, 3, os.path.join(dirname, 'lags.npy'), chunksize=4)
+			self.assertTrue((xlags == varlags(x, 3)[1]).all())
+			del xlags
+			saved = np.load(os.path.join(dirname, 'lags.npy'), mmap_mode='r')
+			self.assertEqual(saved.shape, (17, 6))
+			del saved
+		finally:
+			shutil.rmtree(dirname)
+
+	def test_series(self):
+		smpl = Sample(datetime.date(2000,1,1), datetime.date(2002,12,1), freq='M')
+		data = np.arange(36.)**2
+		x = Series(data, smpl=smpl)
+		self.assertTrue(x.data is data)  #no copy
+		#lags and leads are views with shifted samples
+		xlag = x.lag(2)
+		self.assertTrue(np.shares_memory(xlag.data, data))
+		self.assertTrue((xlag.data == data[:-2]).all())
+		self.assertEqual(xlag.smpl_full, Sample(datetime.date(2000,3,1), datetime.date(2002,12,1), freq=12))
+		self.assertEqual(x.shift(3).date(-1), datetime.date(2002,9,1))
+		#differences
+		dx = x.d(n=1, s=12)
+		expected = np.diff(data[12:] - data[:-12])
+		self.assertTrue(np.allclose(dx.data, expected))
+		self.assertEqual(dx.date(0), datetime.date(2001,2,1))
+		self.assertEqual(dx.smpl_full.dates[-1], datetime.date(2002,12,1))
+		self.assertEqual(x.date_index(datetime.date(2001,4,1)), 15)
+		#arithmetic and transformations stay array backed
+		y = 2*x.transform(np.sqrt) - x.transform(lambda xi: xi if xi < 4 else 0)
+		self.assertTrue(isinstance(y, Series))
+		self.assertTrue(np.allclose(y.data[:4], (0, 1, 4, 6)))
+		self.assertRaises(TypeError, x.__add__, Series(data[:12]))
+		#scalar functions are applied to each observation, exactly once
+		calls = []
+		z = x.transform(lambda xi: calls.append(xi) or xi + len(calls))
+		self.assertEqual(len(calls), 36)
+		self.assertTrue(np.allclose(z.data, data + np.arange(1, 37)))
+		self.assertRaises(ZeroDivisionError, x.transform, lambda xi: 1 / (xi - 4))
+		self.assertTrue(np.allclose(x.transform(np.cumsum, vectorized=True).data, np.cumsum(data)))
+		self.assertRaises(ValueError, x.transform, np.sum, vectorized=True)
+		#equality requires conformable series
+		self.assertTrue(x == Series(data.copy(), smpl=smpl))
+		self.assertFalse(x == Series(data[:12]))
+		self.assertFalse(x == data)
+		#undated series
+		u = Series([1, 2, 3, 4])
+		self.assertEqual(u.d().smpl_full, (2, 4))
+		self.assertEqual(u.lag().tolist(), [1., 2., 3.])
+
+	def test_hpfilter(self):
+		rng = np.random.default_rng(0)
+		T, penalty = 40, 1600
+		X = rng.normal(size=(T, 3)).cumsum(axis=0)
+		D = np.diff(np.eye(T), 2, axis=0)
+		expected = la.solve(np.eye(T) + penalty*np.dot(D.T, D), X)
+		cycle, trend = hpfilter(X, penalty)
+		self.assertTrue(np.allclose(trend, expected))
+		self.assertTrue(np.allclose(cycle + trend, X))
+		cycle, trend = hpfilter(X[:,1], penalty)  #1d input
+		self.assertEqual(trend.shape, (T,))
+		self.assertTrue(np.allclose(trend, expected[:,1]))
+		#a linear trend passes through unchanged
+		cycle, trend = hpfilter(np.arange(10.), 6.25)
+		self.assertTrue(np.allclose(cycle, 0))
+
+	def test_convert_freq(self):
+		#daily to monthly, many series at once
+		data = np.arange(200.).reshape((100, 2))
+		start = datetime.date(2000, 1, 15)
+		newdata, newstart = convert_freq(data, start, 'D', 'M', how='sum')
+		self.assertEqual(newstart, datetime.date(2000, 1, 1))
+		self.assertTrue(np.allclose(newdata[1], data[17:46].sum(axis=0)))  #February 2000
+		self.assertTrue(np.allclose(newdata.sum(axis=0), data.sum(axis=0)))
+		newdata, newstart = convert_freq(data, start, 'D', 'M', how='max', drop_partial=True)
+		self.assertEqual(newstart, datetime.date(2000, 2, 1))
+		self.assertTrue(np.allclose(newdata, (data[45], data[76])))
+		#quarterly to annual
+		q = np.arange(10.)
+		for how, expected in (('first', (0, 3, 7)), ('last', (2, 6, 9)), ('mean', (1, 4.5, 8)), ('min', (0, 3, 7))):
+			newdata, newstart = convert_freq(q, datetime.date(2000, 4, 1), 'Q', 'A', how=how)
+			self.assertTrue(np.allclose(newdata, expected))
+		self.assertRaises(NotImplementedError, convert_freq, q, datetime.date(2000, 4, 1), 'A', 'Q')
+	def test_subsample(self):
+		smpl = Sample(datetime.date(2000,1,1), datetime.date(2001,12,1), freq='M')
+		x = Series(np.arange(24.), smpl=smpl)
+		sub = Sample(datetime.date(2000,3,1), datetime.date(2001,8,1), freq='M')
+		y = x.subsample(smpl=sub)
+		self.assertTrue((y.data == np.arange(2., 20.)).all())
+		self.assertEqual(y.smpl_full, sub)
+		y = x.subsample(smpl=sub, freq='Q', how='sum', drop_partial=True)
+		self.assertTrue(np.allclose(y.data, (12, 21, 30, 39, 48)))
+		self.assertEqual(y.smpl_full, Sample(datetime.date(2000,4,1), datetime.date(2001,4,1), freq='Q'))
+		self.assertTrue((x.subsample(freq='A').data == (0, 12)).all())
+		#a tuple holds (start, end) indexes
+		y = x.subsample(smpl=(2, 19))
+		self.assertTrue((y.data == np.arange(2., 20.)).all())
+		self.assertEqual(y.smpl_full, sub)
+		self.assertRaises(ValueError, x.subsample, (2, 24))
+		#no complete target period
+		self.assertRaises(ValueError, x.subsample, (0, 1), freq=4, drop_partial=True)
+		self.assertTrue((x.subsample((0, 1), freq=4).data == (0,)).all())
+		u = Series(np.arange(5.), smpl=(3, 7)).subsample(smpl=(1, 2))
+		self.assertEqual(u.smpl_full, (4, 5))
 
 
 if __name__=="__main__":
@@ -0,0 +1,83 @@
+'''
+Unit tests for unitroot.py.
+'''
+__author__ = 'Alan G. Isaac (and others as specified)'
+
+import os, shutil, tempfile
+import numpy as np
+import unittest
+
+from tests_config import econpy  #tests_config.py modifies sys.path to find econpy
+from econpy.pytrix import unitroot
+from econpy.pytrix.unitroot import adf_ls, adf_batch, adf_specs
+from econpy.pytrix.unitroot import adf_simulate, adf_cvtable, adf_critvals, adf_pvalue
+
+
+class testADF(unittest.TestCase):
+	def setUp(self):
+		rng = np.random.default_rng(314)
+		ys = np.cumsum(rng.normal(size=(120, 4)), axis=0)
+		ys[:,1] = rng.normal(size=120)  #stationary series
+		self.ys = ys
+	def test_adf_batch(self):
+		ys, maxlag = self.ys, 3
+		results = adf_batch(ys, maxlag, chunksize=3)
+		for j in range(ys.shape[1]):
+			for p in range(maxlag + 1):
+				#common sample: drop the extra presample observations
+				ols = adf_ls(ys[maxlag-p:, j], p)
+				for spec in adf_specs:
+					res = results[spec]
+					self.assertAlmostEqual(res['coefs'][j,p], ols[spec].coefs[0])
+					self.assertAlmostEqual(res['tvals'][j,p], ols[spec].tvals[0])
+					T, k = ols[spec].nobs, ols[spec].ncoefs
+					self.assertAlmostEqual(res['ics'][j,p], np.log(ols[spec].ess/T) + 2*k/T)
+		for spec in adf_specs:
+			res = results[spec]
+			self.assertTrue(np.all(res['lag'] == res['ics'].argmin(axis=1)))
+			self.assertEqual(res['nobs'], len(ys) - 1 - maxlag)
+		self.assertTrue(results['constant']['tval'][1] < -3.43)
+		#a single series may be passed as a 1d sequence
+		one = adf_batch(list(ys[:,0]), maxlag, specs=('constant',), ic='bic')
+		self.assertEqual(set(one), set(['constant']))
+		self.assertEqual(one['constant']['tvals'].shape, (1, maxlag + 1))
+
+
+class testCriticalValues(unittest.TestCase):
+	def setUp(self):
+		self.cachedir = tempfile.mkdtemp()
+	def tearDown(self):
+		shutil.rmtree(self.cachedir)
+		unitroot._cv_tables.clear()
+	def test_cvtable(self):
+		T, nreps = 50, 4000
+		stats = adf_simulate(T, 'constant', nreps, seed=0, chunksize=1500)
+		self.assertEqual(len(stats), nreps)
+		self.assertTrue(np.all(np.diff(stats) >= 0))
+		cvs = adf_critvals(T, 'constant', nreps=nreps, cachedir=self.cachedir, seed=0, chunksize=1500)
+		self.assertTrue(np.allclose(cvs, np.quantile(stats, (0.01, 0.05, 0.10)), atol=0.01))
+		self.assertTrue(abs(cvs[1] - (-2.92)) < 0.1)  #5% critical value for T=50
+		path = os.path.join(self.cachedir, 'adf_T50_constant_R4000_S0_C1500.npz')
+		self.assertTrue(os.path.exists(path))
+		#a later call (even from a fresh session) reads the on-disk table
+		unitroot._cv_tables.clear()
+		with open(path, 'rb') as fh:
+			saved = fh.read()
+		table = adf_cvtable(T, 'constant', nreps, cachedir=self.cachedir, seed=0, chunksize=1500)
+		self.assertTrue(np.allclose(np.interp((0.01, 0.05, 0.10), unitroot.cv_probs, table), cvs))
+		with open(path, 'rb') as fh:
+			self.assertEqual(fh.read(), saved)
+		#another seed is another table
+		other = adf_cvtable(T, 'constant', nreps, cachedir=self.cachedir, seed=1, chunksize=1500)
+		self.assertFalse(np.array_equal(other, table))
+		self.assertTrue(np.array_equal(other, np.quantile(
+			adf_simulate(T, 'constant', nreps, seed=1, chunksize=1500), unitroot.cv_probs)))
+		pvals = adf_pvalue(cvs, T, 'constant', nreps=nreps, cachedir=self.cachedir, seed=0, chunksize=1500)
+		self.assertTrue(np.allclose(pvals, (0.01, 0.05, 0.10), atol=1e-3))
+		#finite-sample values in a smaller sample are more negative
+		trend = adf_critvals(25, 'constant_trend', nreps=nreps, cachedir=False, seed=0)
+		self.assertTrue(np.all(trend < (-3.96, -3.41, -3.13)))
+
+
+if __name__=="__main__":
+	unittest.main()